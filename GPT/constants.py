@@ -13,6 +13,9 @@ OBJATHOR_VERSIONED_DIR = os.path.join(OBJATHOR_ASSETS_BASE_DIR, ASSETS_VERSION)
 OBJATHOR_ASSETS_DIR = os.path.join(OBJATHOR_VERSIONED_DIR, "assets")
 OBJATHOR_FEATURES_DIR = os.path.join(OBJATHOR_VERSIONED_DIR, "features")
 OBJATHOR_ANNOTATIONS_PATH = os.path.join(OBJATHOR_VERSIONED_DIR, "annotations.json.gz")
+RETRIEVAL_INDEX_DIR = os.environ.get(
+    "RETRIEVAL_INDEX_DIR", os.path.join(OBJATHOR_VERSIONED_DIR, "retrieval_index")
+)
 
 HOLODECK_BASE_DATA_DIR = os.path.join(
     OBJATHOR_ASSETS_BASE_DIR, "holodeck", HD_BASE_VERSION
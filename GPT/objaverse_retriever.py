@@ -1,4 +1,6 @@
+import json
 import os
+import uuid
 
 import compress_json
 import compress_pickle
@@ -12,10 +14,93 @@ from .constants import (
     OBJATHOR_ANNOTATIONS_PATH,
     OBJATHOR_ASSETS_DIR,
     OBJATHOR_FEATURES_DIR,
+    RETRIEVAL_INDEX_DIR,
 )
 from .utils import get_bbox_dims
 
 
+INDEX_SOURCES = [
+    os.path.join(OBJATHOR_FEATURES_DIR, "clip_features.pkl"),
+    os.path.join(OBJATHOR_FEATURES_DIR, "sbert_features.pkl"),
+    os.path.join(HOLODECK_THOR_FEATURES_DIR, "clip_features.pkl"),
+    os.path.join(HOLODECK_THOR_FEATURES_DIR, "sbert_features.pkl"),
+]
+
+
+def _source_stamp():
+    return {p: os.stat(p).st_mtime_ns for p in INDEX_SOURCES}
+
+
+def _save_npy(path, array):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp.npy"
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+def build_feature_index(index_dir=RETRIEVAL_INDEX_DIR):
+    """
+    Flatten the objathor + thor feature pickles into .npy matrices that can be
+    memory-mapped, keeping only uids whose asset is actually available.
+
+    clip.npy holds the L2-normalized image features (n_assets, n_views, dim),
+    sbert.npy the text features (n_assets, dim) and index.json the uids in row
+    order, which of them are objathor assets, and the stamp of the sources.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+
+    objathor_clip = compress_pickle.load(INDEX_SOURCES[0])
+    objathor_sbert = compress_pickle.load(INDEX_SOURCES[1])
+    assert objathor_clip["uids"] == objathor_sbert["uids"]
+    thor_clip = compress_pickle.load(INDEX_SOURCES[2])
+    thor_sbert = compress_pickle.load(INDEX_SOURCES[3])
+    assert thor_clip["uids"] == thor_sbert["uids"]
+
+    # thor assets ship with the simulator, only objaverse files need checking
+    n_objathor = len(objathor_clip["uids"])
+    valid = [
+        i
+        for i, uid in enumerate(objathor_clip["uids"])
+        if os.path.exists(os.path.join(OBJATHOR_ASSETS_DIR, uid, f"{uid}.pkl.gz"))
+    ]
+    print(f"[INFO] 可用资产: {len(valid)}/{n_objathor} objathor, {len(thor_clip['uids'])} thor")
+
+    uids = [objathor_clip["uids"][i] for i in valid] + list(thor_clip["uids"])
+    clip = np.concatenate(
+        [objathor_clip["img_features"][valid], thor_clip["img_features"]], axis=0
+    ).astype(np.float32)
+    clip /= np.maximum(np.linalg.norm(clip, axis=-1, keepdims=True), 1e-12)
+    sbert = np.concatenate(
+        [objathor_sbert["text_features"][valid], thor_sbert["text_features"]], axis=0
+    ).astype(np.float32)
+
+    _save_npy(os.path.join(index_dir, "clip.npy"), clip)
+    _save_npy(os.path.join(index_dir, "sbert.npy"), sbert)
+    meta = {"uids": uids, "n_objathor": len(valid), "sources": _source_stamp()}
+    tmp = os.path.join(index_dir, f"index.{uuid.uuid4().hex}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(index_dir, "index.json"))
+    return meta
+
+
+def load_feature_index(index_dir=RETRIEVAL_INDEX_DIR):
+    """Memory-map the feature index, (re)building it when missing or stale"""
+    meta_path = os.path.join(index_dir, "index.json")
+    meta = None
+    if os.path.exists(meta_path):
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        if meta["sources"] != _source_stamp():
+            print("[INFO] 特征文件已更新, 重建检索索引...")
+            meta = None
+    if meta is None:
+        meta = build_feature_index(index_dir)
+
+    clip = np.load(os.path.join(index_dir, "clip.npy"), mmap_mode="r")
+    sbert = np.load(os.path.join(index_dir, "sbert.npy"), mmap_mode="r")
+    return meta, clip, sbert
+
+
 class ObjathorRetriever:
     def __init__(
         self,
@@ -24,80 +109,17 @@ class ObjathorRetriever:
         clip_tokenizer,
         sbert_model,
         retrieval_threshold,
+        index_dir=RETRIEVAL_INDEX_DIR,
     ):
         objathor_annotations = compress_json.load(OBJATHOR_ANNOTATIONS_PATH)
         thor_annotations = compress_json.load(HOLODECK_THOR_ANNOTATIONS_PATH)
         self.database = {**objathor_annotations, **thor_annotations}
 
-        objathor_clip_features_dict = compress_pickle.load(
-            os.path.join(OBJATHOR_FEATURES_DIR, "clip_features.pkl")
-        )  # clip features
-        objathor_sbert_features_dict = compress_pickle.load(
-            os.path.join(OBJATHOR_FEATURES_DIR, "sbert_features.pkl")
-        )  # sbert features
-        assert (
-            objathor_clip_features_dict["uids"] == objathor_sbert_features_dict["uids"]
-        )
-
-        objathor_uids = objathor_clip_features_dict["uids"]
-        objathor_clip_features = objathor_clip_features_dict["img_features"].astype(
-            np.float32
-        )
-        objathor_sbert_features = objathor_sbert_features_dict["text_features"].astype(
-            np.float32
-        )
-
-        thor_clip_features_dict = compress_pickle.load(
-            os.path.join(HOLODECK_THOR_FEATURES_DIR, "clip_features.pkl")
-        )  # clip features
-        thor_sbert_features_dict = compress_pickle.load(
-            os.path.join(HOLODECK_THOR_FEATURES_DIR, "sbert_features.pkl")
-        )  # clip features
-        assert thor_clip_features_dict["uids"] == thor_sbert_features_dict["uids"]
-
-        thor_uids = thor_clip_features_dict["uids"]
-        thor_clip_features = thor_clip_features_dict["img_features"].astype(np.float32)
-        thor_sbert_features = thor_sbert_features_dict["text_features"].astype(
-            np.float32
-        )
-
-        # Filter out missing asset files
-        print("[INFO] 检查资产文件可用性...")
-        all_uids = objathor_uids + thor_uids
-        all_clip_features = np.concatenate(
-            [objathor_clip_features, thor_clip_features], axis=0
-        )
-        all_sbert_features = np.concatenate(
-            [objathor_sbert_features, thor_sbert_features], axis=0
-        )
-
-        valid_indices = []
-        missing_count = 0
-        for idx, uid in enumerate(all_uids):
-            # THOR assets don't need file checking
-            if uid in thor_uids:
-                valid_indices.append(idx)
-            else:
-                # Check if Objaverse asset file exists
-                asset_path = os.path.join(OBJATHOR_ASSETS_DIR, uid, f"{uid}.pkl.gz")
-                if os.path.exists(asset_path):
-                    valid_indices.append(idx)
-                else:
-                    missing_count += 1
-
-        if missing_count > 0:
-            print(f"[INFO] 过滤掉 {missing_count} 个缺失的资产文件")
-            print(f"[INFO] 可用资产: {len(valid_indices)}/{len(all_uids)}")
-
-        # Only keep valid assets
-        self.asset_ids = [all_uids[i] for i in valid_indices]
-        valid_clip_features = all_clip_features[valid_indices]
-        valid_sbert_features = all_sbert_features[valid_indices]
-
-        self.clip_features = torch.from_numpy(valid_clip_features)
-        self.clip_features = F.normalize(self.clip_features, p=2, dim=-1).cuda()
-
-        self.sbert_features = torch.from_numpy(valid_sbert_features).cuda()
+        meta, self.clip_features, self.sbert_features = load_feature_index(index_dir)
+        self.asset_ids = meta["uids"]
+        self.uid_index = {uid: i for i, uid in enumerate(self.asset_ids)}
+        # rows before n_objathor are objaverse assets with a .pkl.gz on disk
+        self.objathor_ids = frozenset(self.asset_ids[: meta["n_objathor"]])
 
         self.clip_model = clip_model
         self.clip_preprocess = clip_preprocess
@@ -108,40 +130,52 @@ class ObjathorRetriever:
 
         self.use_text = True
 
-    def retrieve(self, queries, threshold=28):
+    def similarities(self, queries):
+        """clip and combined similarity of every query against every asset, (n_queries, n_assets)"""
+        device = next(self.clip_model.parameters()).device
         with torch.no_grad():
             query_feature_clip = self.clip_model.encode_text(
-                self.clip_tokenizer(queries)
+                self.clip_tokenizer(queries).to(device)
             )
+            query_feature_clip = F.normalize(query_feature_clip, p=2, dim=-1)
+        query_feature_clip = query_feature_clip.cpu().numpy().astype(np.float32)
 
-            query_feature_clip = F.normalize(query_feature_clip, p=2, dim=-1).cuda()
+        n_assets, n_views, dim = self.clip_features.shape
+        clip_similarities = query_feature_clip @ self.clip_features.reshape(-1, dim).T
+        clip_similarities = 100 * clip_similarities.reshape(
+            len(queries), n_assets, n_views
+        ).max(axis=-1)
 
-        clip_similarities = 100 * torch.einsum(
-            "ij, lkj -> ilk", query_feature_clip, self.clip_features
-        )
-        clip_similarities = torch.max(clip_similarities, dim=-1).values
+        if not self.use_text:
+            return clip_similarities, clip_similarities
 
         query_feature_sbert = self.sbert_model.encode(
-            queries, convert_to_tensor=True, show_progress_bar=False
-        )
+            queries, convert_to_numpy=True, show_progress_bar=False
+        ).astype(np.float32)
         sbert_similarities = query_feature_sbert @ self.sbert_features.T
+        return clip_similarities, clip_similarities + sbert_similarities
+
+    def retrieve_many(self, queries, threshold=28):
+        """Ranked (uid, score) candidates for each query, from a single encode and matmul"""
+        clip_similarities, similarities = self.similarities(queries)
+
+        results = []
+        for q in range(len(queries)):
+            (asset_indices,) = np.nonzero(clip_similarities[q] > threshold)
+            order = np.argsort(-similarities[q, asset_indices], kind="stable")
+            results.append(
+                [
+                    (self.asset_ids[i], float(similarities[q, i]))
+                    for i in asset_indices[order]
+                ]
+            )
+        return results
 
-        if self.use_text:
-            similarities = clip_similarities + sbert_similarities
-        else:
-            similarities = clip_similarities
-
-        threshold_indices = torch.where(clip_similarities > threshold)
-
-        unsorted_results = []
-        for query_index, asset_index in zip(*threshold_indices):
-            score = similarities[query_index, asset_index].item()
-            unsorted_results.append((self.asset_ids[asset_index], score))
+    def retrieve(self, queries, threshold=28):
+        results = [c for cands in self.retrieve_many(queries, threshold) for c in cands]
 
         # Sorting the results in descending order by score
-        results = sorted(unsorted_results, key=lambda x: x[1], reverse=True)
-
-        return results
+        return sorted(results, key=lambda x: x[1], reverse=True)
 
     def compute_size_difference(self, target_size, candidates):
         candidate_sizes = []
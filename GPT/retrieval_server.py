@@ -0,0 +1,134 @@
+"""
+Long-lived objaverse retrieval service.
+
+Loading CLIP ViT-L-14, SBERT and the asset features takes far longer than a
+query, so they are loaded once per process. The solver talks to a running
+server over HTTP; retrieve_holodeck.py uses the same code in-process.
+
+Usage:
+    python -m GPT.retrieval_server --port 8765 [--device cpu]
+
+    POST /retrieve {"categories": ["sofa", "lamp"], "threshold": 30}
+      -> {"sofa": ["/.../assets/<uid>/<uid>.pkl.gz"], "lamp": []}
+    GET /health -> {"ok": true}
+"""
+
+import argparse
+import json
+import os
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from .constants import OBJATHOR_ASSETS_DIR, RETRIEVAL_INDEX_DIR
+
+DEFAULT_PORT = 8765
+
+_retriever = None
+
+
+def get_retriever(device="cpu", index_dir=RETRIEVAL_INDEX_DIR):
+    global _retriever
+    if _retriever is not None:
+        return _retriever
+
+    import open_clip
+    from sentence_transformers import SentenceTransformer
+
+    from .objaverse_retriever import ObjathorRetriever
+
+    print(f"Loading retriever models on {device}...")
+    clip_model, _, clip_preprocess = open_clip.create_model_and_transforms(
+        "ViT-L-14", pretrained="laion2b_s32b_b82k", device=device
+    )
+    clip_model.eval()
+    clip_tokenizer = open_clip.get_tokenizer("ViT-L-14")
+    sbert_model = SentenceTransformer("all-mpnet-base-v2", device=device)
+
+    _retriever = ObjathorRetriever(
+        clip_model=clip_model,
+        clip_preprocess=clip_preprocess,
+        clip_tokenizer=clip_tokenizer,
+        sbert_model=sbert_model,
+        retrieval_threshold=28,
+        index_dir=index_dir,
+    )
+    print("Retriever loaded successfully.")
+    return _retriever
+
+
+def retrieve_categories(retriever, categories, threshold=30):
+    """Best objaverse asset file per category, in the objav_files.json format"""
+    categories = list(categories)
+    if len(categories) == 0:
+        return {}
+
+    queries = [f"a 3D model of a single {category}" for category in categories]
+    results = {}
+    for category, candidates in zip(
+        categories, retriever.retrieve_many(queries, threshold=threshold)
+    ):
+        asset_id = next(
+            (uid for uid, _ in candidates if uid in retriever.objathor_ids), None
+        )
+        if asset_id is None:
+            print(f"  No candidates found for {category}")
+            results[category] = []
+            continue
+        results[category] = [
+            os.path.join(OBJATHOR_ASSETS_DIR, asset_id, f"{asset_id}.pkl.gz")
+        ]
+        print(f"  {category}: {asset_id}")
+    return results
+
+
+class RetrievalHandler(BaseHTTPRequestHandler):
+    retriever = None
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, {"ok": True})
+        else:
+            self._reply(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/retrieve":
+            self._reply(404, {"error": f"unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            results = retrieve_categories(
+                self.retriever,
+                request["categories"],
+                threshold=request.get("threshold", 30),
+            )
+        except Exception as e:
+            self._reply(500, {"error": repr(e)})
+            return
+        self._reply(200, results)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--device", type=str, default="cpu")
+    parser.add_argument("--index_dir", type=str, default=RETRIEVAL_INDEX_DIR)
+    args = parser.parse_args()
+
+    RetrievalHandler.retriever = get_retriever(args.device, args.index_dir)
+    # requests are served one at a time, the models are not shared across threads
+    server = HTTPServer((args.host, args.port), RetrievalHandler)
+    print(f"Retrieval server listening on {args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
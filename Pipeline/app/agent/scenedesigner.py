@@ -27,10 +27,12 @@ from app.tool.init_gpt import InitGPTExecute
 from app.tool.remove_obj import RemoveExecute
 from app.tool.terminate import Terminate
 from app.tool.tool_collection import ToolCollection
+from app.tool.update_infinigen import close_blender_client
 from app.tool.update_layout import UpdateLayoutExecute
 from app.tool.update_rotation import UpdateRotationExecute
 from app.tool.update_size import UpdateSizeExecute
 from app.utils import dict2str, encode_image, lst2str
+from infinigen_examples.util.iteration_branch import IterationBranches
 
 
 class SceneDesigner:
@@ -104,44 +106,9 @@ class SceneDesigner:
                 save_dir = os.getenv("save_dir")
                 iter = self.current_step - 1
                 try:
-                    os.system(
-                        f"cp {save_dir}/record_scene/render_{iter}_marked.jpg {save_dir}/record_scene/render_{iter}_marked_failed.jpg"
-                    )
-                    os.system(
-                        f"cp {save_dir}/record_scene/render_{iter}.jpg {save_dir}/record_scene/render_{iter}_failed.jpg"
-                    )
-                    os.system(
-                        f"cp {save_dir}/record_files/metric_{iter}.json {save_dir}/record_files/metric_{iter}_failed.json"
-                    )
-                    os.system(
-                        f"cp {save_dir}/record_files/scene_{iter}.blend {save_dir}/record_files/scene_{iter}_failed.blend"
-                    )
-                    os.system(
-                        f"cp {save_dir}/record_files/env_{iter}.pkl {save_dir}/record_files/env_{iter}_failed.pkl"
-                    )
-                    os.system(
-                        f"cp {save_dir}/record_files/house_bbox_{iter}.pkl {save_dir}/record_files/house_bbox_{iter}_failed.pkl"
-                    )
-                    os.system(
-                        f"cp {save_dir}/record_files/p_{iter}.pkl {save_dir}/record_files/p_{iter}_failed.pkl"
-                    )
-                    os.system(
-                        f"cp {save_dir}/record_files/solved_bbox_{iter}.pkl {save_dir}/record_files/solved_bbox_{iter}_failed.pkl"
-                    )
-                    os.system(
-                        f"cp {save_dir}/record_files/solver_{iter}.pkl {save_dir}/record_files/solver_{iter}_failed.pkl"
-                    )
-                    os.system(
-                        f"cp {save_dir}/record_files/state_{iter}.pkl {save_dir}/record_files/state_{iter}_failed.pkl"
-                    )
-                    os.system(
-                        f"cp {save_dir}/record_files/terrain_{iter}.pkl {save_dir}/record_files/terrain_{iter}_failed.pkl"
-                    )
-                    os.system(
-                        f"cp {save_dir}/pipeline/metric_{iter}.json {save_dir}/pipeline/metric_{iter}_failed.json"
-                    )
-                except:
-                    pass
+                    IterationBranches(save_dir).branch(iter, "failed")
+                except OSError as e:
+                    logger.warning(f"Could not branch failed iter {iter}: {e}")
                 return "Failed"
 
         """Execute a single step: think and act."""
@@ -549,6 +516,9 @@ class SceneDesigner:
             self.state = AgentState.IDLE
             results.append(f"Terminated: Reached max steps ({self.max_steps})")
 
+        # release the Blender connection shared by all tool calls of this run
+        close_blender_client()
+
         return "\n".join(results) if results else "No steps executed"
 
     def handle_stuck_state(self):
@@ -1,4 +1,5 @@
 import json
+import sys
 import threading
 from pathlib import Path
 from typing import Dict, Optional
@@ -14,6 +15,12 @@ def get_project_root() -> Path:
 PROJECT_ROOT = get_project_root()
 WORKSPACE_ROOT = PROJECT_ROOT / "workspace"
 
+# SceneWeaver checkout, so stdlib-only helpers shared with the Blender side
+# (infinigen_examples.util.iteration_branch) can be imported from this env
+SCENEWEAVER_ROOT = PROJECT_ROOT.parent
+if str(SCENEWEAVER_ROOT) not in sys.path:
+    sys.path.append(str(SCENEWEAVER_ROOT))
+
 
 class LLMSettings(BaseModel):
     model: str = Field(..., description="Model name")
@@ -25,6 +32,17 @@ class LLMSettings(BaseModel):
         description="Maximum input tokens to use across all requests (None for unlimited)",
     )
     temperature: float = Field(1.0, description="Sampling temperature")
+    cache_mode: str = Field(
+        "off",
+        description="Response cache: off, readwrite (serve hits, record misses) or replay (hits only)",
+    )
+    cache_dir: str = Field(
+        str(WORKSPACE_ROOT / "llm_cache"), description="Response cache directory"
+    )
+    cache_max_mb: int = Field(2048, description="Response cache size before LRU eviction")
+    max_concurrency: int = Field(
+        4, description="Maximum number of requests ask_many keeps in flight"
+    )
 
 
 class ProxySettings(BaseModel):
@@ -114,6 +132,14 @@ class Config:
             "max_tokens": base_llm.get("max_tokens", 8192),
             "max_input_tokens": base_llm.get("max_input_tokens"),
             "temperature": base_llm.get("temperature", 1.0),
+            # LLM_CACHE_MODE lets a single run be replayed without editing config.json
+            "cache_mode": os.getenv("LLM_CACHE_MODE", base_llm.get("cache_mode", "off")),
+            "cache_dir": os.getenv(
+                "LLM_CACHE_DIR",
+                base_llm.get("cache_dir", str(WORKSPACE_ROOT / "llm_cache")),
+            ),
+            "cache_max_mb": base_llm.get("cache_max_mb", 2048),
+            "max_concurrency": base_llm.get("max_concurrency", 4),
         }
 
         config_dict = {
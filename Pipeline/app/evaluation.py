@@ -97,7 +97,7 @@ def eval_scene(iter, user_demand):
     return metric
 
 
-def eval_general_score(iter, user_demand):
+def eval_general_score(iter, user_demand, num_samples=1):
     save_dir = os.getenv("save_dir")
     # basedir = "/mnt/fillipo/yandan/scenesage/record_scene/bedroom/record_scene"
     image_path_1 = f"{save_dir}/record_scene/render_{iter}_marked.jpg"
@@ -199,14 +199,22 @@ You are working in a 3D scene environment with the following conventions:
 
 """
 
-    gpt_text_response = gpt.ask_with_images(
-        [{"role": "user", "content": prompting_text_user}],
-        images=[image_path_1],
-        temperature=1.0,
+    # independent samples of the same grading prompt are requested concurrently
+    gpt_text_responses = gpt.ask_many(
+        [
+            dict(
+                messages=[{"role": "user", "content": prompting_text_user}],
+                images=[image_path_1],
+                temperature=1.0,
+                sample=i,
+            )
+            for i in range(num_samples)
+        ],
+        method="ask_with_images",
     )
 
     grades = {"realism": [], "functionality": [], "layout": [], "completion": []}
-    for _ in range(1):
+    for gpt_text_response in gpt_text_responses:
         try:
             print(gpt_text_response)
         except:
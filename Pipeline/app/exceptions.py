@@ -11,3 +11,7 @@ class OpenManusError(Exception):
 
 class TokenLimitExceeded(OpenManusError):
     """Exception raised when the token limit is exceeded"""
+
+
+class LLMCacheMiss(OpenManusError):
+    """Raised in replay mode when a request has no recorded response"""
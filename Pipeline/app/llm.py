@@ -1,9 +1,11 @@
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional, Union
 
 import requests
+from requests.adapters import HTTPAdapter
 from tenacity import (
     retry,
     retry_if_exception_type,
@@ -12,6 +14,8 @@ from tenacity import (
 )
 
 from app.config import LLMSettings, config
+from app.exceptions import LLMCacheMiss
+from app.llm_cache import CACHE_MODES, ResponseCache, request_key
 from app.logger import logger  # Assuming a logger is set up in your app
 
 
@@ -309,6 +313,30 @@ class LLM:
             self.temperature = llm_config.temperature
             self.api_key = llm_config.api_key
             self.base_url = llm_config.base_url.rstrip("/")
+            self.max_concurrency = max(1, llm_config.max_concurrency)
+
+            # One pooled session per LLM, so consecutive and concurrent calls
+            # reuse warm TCP/TLS connections instead of reconnecting each time
+            self.session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=self.max_concurrency
+            )
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+
+            if llm_config.cache_mode not in CACHE_MODES:
+                raise ValueError(
+                    f"Invalid cache_mode {llm_config.cache_mode!r}, expected one of {CACHE_MODES}"
+                )
+            self.cache_mode = llm_config.cache_mode
+            self.cache = None
+            if self.cache_mode != "off":
+                self.cache = ResponseCache(
+                    llm_config.cache_dir, llm_config.cache_max_mb * 1024 * 1024
+                )
+                logger.info(
+                    f"LLM response cache ({self.cache_mode}) at {llm_config.cache_dir}"
+                )
 
             self.client_initialized = True
 
@@ -359,6 +387,68 @@ class LLM:
 
         return formatted_messages
 
+    def _generate(
+        self,
+        body: dict,
+        timeout: int,
+        allow_tool_calls: bool = False,
+        sample: int = 0,
+    ) -> GeminiResponse:
+        """
+        Send a generateContent request, going through the response cache if enabled.
+
+        Args:
+            body: Gemini REST request body
+            timeout: Request timeout in seconds
+            allow_tool_calls: Accept a response that only holds tool calls
+            sample: Index of a repeated draw of the same request, part of the cache key
+
+        Returns:
+            GeminiResponse: The parsed response
+
+        Raises:
+            ValueError: On a REST API error or an empty response (retried by callers)
+            LLMCacheMiss: In replay mode, when the request was never recorded
+        """
+        key = request_key(self.model, body, sample) if self.cache else None
+        response_json = self.cache.get(key) if self.cache else None
+        cache_hit = response_json is not None
+
+        if not cache_hit:
+            if self.cache_mode == "replay":
+                raise LLMCacheMiss(f"No recorded LLM response for request {key}")
+
+            url = f"{self.base_url}/models/{self.model}:generateContent?key={self.api_key}"
+            headers = {"Content-Type": "application/json"}
+            response = self.session.post(
+                url, headers=headers, json=body, timeout=timeout
+            )
+
+            # Check for errors
+            try:
+                response.raise_for_status()
+            except requests.HTTPError as e:
+                error_msg = (
+                    f"REST API error: {e.response.status_code} - {e.response.text}"
+                )
+                logger.error(error_msg)
+                raise ValueError(error_msg) from e
+
+            response_json = response.json()
+
+        # Parse response
+        result = parse_gemini_response(response_json)
+
+        if not result.content and not (allow_tool_calls and result.tool_calls):
+            raise ValueError("Empty response from LLM")
+
+        # only record responses that passed validation, so a retry never
+        # replays the empty response it is retrying
+        if self.cache and not cache_hit:
+            self.cache.put(key, self.model, response_json)
+
+        return result
+
     @retry(
         wait=wait_random_exponential(min=1, max=60),
         stop=stop_after_attempt(6),
@@ -370,6 +460,7 @@ class LLM:
         system_msgs: Optional[List[Union[dict, Message]]] = None,
         stream: bool = True,
         temperature: Optional[float] = None,
+        sample: int = 0,
     ) -> str:
         """
         Send a prompt to the LLM and get the response.
@@ -379,6 +470,7 @@ class LLM:
             system_msgs: Optional system messages to prepend
             stream (bool): Whether to stream the response (not implemented for REST API yet)
             temperature (float): Sampling temperature for the response
+            sample (int): Index of a repeated draw, so it gets its own cache entry
 
         Returns:
             str: The generated response
@@ -417,29 +509,8 @@ class LLM:
                 "thinkingLevel": "low",
             }
 
-            # Make POST request to REST API
-            url = f"{self.base_url}/models/{self.model}:generateContent?key={self.api_key}"
-            headers = {"Content-Type": "application/json"}
             # Use extended timeout (600s) for LLM calls to avoid timeout issues
-            response = requests.post(url, headers=headers, json=body, timeout=600)
-
-            # Check for errors
-            try:
-                response.raise_for_status()
-            except requests.HTTPError as e:
-                error_msg = (
-                    f"REST API error: {e.response.status_code} - {e.response.text}"
-                )
-                logger.error(error_msg)
-                raise ValueError(error_msg) from e
-
-            response_json = response.json()
-
-            # Parse response
-            result = parse_gemini_response(response_json)
-
-            if not result.content:
-                raise ValueError("Empty response from LLM")
+            result = self._generate(body, timeout=600, sample=sample)
 
             # Log LLM I/O
             save_dir = os.getenv("save_dir", ".")
@@ -469,6 +540,7 @@ class LLM:
         tools: Optional[List[dict]] = None,
         tool_choice: TOOL_CHOICE_TYPE = ToolChoice.AUTO,  # type: ignore
         temperature: Optional[float] = None,
+        sample: int = 0,
         **kwargs,
     ):
         """
@@ -481,6 +553,7 @@ class LLM:
             tools: List of tools to use
             tool_choice: Tool choice strategy (not fully supported in REST API)
             temperature: Sampling temperature for the response
+            sample: Index of a repeated draw, so it gets its own cache entry
             **kwargs: Additional completion arguments
 
         Returns:
@@ -522,28 +595,9 @@ class LLM:
                 else self.temperature,
             }
 
-            # Make POST request to REST API
-            url = f"{self.base_url}/models/{self.model}:generateContent?key={self.api_key}"
-            headers = {"Content-Type": "application/json"}
-            response = requests.post(url, headers=headers, json=body, timeout=timeout)
-
-            # Check for errors
-            try:
-                response.raise_for_status()
-            except requests.HTTPError as e:
-                error_msg = (
-                    f"REST API error: {e.response.status_code} - {e.response.text}"
-                )
-                logger.error(error_msg)
-                raise ValueError(error_msg) from e
-
-            response_json = response.json()
-
-            # Parse response
-            result = parse_gemini_response(response_json)
-
-            if not result.content and not result.tool_calls:
-                raise ValueError("Empty response from LLM")
+            result = self._generate(
+                body, timeout=timeout, allow_tool_calls=True, sample=sample
+            )
 
             # Log LLM I/O
             save_dir = os.getenv("save_dir", ".")
@@ -574,6 +628,7 @@ class LLM:
         system_msgs: Optional[List[Union[dict, Message]]] = None,
         stream: bool = False,
         temperature: Optional[float] = None,
+        sample: int = 0,
     ) -> str:
         """
         Send a prompt with images to the LLM and get the response.
@@ -584,6 +639,7 @@ class LLM:
             system_msgs: Optional system messages to prepend
             stream (bool): Whether to stream the response
             temperature (float): Sampling temperature for the response
+            sample (int): Index of a repeated draw, so it gets its own cache entry
 
         Returns:
             str: The generated response
@@ -652,29 +708,8 @@ class LLM:
                 else self.temperature,
             }
 
-            # Make POST request
-            url = f"{self.base_url}/models/{self.model}:generateContent?key={self.api_key}"
-            headers = {"Content-Type": "application/json"}
             # Use extended timeout (600s) for LLM calls to avoid timeout issues
-            response = requests.post(url, headers=headers, json=body, timeout=600)
-
-            # Check for errors
-            try:
-                response.raise_for_status()
-            except requests.HTTPError as e:
-                error_msg = (
-                    f"REST API error: {e.response.status_code} - {e.response.text}"
-                )
-                logger.error(error_msg)
-                raise ValueError(error_msg) from e
-
-            response_json = response.json()
-
-            # Parse response
-            result = parse_gemini_response(response_json)
-
-            if not result.content:
-                raise ValueError("Empty response from LLM")
+            result = self._generate(body, timeout=600, sample=sample)
 
             # Log LLM I/O
             save_dir = os.getenv("save_dir", ".")
@@ -699,3 +734,44 @@ class LLM:
         except Exception as e:
             logger.exception(f"Unexpected error in ask_with_images: {e}")
             raise
+
+    def ask_many(
+        self,
+        requests_kwargs: List[dict],
+        method: str = "ask",
+        max_workers: Optional[int] = None,
+    ) -> list:
+        """
+        Run independent prompts concurrently and return their responses in order.
+
+        Every request goes through the regular method, so each one keeps its own
+        tenacity retry policy and response cache lookup.
+
+        Args:
+            requests_kwargs: Keyword arguments of each call, e.g.
+                {"messages": [...], "system_msgs": [...], "temperature": 1.0}
+            method: LLM method to call for every request (ask, ask_tool, ask_with_images)
+            max_workers: Upper bound on requests in flight, defaults to max_concurrency
+
+        Returns:
+            list: One response per request, in the order of requests_kwargs
+
+        Raises:
+            ValueError: If method is not one of the ask methods
+            Exception: The first error raised by any request, after all have finished
+        """
+        if method not in ("ask", "ask_tool", "ask_with_images"):
+            raise ValueError(f"Unsupported method for ask_many: {method}")
+        if not requests_kwargs:
+            return []
+
+        func = getattr(self, method)
+        max_workers = min(max_workers or self.max_concurrency, len(requests_kwargs))
+        if max_workers == 1:
+            return [func(**kwargs) for kwargs in requests_kwargs]
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="llm"
+        ) as executor:
+            futures = [executor.submit(func, **kwargs) for kwargs in requests_kwargs]
+        return [future.result() for future in futures]
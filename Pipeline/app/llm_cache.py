@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from app.logger import logger
+
+CACHE_MODES = ("off", "readwrite", "replay")
+
+
+def request_key(model: str, body: dict, sample: int = 0) -> str:
+    """
+    Hash a Gemini request into a cache key.
+
+    The body already holds the converted messages, inline base64 image bytes,
+    tool declarations and the generation config (temperature included), so
+    hashing it together with the model covers every input that shapes the
+    response. The base_url and api key are left out on purpose, so a cache
+    recorded against the real endpoint replays against a local stand-in.
+
+    sample tells apart repeated draws of the same request, e.g. independent
+    grading samples or a retry after an unparsable answer, which would
+    otherwise all replay the first response.
+    """
+    key = {"model": model, "body": body}
+    if sample:
+        key["sample"] = sample
+    payload = json.dumps(key, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk cache of raw Gemini responses, one JSON file per request key.
+
+    Recency is tracked through file mtimes, which are bumped on every hit, so
+    the least recently used entries are evicted first once the directory grows
+    beyond max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = sum(p.stat().st_size for p in self._entries())
+
+    def _entries(self):
+        return self.directory.glob("*.json")
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return entry["response"]
+
+    def put(self, key: str, model: str, response_json: dict):
+        path = self._path(key)
+        data = json.dumps(
+            {"model": model, "response": response_json}, ensure_ascii=False
+        ).encode("utf-8")
+
+        with self._lock:
+            old_size = path.stat().st_size if path.exists() else 0
+            tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+            self._total_bytes += len(data) - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = []
+        for p in self._entries():
+            try:
+                stat = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, p))
+        entries.sort()
+
+        self._total_bytes = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, p in entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            self._total_bytes -= size
+            evicted += 1
+        logger.info(f"LLM cache evicted {evicted} entries from {self.directory}")
@@ -129,28 +129,13 @@ class InitGPTExecute(BaseTool):
             demand=user_demand,
             roomsize=roomsize_str,
         )
-        success = False
-        iter_count = 0
-        while not success and iter_count < 5:
-            iter_count += 1
-            gpt_text_response = gpt.ask(
-                [{"role": "user", "content": user_prompt}],
-                system_msgs=[
-                    {"role": "system", "content": prompts.step_5_position_prompt_system}
-                ],
-                temperature=1.0,
-            )
-            print(gpt_text_response)
-
-            # gpt_text_response = '{\n    "Roomtype": "Bookstore",\n    "list of given category names": ["sofa", "armchair", "coffee table", "TV stand", "large shelf", "side table", "floor lamp", "remote control", "book", "magazine", "decorative bowl", "photo frame", "vase", "candle", "coaster", "plant"],\n    "Mapping results": {\n        "sofa": "seating.SofaFactory",\n        "armchair": "seating.ArmChairFactory",\n        "coffee table": "tables.CoffeeTableFactory",\n        "TV stand": "shelves.TVStandFactory",\n        "large shelf": "shelves.LargeShelfFactory",\n        "side table": "tables.SideTableFactory",\n        "floor lamp": "lamp.FloorLampFactory",\n        "remote control": null,\n        "book": "table_decorations.BookStackFactory",\n        "magazine": null,\n        "decorative bowl": "tableware.BowlFactory",\n        "photo frame": null,\n        "vase": "table_decorations.VaseFactory",\n        "candle": null,\n        "coaster": null,\n        "plant": "tableware.PlantContainerFactory"\n    }\n}'
-            try:
-                gpt_dict_response = extract_json(
-                    gpt_text_response.replace("'", '"').replace("None", "null")
-                )
-                success = True
-            except:
-                success = False
-        Placement_big = gpt_dict_response["Placement"]
+        position_request = dict(
+            messages=[{"role": "user", "content": user_prompt}],
+            system_msgs=[
+                {"role": "system", "content": prompts.step_5_position_prompt_system}
+            ],
+            temperature=1.0,
+        )
 
         small_category_list = []
         relation_small_object = []
@@ -163,13 +148,41 @@ class InitGPTExecute(BaseTool):
         user_prompt = prompts.step_3_class_name_prompt_user.format(
             category_list=s, demand=user_demand
         )
-        gpt_text_response = gpt.ask(
-            [{"role": "user", "content": user_prompt}],
+        class_name_request = dict(
+            messages=[{"role": "user", "content": user_prompt}],
             system_msgs=[
                 {"role": "system", "content": prompts.step_3_class_name_prompt_system}
             ],
             temperature=1.0,
         )
+
+        # placement and class names only depend on step 1, so ask both at once
+        position_response, class_name_response = gpt.ask_many(
+            [position_request, class_name_request]
+        )
+
+        success = False
+        iter_count = 1
+        gpt_text_response = position_response
+        while True:
+            print(gpt_text_response)
+
+            # gpt_text_response = '{\n    "Roomtype": "Bookstore",\n    "list of given category names": ["sofa", "armchair", "coffee table", "TV stand", "large shelf", "side table", "floor lamp", "remote control", "book", "magazine", "decorative bowl", "photo frame", "vase", "candle", "coaster", "plant"],\n    "Mapping results": {\n        "sofa": "seating.SofaFactory",\n        "armchair": "seating.ArmChairFactory",\n        "coffee table": "tables.CoffeeTableFactory",\n        "TV stand": "shelves.TVStandFactory",\n        "large shelf": "shelves.LargeShelfFactory",\n        "side table": "tables.SideTableFactory",\n        "floor lamp": "lamp.FloorLampFactory",\n        "remote control": null,\n        "book": "table_decorations.BookStackFactory",\n        "magazine": null,\n        "decorative bowl": "tableware.BowlFactory",\n        "photo frame": null,\n        "vase": "table_decorations.VaseFactory",\n        "candle": null,\n        "coaster": null,\n        "plant": "tableware.PlantContainerFactory"\n    }\n}'
+            try:
+                gpt_dict_response = extract_json(
+                    gpt_text_response.replace("'", '"').replace("None", "null")
+                )
+                success = True
+            except:
+                success = False
+            if success or iter_count >= 5:
+                break
+            # a new sample, the cache would hand back the same unparsable answer
+            gpt_text_response = gpt.ask(**position_request, sample=iter_count)
+            iter_count += 1
+        Placement_big = gpt_dict_response["Placement"]
+
+        gpt_text_response = class_name_response
         print(gpt_text_response)
 
         gpt_dict_response = extract_json(
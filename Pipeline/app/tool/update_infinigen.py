@@ -1,23 +1,182 @@
+import itertools
 import json
 import os
 import socket
+import struct
 import subprocess
+import threading
+import time
+
+
+HEADER = struct.Struct("!I")
+
+# commands that are safe to send a second time after a lost response
+IDEMPOTENT_ACTIONS = {"ping", "status"}
+
+
+def send_message(sock, message):
+    """Send one length-prefixed JSON frame (see infinigen_examples/util/socket_protocol.py)"""
+    payload = json.dumps(message).encode("utf-8")
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def recv_message(sock):
+    """Receive one length-prefixed JSON frame"""
+
+    def recv_exact(n):
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = sock.recv(min(n - len(buf), 1 << 20))
+            if not chunk:
+                raise ConnectionError(f"Server closed after {len(buf)}/{n} bytes")
+            buf.extend(chunk)
+        return bytes(buf)
+
+    (length,) = HEADER.unpack(recv_exact(HEADER.size))
+    return json.loads(recv_exact(length).decode("utf-8"))
+
+
+class BlenderClient:
+    """Persistent connection to the Blender socket server in generate_indoors_vis.
+
+    One connection is reused for every tool call of a SceneDesigner run, and each
+    request is tagged with a request_id that the server echoes in its response.
+    """
+
+    def __init__(self, host="localhost", port=12345, connect_timeout=10.0):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.sock = None
+        self.lock = threading.Lock()
+        self.request_ids = itertools.count()
+
+    def connect(self):
+        if self.sock is None:
+            self.sock = socket.create_connection(
+                (self.host, self.port), timeout=self.connect_timeout
+            )
+            # scene solving can take minutes, so block on responses
+            self.sock.settimeout(None)
+        return self.sock
+
+    def _drop(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def close(self):
+        with self.lock:
+            self._drop()
+
+    def request(self, command):
+        with self.lock:
+            request_id = next(self.request_ids)
+            command = {**command, "request_id": request_id}
+            try:
+                send_message(self.connect(), command)
+            except OSError:
+                # stale connection (e.g. server restarted), reconnect once
+                self._drop()
+                send_message(self.connect(), command)
+
+            try:
+                response = recv_message(self.sock)
+            except (OSError, ValueError):
+                # a send on a half-closed socket succeeds, the restart only
+                # shows here, so resend once if running the command twice is safe
+                self._drop()
+                if command.get("action") not in IDEMPOTENT_ACTIONS:
+                    raise
+                try:
+                    send_message(self.connect(), command)
+                    response = recv_message(self.sock)
+                except (OSError, ValueError):
+                    self._drop()
+                    raise
+
+        if response.get("request_id") != request_id:
+            self.close()
+            raise RuntimeError(
+                f"Mismatched response: expected request_id {request_id}, got {response.get('request_id')}"
+            )
+        return response
+
+
+_client = None
+_worker = None
+
+INFINIGEN_ARGS = (
+    "--seed 0 --task coarse --output_folder outputs/indoors/coarse_expand_whole_nobedframe "
+    "-g fast_solve.gin overhead.gin studio.gin "
+    "-p compose_indoors.terrain_enabled=False compose_indoors.invisible_room_ceilings_enabled=True"
+)
+
+
+def get_blender_client(host="localhost", port=12345):
+    global _client
+    if _client is None:
+        _client = BlenderClient(host, port)
+    return _client
+
+
+def start_worker(save_dir, port=12345, startup_timeout=600):
+    """Launch a background Blender worker that keeps the scene resident between steps.
+
+    Used when socket == "worker": bpy, infinigen and the solved State are loaded
+    once per SceneDesigner run instead of once per tool call.
+    """
+    global _worker
+    if _worker is not None and _worker.poll() is None:
+        return
+
+    sw_dir = os.getenv("sceneweaver_dir")
+    cmd = f"""
+    lg infinigen
+    cd {sw_dir}
+    python -m infinigen_examples.generate_indoors_vis --serve --port {port} --save_dir {save_dir} {INFINIGEN_ARGS} > {os.path.join(save_dir, "run_worker.log")} 2>&1
+    """
+    _worker = subprocess.Popen(["bash", "-lic", cmd])
+
+    client = get_blender_client(port=port)
+    deadline = time.time() + startup_timeout
+    while True:
+        try:
+            client.request({"action": "ping"})
+            return
+        except OSError:
+            client.close()
+            if _worker.poll() is not None:
+                raise RuntimeError(
+                    f"Blender worker exited with code {_worker.returncode}, see {save_dir}/run_worker.log"
+                )
+            if time.time() > deadline:
+                raise TimeoutError(f"Blender worker not ready after {startup_timeout}s")
+            time.sleep(1.0)
+
+
+def close_blender_client():
+    global _client, _worker
+    if _worker is not None:
+        if _worker.poll() is None:
+            try:
+                get_blender_client().request({"action": "stop_server"})
+                _worker.wait(timeout=60)
+            except (OSError, subprocess.TimeoutExpired):
+                _worker.kill()
+        _worker = None
+    if _client is not None:
+        _client.close()
+        _client = None
 
 
 def send_command(host="localhost", port=12345, command=None):
     """Send a single command to the Blender socket server"""
     try:
-        # Create socket connection
-        client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client_socket.connect((host, port))
-
-        # Send command
-        command_json = json.dumps(command)
-        client_socket.send(command_json.encode("utf-8"))
-
-        # Receive response
-        response = client_socket.recv(1024)
-        response_data = json.loads(response.decode("utf-8"))
+        response_data = get_blender_client(host, port).request(command)
 
         print(f"Sent: {command}")
         print(f"Response: {response_data}")
@@ -27,9 +186,6 @@ def send_command(host="localhost", port=12345, command=None):
     except Exception as e:
         print(f"Error: {e}")
         return None
-    finally:
-        if "client_socket" in locals():
-            client_socket.close()
 
 
 def update_infinigen(
@@ -65,11 +221,13 @@ def update_infinigen(
         cmd = f"""
         lg infinigen
         cd {sw_dir}
-        python -m infinigen_examples.generate_indoors --seed 0 --save_dir {save_dir} --task coarse --output_folder outputs/indoors/coarse_expand_whole_nobedframe -g fast_solve.gin overhead.gin studio.gin -p compose_indoors.terrain_enabled=False compose_indoors.invisible_room_ceilings_enabled=True > {os.path.join(save_dir, "run_inf.log")} 2>&1
+        python -m infinigen_examples.generate_indoors --save_dir {save_dir} {INFINIGEN_ARGS} > {os.path.join(save_dir, "run_inf.log")} 2>&1
         """
         # breakpoint()
         subprocess.run(["bash", "-lic", cmd])
     else:
+        if socket == "worker":
+            start_worker(save_dir)
         command = {
             "action": action,
             "iter": iter,
@@ -59,7 +59,11 @@ if __name__ == "__main__":
         help="The basic path to save all the generated scenes.",
     )
     parser.add_argument(
-        "--socket", type=str, default="False", help="Run with Blender in the foreground"
+        "--socket",
+        type=str,
+        default="False",
+        help='"True" to drive a Blender running in the foreground, "worker" to keep a '
+        'background Blender resident across steps, "False" for one process per step',
     )
 
     args = parser.parse_args()
@@ -0,0 +1,173 @@
+"""
+Persistent cache of imported objaverse assets.
+
+Importing an asset means gunzipping and unpickling a holodeck .pkl.gz, or
+running the glTF importer and joining / re-origining / rotating the result,
+plus loading its textures. ObjaverseCategoryFactory does this once per asset:
+the normalized mesh (origin at the bounds center, rotation applied, unscaled)
+is written with its materials and images to ``{key}.blend`` under the cache
+directory, next to ``{key}.json`` naming the mesh inside it.
+
+Within a blender session the mesh stays resident as a zero-user datablock, so
+later spawns of the same asset only copy the mesh. Zero-user data is not
+written by save_as_mainfile, so scene saves and snapshot keyframes do not
+carry the templates; "(no gc)" in the name keeps butil.garbage_collect off
+them. Across sessions, or once the file is reloaded, the mesh is appended
+from the .blend library, and images it brings along are remapped to already
+loaded images of the same file. The directory is bounded to max_mb, evicting
+the least recently used assets first.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+
+import bpy
+import gin
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get(
+        "SCENEWEAVER_ASSET_CACHE",
+        Path.home() / ".cache" / "sceneweaver" / "objaverse_assets",
+    )
+)
+
+
+def asset_key(filename, *extra) -> str:
+    """Key an asset by its path, file stat and anything else that shapes its import"""
+    stat = os.stat(filename)
+    payload = json.dumps([str(filename), stat.st_size, stat.st_mtime_ns, *extra])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def dedupe_images(images):
+    """Remap freshly appended images onto already loaded images of the same file"""
+    existing = {}
+    for img in bpy.data.images:
+        if img.filepath and img not in images:
+            existing.setdefault(bpy.path.abspath(img.filepath), img)
+
+    for img in images:
+        if not img.filepath:
+            continue
+        other = existing.get(bpy.path.abspath(img.filepath))
+        if other is not None:
+            img.user_remap(other)
+            bpy.data.images.remove(img)
+
+
+@gin.configurable
+class AssetCache:
+    def __init__(self, directory=None, max_mb=4096, enabled=True):
+        self.directory = Path(directory) if directory is not None else DEFAULT_CACHE_DIR
+        self.max_bytes = max_mb * 1024 * 1024
+        self.enabled = enabled
+        # key -> object name of the asset, for keys with a resident template
+        self._resident = {}
+
+    def _path(self, key) -> Path:
+        return self.directory / f"{key}.blend"
+
+    def _meta_path(self, key) -> Path:
+        return self.directory / f"{key}.json"
+
+    @staticmethod
+    def _template_name(key) -> str:
+        return f"{key[:12]} (no gc)"
+
+    def _resident_mesh(self, key):
+        # looked up by name, a file reload drops the template but not the dict entry
+        mesh = bpy.data.meshes.get(self._template_name(key))
+        if mesh is not None and key in self._resident:
+            return mesh, self._resident[key]
+
+        path = self._path(key)
+        if not path.exists():
+            return None, None
+        with open(self._meta_path(key), "r") as f:
+            meta = json.load(f)
+
+        images_before = set(bpy.data.images)
+        with bpy.data.libraries.load(str(path), link=False) as (data_from, data_to):
+            data_to.meshes = [meta["mesh"]]
+        (mesh,) = data_to.meshes
+        dedupe_images([img for img in bpy.data.images if img not in images_before])
+
+        self._hold(key, mesh, meta["name"])
+        os.utime(path)
+        return mesh, meta["name"]
+
+    def _hold(self, key, mesh, obj_name):
+        mesh.use_fake_user = False
+        mesh.name = self._template_name(key)
+        self._resident[key] = obj_name
+
+    def spawn(self, key):
+        """A new object linked to the scene holding a copy of the cached mesh, or None on a miss"""
+        if not self.enabled:
+            return None
+        mesh, name = self._resident_mesh(key)
+        if mesh is None:
+            return None
+        data = mesh.copy()
+        data.name = name
+        obj = bpy.data.objects.new(name, data)
+        bpy.context.scene.collection.objects.link(obj)
+        return obj
+
+    def put(self, key, obj):
+        """Store the mesh of a freshly imported, normalized asset"""
+        if not self.enabled:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        template = obj.data.copy()
+        self._hold(key, template, obj.name)
+
+        path = self._path(key)
+        tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp.blend")
+        bpy.data.libraries.write(str(tmp), {template}, fake_user=True, compress=True)
+        os.replace(tmp, path)
+        with open(self._meta_path(key), "w") as f:
+            json.dump({"mesh": template.name, "name": obj.name}, f)
+
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for p in self.directory.glob("*.blend"):
+            try:
+                stat = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, p))
+
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        evicted = 0
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            p.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        logger.info(f"Asset cache evicted {evicted} assets from {self.directory}")
+
+
+_cache = None
+
+
+def get_cache() -> AssetCache:
+    global _cache
+    if _cache is None:
+        _cache = AssetCache()
+    return _cache
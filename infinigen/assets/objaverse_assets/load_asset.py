@@ -1,5 +1,6 @@
 import gzip
 import pickle
+from operator import itemgetter
 
 import bpy
 import numpy as np
@@ -8,6 +9,41 @@ from mathutils import Vector
 from infinigen.core.util import blender as butil
 
 
+def asset_arrays(data):
+    """
+    Convert the vertex / uv dicts of a pickled objathor asset to arrays, with
+    the asset's y-up vertices swapped to blender's z-up
+    """
+    vertices = np.array(
+        list(map(itemgetter("x", "z", "y"), data["vertices"])), dtype=np.float32
+    ).reshape(-1, 3)
+    triangles = np.asarray(data["triangles"], dtype=np.int32).reshape(-1, 3)
+    uvs = np.array(list(map(itemgetter("x", "y"), data["uvs"])), dtype=np.float32)
+    return vertices, triangles, uvs.reshape(-1, 2)
+
+
+def fill_mesh(mesh, vertices, triangles, uvs):
+    """Same mesh as from_pydata + a per-loop UV assignment, written through foreach_set"""
+    n_tris = len(triangles)
+    mesh.vertices.add(len(vertices))
+    mesh.vertices.foreach_set("co", vertices.reshape(-1))
+    mesh.loops.add(n_tris * 3)
+    mesh.loops.foreach_set("vertex_index", triangles.reshape(-1))
+    mesh.polygons.add(n_tris)
+    loop_start = np.arange(0, n_tris * 3, 3, dtype=np.int32)
+    mesh.polygons.foreach_set("loop_start", loop_start)
+    mesh.polygons.foreach_set("loop_total", np.full(n_tris, 3, dtype=np.int32))
+    mesh.update(calc_edges=True)
+
+    # Ensure UV coordinates are stored
+    if not mesh.uv_layers:
+        mesh.uv_layers.new(name="UVMap")
+
+    # uvs are stored per vertex, loops are laid out in triangle order
+    uv_layer = mesh.uv_layers["UVMap"]
+    uv_layer.data.foreach_set("uv", uvs[triangles.reshape(-1)].reshape(-1))
+
+
 def load_pickled_3d_asset(file_path, idx=0):
     # Open the compressed pickled file
     with gzip.open(file_path, "rb") as f:
@@ -24,33 +60,8 @@ def load_pickled_3d_asset(file_path, idx=0):
     # Set the mesh data for the object
     obj.data = mesh
 
-    # Update the mesh with the loaded data
-    # print(loaded_object_data.keys())
-    # print(loaded_object_data['triangles'])
-    # triangles = [vertex_index for face in loaded_object_data['triangles'] for vertex_index in face]
-    triangles = np.array(loaded_object_data["triangles"]).reshape(-1, 3)
-    vertices = []
-
-    for v in loaded_object_data["vertices"]:
-        vertices.append([v["x"], v["z"], v["y"]])
-
-    mesh.from_pydata(vertices, [], triangles)
-
-    uvs = []
-    for uv in loaded_object_data["uvs"]:
-        uvs.append([uv["x"], uv["y"]])
-
-    mesh.update()
-
-    # Ensure UV coordinates are stored
-    if not mesh.uv_layers:
-        mesh.uv_layers.new(name="UVMap")
-
-    uv_layer = mesh.uv_layers["UVMap"]
-    for poly in mesh.polygons:
-        for loop_index in poly.loop_indices:
-            vertex_index = mesh.loops[loop_index].vertex_index
-            uv_layer.data[loop_index].uv = uvs[vertex_index]
+    vertices, triangles, uvs = asset_arrays(loaded_object_data)
+    fill_mesh(mesh, vertices, triangles, uvs)
 
     material = bpy.data.materials.new(name="AlbedoMaterial")
     obj.data.materials.append(material)
@@ -64,7 +75,7 @@ def load_pickled_3d_asset(file_path, idx=0):
 
     image_path = f"{'/'.join(file_path.split('/')[:-1])}/albedo.jpg"  # Replace with your image file path
 
-    image = bpy.data.images.load(image_path)
+    image = bpy.data.images.load(image_path, check_existing=True)
 
     # Assign the image to the texture node
     texture_node.image = image
@@ -76,7 +87,7 @@ def load_pickled_3d_asset(file_path, idx=0):
 
     # normal
     image_path = f"{'/'.join(file_path.split('/')[:-1])}/normal.jpg"
-    img_normal = bpy.data.images.load(image_path)
+    img_normal = bpy.data.images.load(image_path, check_existing=True)
     image_texture_node_normal = material.node_tree.nodes.new(type="ShaderNodeTexImage")
     image_texture_node_normal.image = img_normal
     image_texture_node_normal.image.colorspace_settings.name = "Non-Color"
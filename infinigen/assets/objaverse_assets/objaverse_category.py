@@ -14,6 +14,7 @@ from GPT.constants import OBJATHOR_ASSETS_DIR
 from infinigen.assets.utils.object import new_bbox
 from infinigen.core.tagging import tag_support_surfaces
 
+from .asset_cache import asset_key, get_cache
 from .base import ObjaverseFactory
 from .load_asset import load_pickled_3d_asset
 from .place_in_blender import (
@@ -22,6 +23,21 @@ from .place_in_blender import (
 )
 
 
+_objav_files = {}
+
+
+def load_objav_files(save_dir) -> dict:
+    """objav_files.json of a scene, only re-read when the file changes"""
+    path = f"{save_dir}/objav_files.json"
+    mtime = os.stat(path).st_mtime_ns
+    cached = _objav_files.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "r") as f:
+            cached = (mtime, json.load(f))
+        _objav_files[path] = cached
+    return cached[1]
+
+
 class ObjaverseCategoryFactory(ObjaverseFactory):
     _category = None
     _asset_file = None
@@ -45,31 +61,31 @@ class ObjaverseCategoryFactory(ObjaverseFactory):
         self.y_dim = self._y_dim
         self.z_dim = self._z_dim
 
-    def create_asset(self, **params) -> bpy.types.Object:
-        # Determine the file path and type
+    def resolve_asset(self):
+        """The asset file to import, and for .glb files the angle of its front view"""
         if self.asset_file is not None:
             filename = self.asset_file
         else:
-            save_dir = os.getenv("save_dir")
-            with open(f"{save_dir}/objav_files.json", "r") as f:
-                LoadObjavFiles = json.load(f)
-            filename = LoadObjavFiles[self.category][0]
+            filename = load_objav_files(os.getenv("save_dir"))[self.category][0]
 
+        if filename.endswith(".pkl.gz") or self.asset_file is not None:
+            return filename, 0
+
+        with open(filename.replace(".glb", "") + "/metadata.json", "r") as f:
+            value = json.load(f)["front_view"]
+            front_view_angle = value.split("/")[-1].split(".")[0].split("_")[-1]
+            angle_bias = value.split("/")[-1].split(".")[0].split("_")[1]
+            front_view_angle = int(front_view_angle) + int(angle_bias)
+        return filename, front_view_angle
+
+    def import_asset(self, filename, front_view_angle) -> bpy.types.Object:
+        """Import an asset file, centered at the origin with its rotation applied"""
         # Branch based on file type
         if filename.endswith(".pkl.gz"):
             # Holodeck path - load pickle file directly
             imported_obj = load_pickled_3d_asset(filename)
         else:
             # Openshape path - load GLB file with rotation
-            if self.asset_file is None:
-                with open(filename.replace(".glb", "") + "/metadata.json", "r") as f:
-                    value = json.load(f)["front_view"]
-                    front_view_angle = value.split("/")[-1].split(".")[0].split("_")[-1]
-                    angle_bias = value.split("/")[-1].split(".")[0].split("_")[1]
-                    front_view_angle = int(front_view_angle) + int(angle_bias)
-            else:
-                front_view_angle = 0
-
             bpy.ops.import_scene.gltf(filepath=filename)
 
             # GLB-specific preprocessing
@@ -108,6 +124,18 @@ class ObjaverseCategoryFactory(ObjaverseFactory):
         bpy.ops.object.select_all(action="DESELECT")
         imported_obj.select_set(True)
         bpy.ops.object.transform_apply(location=True, rotation=True, scale=False)
+        return imported_obj
+
+    def create_asset(self, **params) -> bpy.types.Object:
+        filename, front_view_angle = self.resolve_asset()
+
+        # repeated spawns of an asset copy its cached mesh instead of re-importing
+        cache = get_cache()
+        key = asset_key(filename, front_view_angle)
+        imported_obj = cache.spawn(key)
+        if imported_obj is None:
+            imported_obj = self.import_asset(filename, front_view_angle)
+            cache.put(key, imported_obj)
 
         # update scale
         if self.x_dim is not None and self.y_dim is not None and self.z_dim is not None:
@@ -0,0 +1,63 @@
+"""
+Client of the resident retrieval server (GPT/retrieval_server.py).
+
+The server keeps the CLIP / SBERT models and the memory-mapped feature index
+loaded, so a request only costs one text encode and one matmul for all the
+categories. When no server is reachable, the one-shot retrieve_holodeck.sh
+script is run instead, which loads everything for that single request.
+"""
+
+import json
+import logging
+import os
+import subprocess
+import urllib.request
+
+import gin
+
+logger = logging.getLogger(__name__)
+
+
+@gin.configurable
+def retrieve_objav_files(
+    categories,
+    save_dir,
+    url=None,
+    threshold=30,
+    timeout=600,
+    fallback_script="./run/retrieve_holodeck.sh",
+):
+    """
+    Map each category to a list of objaverse asset files, also written to
+    objav_files.json. The fallback script reads the categories from
+    objav_cnts.json, which the caller writes beforehand.
+    """
+    url = url or os.environ.get("RETRIEVAL_SERVER", "http://127.0.0.1:8765")
+    request = urllib.request.Request(
+        f"{url}/retrieve",
+        data=json.dumps({"categories": list(categories), "threshold": threshold}).encode(
+            "utf-8"
+        ),
+        headers={"Content-Type": "application/json"},
+    )
+
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            files = json.load(response)
+    except OSError as e:
+        # URLError, refused / reset connections and read timeouts of a busy server
+        logger.warning(
+            f"Retrieval server at {url} unavailable ({e}), running {fallback_script}"
+        )
+        with open("run.log", "w") as log:
+            subprocess.run(
+                ["bash", "-lic", f"source {fallback_script} {save_dir}"],
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+        with open(f"{save_dir}/objav_files.json", "r") as f:
+            return json.load(f)
+
+    with open(f"{save_dir}/objav_files.json", "w") as f:
+        json.dump(files, f, indent=4)
+    return files
@@ -1,8 +1,6 @@
 # Copyright (C) 2024, Princeton University.
 # This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
 
-import copy
-import functools
 import logging
 import math
 import random
@@ -32,17 +30,91 @@ def bvh_caching_config(enabled=True):
     return enabled
 
 
-@functools.cache
 def group(scene, x):
     if isinstance(x, (list, set)):
         x = tuple(x)
     return subset(scene, x)
 
 
+def world_mesh(mesh: trimesh.Trimesh) -> trimesh.Trimesh:
+    """
+    Bring the vertices of a solver mesh up to date with its world transform.
+
+    sync_trimesh only records the new mesh.current_transform and moves the FCL
+    object, the vertices still sit at mesh.applied_transform until a query
+    needs them. Moves that are evaluated purely through FCL never pay for the
+    vertex rewrite, and several moves in a row are folded into one.
+    """
+    T_applied = getattr(mesh, "applied_transform", None)
+    if T_applied is None or np.array_equal(T_applied, mesh.current_transform):
+        return mesh
+    mesh.apply_transform(mesh.current_transform @ np.linalg.inv(T_applied))
+    mesh.applied_transform = mesh.current_transform
+    return mesh
+
+
+def build_collision_object(mesh: trimesh.Trimesh) -> fcl.CollisionObject:
+    """
+    (Re)build mesh.fcl_obj / mesh.col_obj the way add_to_scene does.
+
+    The BVH is built over the local vertices, i.e. with mesh.applied_transform
+    undone, and the pose lives only in the FCL transform. sync_trimesh can then
+    setTransform on it without the pose being applied a second time.
+    """
+    T = getattr(mesh, "current_transform", None)
+    T_applied = getattr(mesh, "applied_transform", None)
+    if T is None or T_applied is None:
+        # not a solver mesh, its vertices already are the world pose
+        local, T = mesh, trimesh.transformations.identity_matrix()
+    elif np.allclose(T_applied, np.eye(4)):
+        local = mesh
+    else:
+        local = trimesh.Trimesh(
+            vertices=trimesh.transformations.transform_points(
+                mesh.vertices, np.linalg.inv(T_applied)
+            ),
+            faces=mesh.faces,
+            process=False,
+        )
+    mesh.fcl_obj = trimesh.collision.mesh_to_BVH(local)
+    mesh.col_obj = fcl.CollisionObject(
+        mesh.fcl_obj, fcl.Transform(T[:3, :3], T[:3, 3])
+    )
+    return mesh.col_obj
+
+
 def meshes_from_names(scene, names):
     if isinstance(names, str):
         names = [names]
-    return [scene.geometry[g] for _, g in (scene.graph[n] for n in names)]
+    return [world_mesh(scene.geometry[g]) for _, g in (scene.graph[n] for n in names)]
+
+
+def stack_bounds(meshes) -> np.ndarray:
+    if len(meshes) == 0:
+        return np.zeros((0, 2, 3))
+    return np.stack([m.bounds for m in meshes])
+
+
+def world_aabbs(scene, names) -> np.ndarray:
+    """
+    Stack the axis-aligned bounds of the named meshes into an (N, 2, 3) array.
+
+    meshes_from_names brings solver meshes up to their world transform (see
+    world_mesh), so their bounds are world-space boxes.
+    """
+    if isinstance(names, str):
+        names = [names]
+    return stack_bounds(meshes_from_names(scene, names))
+
+
+def aabb_penetration_depth(a_bounds: np.ndarray, b_bounds: np.ndarray) -> np.ndarray:
+    """
+    Pairwise (N, M) penetration depth between two stacks of AABBs, positive
+    where the boxes overlap. Same measure as trimesh_geometry.bbox_collision.
+    """
+    lo = a_bounds[:, None, 1, :] - b_bounds[None, :, 0, :]
+    hi = b_bounds[None, :, 1, :] - a_bounds[:, None, 0, :]
+    return np.minimum(lo, hi).min(axis=-1)
 
 
 def blender_objs_from_names(names):
@@ -212,8 +284,7 @@ def delete_obj(scene, a, delete_blender=True):
     for obj_name in a:
         # bpy.data.objects.remove(bpy.data.objects[obj_name], do_unlink=True)
         if scene:
-            scene.graph.transforms.remove_node(obj_name)
-            scene.delete_geometry(obj_name + "_mesh")
+            remove_from_scene(scene, obj_name)
 
 
 def get_obj_children(obj):
@@ -249,8 +320,7 @@ def delete_obj_with_children(scene, a, delete_blender=True, delete_asset=True):
     for obj_name in a:
         # bpy.data.objects.remove(bpy.data.objects[obj_name], do_unlink=True)
         if scene:
-            scene.graph.transforms.remove_node(obj_name)
-            scene.delete_geometry(obj_name + "_mesh")
+            remove_from_scene(scene, obj_name)
 
     if delete_asset:
         asset_names = [name.replace(
@@ -266,8 +336,7 @@ def delete_obj_with_children(scene, a, delete_blender=True, delete_asset=True):
         for obj_name in asset_names:
             # bpy.data.objects.remove(bpy.data.objects[obj_name], do_unlink=True)
             if scene:
-                scene.graph.transforms.remove_node(obj_name)
-                scene.delete_geometry(obj_name + "_mesh")
+                remove_from_scene(scene, obj_name)
 
 def global_vertex_coordinates(obj, local_vertex) -> Vector:
     return obj.matrix_world @ local_vertex.co
@@ -324,22 +393,67 @@ def distance_to_plane(point, plane_point, plane_normal):
     return abs((point - plane_point).dot(plane_normal))
 
 
+TAG_INDEX_KEY = "tag_index"
+
+
+def tag_index(scene: Scene) -> dict:
+    """
+    Inverted tag -> node name index stored in scene.metadata.
+
+    Built by one scan of the scene the first time it is needed, then kept up
+    to date by index_node (add_to_scene) and remove_from_scene.
+    """
+    index = scene.metadata.get(TAG_INDEX_KEY)
+    if index is None:
+        index = {"tags": {}, "names": {}}
+        for n in scene.graph.nodes:
+            _, g = scene.graph[n]
+            if g is None:
+                continue
+            _index_tags(index, n, scene.geometry[g].metadata["tags"])
+        scene.metadata[TAG_INDEX_KEY] = index
+    return index
+
+
+def _index_tags(index, name, tags):
+    for tag in index["names"].pop(name, ()):
+        names = index["tags"][tag]
+        names.pop(name, None)
+        if not names:
+            del index["tags"][tag]
+    if tags is None:
+        return
+    tags = frozenset(tags)
+    index["names"][name] = tags
+    for tag in tags:
+        index["tags"].setdefault(tag, {})[name] = None
+
+
+def index_node(scene: Scene, name: str, tags):
+    """Record the tags of a node that was just added to (or re-tagged in) the scene."""
+    index = scene.metadata.get(TAG_INDEX_KEY)
+    if index is not None:
+        _index_tags(index, name, tags)
+
+
+def remove_from_scene(scene: Scene, name: str):
+    scene.graph.transforms.remove_node(name)
+    scene.delete_geometry(name + "_mesh")
+    index_node(scene, name, None)
+
+
 def subset(scene: Scene, incl):
     if isinstance(incl, str):
         incl = [incl]
 
-    objs = []
-    for n in scene.graph.nodes:
-        T, g = scene.graph[n]
-        if g is None:
-            continue
-        otags = scene.geometry[g].metadata["tags"]
-        if any(t in incl for t in otags):
-            objs.append(n)
+    by_tag = tag_index(scene)["tags"]
+    objs = {}
+    for t in incl:
+        objs.update(by_tag.get(t, {}))
 
     # assert len(objs) > 0, incl
 
-    return objs
+    return list(objs)
 
 
 def add_object_cached(col, name, col_obj, fcl_obj):
@@ -377,6 +491,9 @@ def col_from_subset(scene, names, tags=None, bvh_cache=None, expand=False,export
         
         _, g = scene.graph[name]  # 从场景图中获取变换矩阵和几何体索引
         geom = scene.geometry[g]  # 获取几何体
+        if expand or return_geom or (tags is not None and len(tags) > 0):
+            # the plain FCL path only needs col_obj, which already carries the transform
+            world_mesh(geom)
         if "SingleCabinetFactory" in name and not geom.is_watertight:
             a = 1
         # if geom.is_watertight is False: # fix mesh bug in objaverse
@@ -410,14 +527,11 @@ def col_from_subset(scene, names, tags=None, bvh_cache=None, expand=False,export
 
 
         if expand:
-            # print(name)
-            mesh_expand = expand_mesh(geom, name)
-            geom = copy.deepcopy(mesh_expand)
-            
-            
-            geom.fcl_obj = col._get_fcl_obj(geom)  # 获取 FCL 对象
-            geom.col_obj = fcl.CollisionObject(geom.fcl_obj, t)  # 创建碰撞对象
-           
+            # cached on geom, already carries its FCL object at the current transform
+            geom = expand_mesh(geom, name)
+            if return_geom or export or (tags is not None and len(tags) > 0):
+                world_mesh(geom)
+
             if export:
                 geom.export(name+".obj")
               
@@ -434,8 +548,7 @@ def col_from_subset(scene, names, tags=None, bvh_cache=None, expand=False,export
             geom.col_obj = fcl.CollisionObject(geom.fcl_obj, t)  # 创建碰撞对象
             assert len(geom.faces) == mask.sum()  # 确保面数匹配
         if geom.col_obj is None:
-            geom.fcl_obj = col._get_fcl_obj(geom)  # 获取 FCL 对象
-            geom.col_obj = fcl.CollisionObject(geom.fcl_obj, t)  # 创建碰撞对象
+            build_collision_object(geom)
         # col.add_object(name, geom, T)
         add_object_cached(col, name, geom.col_obj, geom.fcl_obj)  # 使用缓存添加对象
 
@@ -483,20 +596,16 @@ def plot_geometry(ax, geom, color="blue"):
 def sync_trimesh(scene: trimesh.Scene, obj_name: str):  # MARK trimesh
     bpy.context.view_layer.update()  # 更新Blender的视图层，以反映当前场景的变化
     blender_obj = bpy.data.objects[obj_name]  # 获取指定名称的Blender对象
-    mesh = meshes_from_names(scene, obj_name)[0]  # 从场景中根据对象名称获取网格数据
-    T_old = mesh.current_transform  # 保存网格的当前变换
+    _, g = scene.graph[obj_name]
+    mesh = scene.geometry[g]  # 从场景中根据对象名称获取网格数据
     T = np.array(blender_obj.matrix_world)  # 获取Blender对象的世界变换矩阵
-    mesh.apply_transform(T @ np.linalg.inv(T_old))  # 应用变换，将新变换应用到网格
-    mesh.current_transform = np.array(
-        blender_obj.matrix_world
-    )  # 更新网格的当前变换为Blender对象的世界变换
+    # only the transform is recorded here, vertices follow lazily in world_mesh
+    mesh.current_transform = T
     t = fcl.Transform(T[:3, :3], T[:3, 3])  
     if mesh.col_obj is not None:# 创建一个Transform对象，包含旋转和位移
         mesh.col_obj.setTransform(t)  # 将变换应用到网格的碰撞对象上
     else:
-        col = trimesh.collision.CollisionManager()
-        mesh.fcl_obj = col._get_fcl_obj(mesh)  # 获取 FCL 对象
-        mesh.col_obj = fcl.CollisionObject(mesh.fcl_obj, t) 
+        build_collision_object(mesh)
 
 def translate(scene: trimesh.Scene, a: str, translation):
     blender_obj = bpy.data.objects[a]
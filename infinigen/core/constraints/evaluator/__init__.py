@@ -1,2 +1,2 @@
 from .eval_memo import evict_memo_for_move, evict_memo_for_obj, memo_key
-from .evaluate import EvalResult, evaluate_node, evaluate_problem
+from .evaluate import EvalResult, evaluate_node, evaluate_problem, relevance_table
@@ -5,6 +5,7 @@
 # Authors: Alexander Raistrick
 
 import logging
+from collections import ChainMap
 
 from infinigen.core import tags as t
 from infinigen.core.constraints import constraint_language as cl
@@ -24,8 +25,25 @@ def memo_key(n: cl.Node):
             return id(n)
 
 
-def evict_memo_for_obj(node: cl.Problem, memo: dict, obj: ObjectState):
-    recvals = [evict_memo_for_obj(child, memo, obj) for _, child in node.children()]
+def binding_key(n: cl.Node):
+    return ("bindings", id(n))
+
+
+def local_memo(memo: dict) -> dict:
+    """The table that writes to memo land in, the innermost scope for a ChainMap."""
+    return memo.maps[0] if isinstance(memo, ChainMap) else memo
+
+
+def evict_memo_for_obj(
+    node: cl.Problem, memo: dict, obj: ObjectState, name: str = None
+):
+    """
+    name: key of obj in state.objs, used to find the quantifier bindings of obj.
+        If None every bound variable is treated as affected.
+    """
+    recvals = [
+        evict_memo_for_obj(child, memo, obj, name) for _, child in node.children()
+    ]
     res = any(recvals)
 
     match node:
@@ -34,29 +52,41 @@ def evict_memo_for_obj(node: cl.Problem, memo: dict, obj: ObjectState):
                 res = False
         case cl.scene():
             res = True
+        case cl.item(var):
+            res = var in memo if name is None else memo.get(var) == {name}
+        case cl.ForAll(_, _, pred) | cl.SumOver(_, _, pred) | cl.MeanOver(_, _, pred):
+            # values computed under each binding persist in their own scope
+            scopes = local_memo(memo).get(binding_key(node), {})
+            for scope in scopes.values():
+                if evict_memo_for_obj(pred, ChainMap(scope, memo), obj, name):
+                    res = True
         case _:
             pass
 
     key = memo_key(node)
-    if res and key in memo:
-        del memo[key]
+    local = local_memo(memo)
+    if res and key in local and not isinstance(node, cl.item):
+        del local[key]
 
     return res
 
 
-def reset_bvh_cache(state, filter_name=None):
+def reset_bvh_cache(state, filter_name=None, filter_obj_names=None):
     """
     filter_name: if specified, only get rid of things containing this
+    filter_obj_names: same, but given as trimesh node names, for objects no longer in state.objs
     """
 
     static_tags = {t.Semantics.Room, t.Semantics.Cutter}
 
+    if filter_name is not None:
+        filter_obj_names = [state.objs[filter_name].obj.name]
+
     def keep_key(k):
         names, tags = k
 
-        if filter_name is not None:
-            obj = state.objs[filter_name].obj
-            return obj.name not in names
+        if filter_obj_names is not None:
+            return names.isdisjoint(filter_obj_names)
 
         for n in names:
             if n not in state.objs:
@@ -97,11 +127,16 @@ def evict_memo_for_move(
         ):
             for name in names:
                 assert name is not None, move
-                evict_memo_for_obj(problem, memo, state.objs[name])
+                evict_memo_for_obj(problem, memo, state.objs[name], name)
                 reset_bvh_cache(state, filter_name=name)
-        case moves.Deletion(name):
-            # TODO hack - delete everything since we cant evict for specific obj after it has ben deleted
-            # easily fixable with more work / refactoring
+        case moves.Deletion(names=names) if move._backup_state is not None:
+            # the object is already gone from state.objs, evict using the
+            # ObjectState and node names the move kept around for revert()
+            (name,) = names
+            evict_memo_for_obj(problem, memo, move._backup_state, name)
+            reset_bvh_cache(state, filter_obj_names=move._backup_obj_names)
+        case moves.Deletion(names=names):
+            # never applied, nothing to target
             for k in list(memo.keys()):
                 del memo[k]
             reset_bvh_cache(state)
@@ -4,9 +4,9 @@
 
 # Authors: Alexander Raistrick
 
-import copy
 import logging
 import operator
+from collections import ChainMap
 from dataclasses import dataclass
 
 import pandas as pd
@@ -27,6 +27,22 @@ gather_funcs = {
 }
 
 
+def _bound_scopes(node: cl.Node, var: str, objs, memo: dict):
+    """
+    One memo scope per object of a quantifier, chained onto memo.
+
+    Scopes are stored in memo under the quantifier, so everything evaluated
+    under a binding is reused by later steps until evict_memo_for_obj drops it.
+    Bindings of objects no longer in objs are discarded.
+    """
+    local = eval_memo.local_memo(memo)
+    key = eval_memo.binding_key(node)
+    prev = local.get(key, {})
+    scopes = {o: prev.get(o) or {var: {o}} for o in objs}
+    local[key] = scopes
+    return [ChainMap(scope, memo) for scope in scopes.values()]
+
+
 def _compute_node_val(node: cl.Node, state: State, memo: dict):
     match node:
         case cl.scene():
@@ -40,11 +56,10 @@ def _compute_node_val(node: cl.Node, state: State, memo: dict):
 
             loop_over_objs = evaluate_node(objs, state, memo)
 
-            results = []
-            for o in loop_over_objs:
-                memo_sub = copy.copy(memo)
-                memo_sub[var] = {o}
-                results.append(evaluate_node(pred, state, memo=memo_sub))
+            results = [
+                evaluate_node(pred, state, memo=scope)
+                for scope in _bound_scopes(node, var, loop_over_objs, memo)
+            ]
 
             logger.debug(f"{node.__class__.__name__} had {len(results)=}")
 
@@ -99,6 +114,42 @@ def relevant(node: cl.Node, filter: r.Domain | None) -> bool:
             return any(relevant(c, filter) for _, c in node.children())
 
 
+def _relevant_cached(node: cl.Node, filter: r.Domain, table: dict) -> bool:
+    # keyed by id, the constraint graph outlives the table for a whole stage
+    k = id(node)
+    res = table.get(k)
+    if res is None:
+        if isinstance(node, cl.ObjectSetExpression):
+            res = relevant(node, filter)
+        else:
+            res = any(_relevant_cached(c, filter, table) for _, c in node.children())
+        table[k] = res
+    return res
+
+
+def relevance_table(problem: cl.Problem, filter: r.Domain | None) -> dict | None:
+    """
+    Precompute relevant(node, filter) for every node of the hard constraints.
+
+    Relevance only depends on the constraint graph and the filter domain, which
+    are both fixed for a solve_objects stage, so the table is built once when
+    the solver resets and passed to evaluate_problem for every step.
+    """
+    if filter is None:
+        return None
+    table = {}
+    for node in problem.constraints.values():
+        for n in node.traverse():
+            _relevant_cached(n, filter, table)
+    return table
+
+
+def _is_relevant(node: cl.Node, filter: r.Domain, relevance: dict | None) -> bool:
+    if relevance is None:
+        return relevant(node, filter)
+    return _relevant_cached(node, filter, relevance)
+
+
 def _viol_count_binop(node: cl.BoolOperatorExpression, lhs, rhs) -> int:
     if not isinstance(lhs, int) or not isinstance(rhs, int):
         satisfied = node.func(lhs, rhs)
@@ -117,10 +168,16 @@ def _viol_count_binop(node: cl.BoolOperatorExpression, lhs, rhs) -> int:
             raise ValueError(f"Unhandled {node.func=}")
 
 
-def viol_count(node: cl.Node, state: State, memo: dict, filter: r.Domain = None):
+def viol_count(
+    node: cl.Node,
+    state: State,
+    memo: dict,
+    filter: r.Domain = None,
+    relevance: dict = None,
+):
     match node:
         case cl.BoolOperatorExpression(operator.and_, cons) | cl.Problem(cons):
-            res = sum(viol_count(o, state, memo, filter) for o in cons)
+            res = sum(viol_count(o, state, memo, filter, relevance) for o in cons)
         case cl.in_range(val, low, high):
             val_res = evaluate_node(val, state, memo)
 
@@ -131,20 +188,21 @@ def viol_count(node: cl.Node, state: State, memo: dict, filter: r.Domain = None)
             else:
                 res = 0
 
-            if not relevant(val, filter):
+            if not _is_relevant(val, filter, relevance):
                 res = 0
 
         case cl.BoolOperatorExpression(operator.eq, [lhs, rhs]):
             res = abs(evaluate_node(lhs, state, memo) - evaluate_node(rhs, state, memo))
-            if not relevant(lhs, filter) and not relevant(rhs, filter):
+            if not _is_relevant(lhs, filter, relevance) and not _is_relevant(
+                rhs, filter, relevance
+            ):
                 res = 0
         case cl.ForAll(objs, var, pred):
             assert isinstance(var, str)
             viol = 0
-            for o in evaluate_node(objs, state, memo):
-                memo_sub = copy.copy(memo)
-                memo_sub[var] = {o}
-                viol += viol_count(pred, state, memo_sub, filter)
+            objs_res = evaluate_node(objs, state, memo)
+            for scope in _bound_scopes(node, var, objs_res, memo):
+                viol += viol_count(pred, state, scope, filter, relevance)
             res = viol
         case (
             cl.BoolOperatorExpression(operator.ge, [lhs, rhs])
@@ -152,7 +210,9 @@ def viol_count(node: cl.Node, state: State, memo: dict, filter: r.Domain = None)
             | cl.BoolOperatorExpression(operator.gt, [rhs, lhs])
             | cl.BoolOperatorExpression(operator.lt, [rhs, lhs])
         ):
-            if relevant(lhs, filter) or relevant(rhs, filter):
+            if _is_relevant(lhs, filter, relevance) or _is_relevant(
+                rhs, filter, relevance
+            ):
                 l_res = evaluate_node(lhs, state, memo)
                 r_res = evaluate_node(rhs, state, memo)
                 res = _viol_count_binop(node, l_res, r_res)
@@ -214,7 +274,11 @@ class EvalResult:
 
 
 def evaluate_problem(
-    problem: cl.Problem, state: State, filter: r.Domain = None, memo=None
+    problem: cl.Problem,
+    state: State,
+    filter: r.Domain = None,
+    memo=None,
+    relevance: dict = None,
 ):
     logger.debug(
         f"Evaluating problem {len(problem.constraints)=} {len(problem.score_terms)=}"
@@ -235,7 +299,9 @@ def evaluate_problem(
     # visible_others()
     for name, node in problem.constraints.items():
         logger.debug(f"Evaluating constraint {name=}")
-        violated[name] = viol_count(node, state, memo, filter=filter)
+        violated[name] = viol_count(
+            node, state, memo, filter=filter, relevance=relevance
+        )
         logger.debug(f"Evaluator found {violated[name]} violations for {name=}")
         print(f"*********Evaluator found {violated[name]} violations for {name=}")
 
@@ -12,11 +12,16 @@ import numpy as np
 import trimesh
 from shapely import LineString, Point
 
+from infinigen.core.constraints.constraint_language.util import (
+    remove_from_scene,
+    world_mesh,
+)
+
 
 def meshes_from_names(scene, names):
     if isinstance(names, str):
         names = [names]
-    return [scene.geometry[g] for _, g in (scene.graph[n] for n in names)]
+    return [world_mesh(scene.geometry[g]) for _, g in (scene.graph[n] for n in names)]
 
 
 def blender_objs_from_names(names):
@@ -168,8 +173,7 @@ def delete_obj(a, scene=None):
     for obj_name in a:
         bpy.data.objects.remove(bpy.data.objects[obj_name], do_unlink=True)
         if scene:
-            scene.graph.transforms.remove_node(obj_name)
-            scene.delete_geometry(obj_name + "_mesh")
+            remove_from_scene(scene, obj_name)
 
 
 def global_vertex_coordinates(obj, local_vertex):
@@ -8,6 +8,7 @@
 
 from __future__ import annotations
 
+import heapq
 import logging
 from dataclasses import dataclass
 from typing import Union
@@ -20,7 +21,7 @@ import numpy as np
 import trimesh
 from mathutils import Vector
 from scipy.optimize import linear_sum_assignment
-from shapely import MultiPolygon, Polygon
+from shapely import MultiPolygon, Polygon, contains_xy, prepare
 from shapely.geometry import LineString, Point
 from shapely.ops import nearest_points, unary_union
 from trimesh import Scene
@@ -146,53 +147,144 @@ class Contact:
     names: list[str]
 
 
-def bbox_collision(src_geoms, tar_geoms):
+def bbox_collision(src_geoms, tar_geoms, src_names=None, tar_names=None):
+    """
+    AABB overlap of every (src, tar) pair, computed in one broadcast over the
+    stacked bounds. Returns one Contact per overlapping pair.
+    """
+    if len(src_geoms) == 0 or len(tar_geoms) == 0:
+        return False, [], []
+
+    depth = iu.aabb_penetration_depth(
+        iu.stack_bounds(src_geoms), iu.stack_bounds(tar_geoms)
+    )
+    pairs = np.argwhere(depth > 0)
+
+    names = []
     contacts = []
-    hit = False
-    for src_geom in src_geoms:
-        bounds1 = src_geom.bounds
-        for tar_geom in tar_geoms:
-            bounds2 = tar_geom.bounds
-            observed_depth = min(
-                [
-                    min(i, j)
-                    for i, j in zip(
-                        (bounds1[1] - bounds2[0]), (bounds2[1] - bounds1[0])
-                    )
-                ]
-            )
-            if observed_depth > 0:
-                hit = True
-                contact = Contact(depth=observed_depth)
-                contacts.append(contact)
+    for i, j in pairs:
+        pair = [
+            src_names[i] if src_names is not None else None,
+            tar_names[j] if tar_names is not None else None,
+        ]
+        names.append(tuple(pair))
+        contacts.append(Contact(depth=float(depth[i, j]), names=pair))
+
+    return len(pairs) > 0, names, contacts
+
+
+def overlapping_names(
+    scene: Scene, a: list[str], b: list[str], tol=1e-6
+) -> list[str]:
+    """
+    Broad-phase: the subset of b whose AABB overlaps or touches the AABB of
+    any object in a. Only these can produce a narrow-phase contact.
+    """
+    if len(a) == 0 or len(b) == 0:
+        return []
+    depth = iu.aabb_penetration_depth(iu.world_aabbs(scene, a), iu.world_aabbs(scene, b))
+    keep = (depth >= -tol).any(axis=0)
+    return [n for n, k in zip(b, keep) if k]
+
+
+def boolean_penetration_depth(src_geom, tar_geom):
+    """
+    Exact overlap thickness from a mesh boolean, volume over the two largest
+    extents of the intersection. Slow, kept as the reference for validation.
+    """
+    intersection = trimesh.boolean.intersection([src_geom, tar_geom])
+    if intersection.is_empty:
+        return None
+    volume = intersection.volume
+    bounds = intersection.bounds  # Returns an array with min and max points
+    size = bounds[1] - bounds[0]
+    size.sort()  # small -> big
+    return volume / size[-1] / size[-2]
 
-    return hit, None, contacts
 
+def _voxel_overlap(src_geom, tar_geom, resolution):
+    """Grid cell centers over the AABB overlap inside both meshes, and the cell size"""
+    lo = np.maximum(src_geom.bounds[0], tar_geom.bounds[0])
+    hi = np.minimum(src_geom.bounds[1], tar_geom.bounds[1])
+    if np.any(hi <= lo):
+        return None, None
 
-def intersection(src_geoms, tar_geoms, src_names, target_names):
+    cell = (hi - lo) / resolution
+    axes = [lo[i] + cell[i] * (np.arange(resolution) + 0.5) for i in range(3)]
+    points = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+
+    inside = src_geom.contains(points)
+    if inside.any():
+        inside[inside] = tar_geom.contains(points[inside])
+    if not inside.any():
+        return None, cell
+    return points[inside], cell
+
+
+def voxel_penetration_depth(src_geom, tar_geom, resolution=16):
+    """
+    Estimate the same overlap thickness as boolean_penetration_depth from
+    occupancy of a resolution^3 grid spanning the AABB overlap of both meshes.
+    """
+    occupied, cell = _voxel_overlap(src_geom, tar_geom, resolution)
+    if occupied is None:
+        return None
+
+    volume = len(occupied) * np.prod(cell)
+    size = occupied.max(axis=0) - occupied.min(axis=0) + cell
+    size.sort()  # small -> big
+    return volume / size[-1] / size[-2]
+
+
+def voxel_overlap_volume(src_geom, tar_geom, resolution=16):
+    """Estimate the intersection volume of two watertight meshes on the same grid"""
+    occupied, cell = _voxel_overlap(src_geom, tar_geom, resolution)
+    if occupied is None:
+        return 0.0
+    return float(len(occupied) * np.prod(cell))
+
+
+@gin.configurable
+def intersection(
+    src_geoms, tar_geoms, src_names, target_names, mode="voxel", resolution=16
+):
+    """
+    mode: "voxel" estimates depth from grid occupancy, "boolean" runs the exact
+    mesh boolean, "validate" runs both and logs their disagreement.
+    """
     contacts = []
     names = []
     hit = False
 
-    for src_geom, src_name in zip(src_geoms, src_names):
-        for tar_geom, target_name in zip(tar_geoms, target_names):
-            if "SingleCabinetFactory" in target_name:
-                a = 1
-            intersection = trimesh.boolean.intersection([src_geom, tar_geom])
-            # if "BedFactory" in src_name and "bedroom" in target_name:
-            #     import pdb
-            #     pdb.set_trace()
-            if not intersection.is_empty:
-                hit = True
-                volume = intersection.volume
-                bounds = intersection.bounds  # Returns an array with min and max points
-                size = bounds[1] - bounds[0]
-                size.sort()  # small -> big
-                depth = volume / size[-1] / size[-2]
-                # depth = size[0]
-                contact = Contact(depth=depth, names=["not known"])
-                contacts.append(contact)
-                names.append((src_name, target_name))
+    if len(src_geoms) == 0 or len(tar_geoms) == 0:
+        return hit, names, contacts
+
+    # pairs whose boxes do not overlap cannot intersect
+    overlap = iu.aabb_penetration_depth(
+        iu.stack_bounds(src_geoms), iu.stack_bounds(tar_geoms)
+    )
+
+    for i, j in np.argwhere(overlap > 0):
+        src_geom, src_name = src_geoms[i], src_names[i]
+        tar_geom, target_name = tar_geoms[j], target_names[j]
+
+        if mode == "boolean":
+            depth = boolean_penetration_depth(src_geom, tar_geom)
+        elif mode in ("voxel", "validate"):
+            depth = voxel_penetration_depth(src_geom, tar_geom, resolution)
+            if mode == "validate":
+                ref = boolean_penetration_depth(src_geom, tar_geom)
+                logger.info(
+                    f"intersection {src_name} x {target_name}: voxel={depth} boolean={ref}"
+                )
+        else:
+            raise ValueError(f"Unknown intersection {mode=}")
+
+        if depth is not None:
+            hit = True
+            contact = Contact(depth=depth, names=[src_name, target_name])
+            contacts.append(contact)
+            names.append((src_name, target_name))
 
     return hit, names, contacts
 
@@ -367,8 +459,8 @@ def any_touching_expand(
     elif isinstance(b, str):
         # 如果 b 是单个字符串，处理单个碰撞检测
         T, g = scene.graph[b]  # 获取 b 的变换和几何信息
-        geom = scene.geometry[g]
-        geom_expand = expand_mesh(geom, b)
+        geom = iu.world_mesh(scene.geometry[g])
+        geom_expand = iu.world_mesh(expand_mesh(geom, b))
 
         hit1, names1, contacts1 = col_expand.in_collision_single(
             geom, transform=T, return_data=True, return_names=True
@@ -394,7 +486,7 @@ def any_touching_expand(
         # combine
         hit = hit1 or hit2
         names = []
-        contacts = list(set(contacts1 + contacts2))
+        contacts = contacts1 + contacts2
 
     else:
         # 如果 b 的类型未处理，抛出错误
@@ -447,14 +539,24 @@ def any_touching(
         # 如果 b 是单个字符串，处理单个碰撞检测
         T, g = scene.graph[b]  # 获取 b 的变换和几何信息
         hit, names, contacts = col.in_collision_single(
-            scene.geometry[g], transform=T, return_data=True, return_names=True
+            iu.world_mesh(scene.geometry[g]),
+            transform=T,
+            return_data=True,
+            return_names=True,
         )
     elif isinstance(b, list) or isinstance(b, set):
         # 如果 b 是一个列表，处理多个物体之间的碰撞检测
-        col2 = iu.col_from_subset(scene, b, b_tags, bvh_cache)
-        hit, names, contacts = col.in_collision_other(
-            col2, return_names=True, return_data=True
-        )
+        # only objects whose AABB reaches a go to FCL. The filtered subset
+        # changes every move, so it is built uncached from the per-geometry
+        # fcl objects instead of polluting bvh_cache
+        b_near = overlapping_names(scene, list(a), list(b))
+        col2 = iu.col_from_subset(scene, b_near, b_tags) if b_near else None
+        if col is None or col2 is None:
+            hit, names, contacts = False, set(), []
+        else:
+            hit, names, contacts = col.in_collision_other(
+                col2, return_names=True, return_data=True
+            )
     else:
         # 如果 b 的类型未处理，抛出错误
         raise ValueError(f"Unhandled case {a=} {b=}")
@@ -510,7 +612,7 @@ def min_dist(
     # 如果 b 是单个对象
     elif isinstance(b, str):
         T, g = scene.graph[b]
-        geom = scene.geometry[g]
+        geom = iu.world_mesh(scene.geometry[g])
         if b_tags is not None and len(b_tags) > 0:
             obj = iu.blender_objs_from_names(b)[0]
             mask = tagging.tagged_face_mask(obj, b_tags)
@@ -552,8 +654,8 @@ def contains(scene: Scene, a: str, b: str, tol=1e-6) -> bool:
     """
     Check if a contains b
     """
-    mesh_a = scene.geometry[a]
-    mesh_b = scene.geometry[b]
+    mesh_a = iu.world_mesh(scene.geometry[a])
+    mesh_b = iu.world_mesh(scene.geometry[b])
 
     difference = mesh_a.difference(mesh_b)
 
@@ -648,7 +750,11 @@ def has_line_of_sight(
         points_a = obj_a.sample(num_samples)
 
         combined_mesh = trimesh.util.concatenate(
-            [mesh for name, mesh in scene.geometry.items() if mesh != obj_a]
+            [
+                iu.world_mesh(mesh)
+                for name, mesh in scene.geometry.items()
+                if mesh != obj_a
+            ]
         )
 
         for obj_b in b:
@@ -701,6 +807,72 @@ def freespace_2d(
     return percent_available
 
 
+# rasters of the static space polygons (rooms), keyed by names, grid and bounds
+_space_raster_cache = {}
+SPACE_RASTER_CACHE_SIZE = 32
+
+
+def rasterize_polygons(polygons, x_centers, y_centers) -> np.ndarray:
+    """
+    Boolean (len(x_centers), len(y_centers)) mask of cell centers strictly
+    inside any of the polygons. Each polygon is only tested against the cells
+    under its own bounding box.
+    """
+    mask = np.zeros((len(x_centers), len(y_centers)), dtype=bool)
+    for poly in polygons:
+        if poly.is_empty:
+            continue
+        minx, miny, maxx, maxy = poly.bounds
+        i0 = np.searchsorted(x_centers, minx, side="left")
+        i1 = np.searchsorted(x_centers, maxx, side="right")
+        j0 = np.searchsorted(y_centers, miny, side="left")
+        j1 = np.searchsorted(y_centers, maxy, side="right")
+        if i0 >= i1 or j0 >= j1:
+            continue
+        prepare(poly)
+        xx, yy = np.meshgrid(x_centers[i0:i1], y_centers[j0:j1], indexing="ij")
+        mask[i0:i1, j0:j1] |= contains_xy(poly, xx, yy)
+    return mask
+
+
+def grid_shortest_path(free: np.ndarray, start, end):
+    """
+    A* over the 4-connected free cells of a boolean grid, Manhattan heuristic.
+    Returns the list of (i, j) cells from start to end.
+    """
+    if start == end:
+        return [start]
+
+    def h(c):
+        return abs(c[0] - end[0]) + abs(c[1] - end[1])
+
+    came_from = {start: None}
+    cost = {start: 0}
+    frontier = [(h(start), 0, start)]
+    while frontier:
+        _, g, cell = heapq.heappop(frontier)
+        if cell == end:
+            break
+        if g > cost[cell]:
+            continue
+        i, j = cell
+        for n in ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1)):
+            if not (0 <= n[0] < free.shape[0] and 0 <= n[1] < free.shape[1]):
+                continue
+            if not free[n] or cost.get(n, np.inf) <= g + 1:
+                continue
+            cost[n] = g + 1
+            came_from[n] = cell
+            heapq.heappush(frontier, (g + 1 + h(n), g + 1, n))
+    else:
+        raise nx.NetworkXNoPath(f"No path between {start} and {end}")
+
+    path = [end]
+    while came_from[path[-1]] is not None:
+        path.append(came_from[path[-1]])
+    return path[::-1]
+
+
 def rasterize_space_with_obstacles(
     scene,
     a: Union[str, list[str]],
@@ -709,6 +881,7 @@ def rasterize_space_with_obstacles(
     end_location,
     cell_size=1.0,
     visualize=False,
+    cache_space=True,
 ):
     """
     Rasterize the union of multiple space polygons while considering obstacle polygons,
@@ -721,19 +894,13 @@ def rasterize_space_with_obstacles(
     - end_location: tuple (x, y) representing the end location
     - cell_size: size of each cell in the grid
     - visualize: boolean, if True, visualize the union of spaces, obstacles, and the shortest path
+    - cache_space: reuse the raster of the space polygons while their meshes are unchanged
 
     Returns:
     - graph: A networkx.Graph object representing the rasterized union of spaces minus the obstacles
     - path: list of nodes representing the shortest path from start to end
     """
 
-    def is_close_to_any_node(neighbor, graph, threshold=1e-6):
-        for node in graph.nodes():
-            distance = np.linalg.norm(np.array(neighbor) - np.array(node))
-            if distance < threshold:
-                return node
-        return None
-
     if isinstance(a, str):
         a = [a]
     if isinstance(b, str):
@@ -742,22 +909,68 @@ def rasterize_space_with_obstacles(
     a_meshes = iu.meshes_from_names(scene, a)
     b_meshes = iu.meshes_from_names(scene, b)
 
-    space_polygons = [iu.project_to_xy_poly(mesh) for mesh in a_meshes]
     obstacle_polygons = [iu.project_to_xy_poly(mesh) for mesh in b_meshes]
 
-    # Get the union of all space polygons
-    union_space = unary_union(space_polygons)
+    # the space raster only depends on the space meshes, whose world bounds
+    # change whenever they are moved, so they make a cheap cache key
+    key = (tuple(a), cell_size, iu.stack_bounds(a_meshes).tobytes())
+    cached = _space_raster_cache.get(key) if cache_space else None
+    if cached is None:
+        space_polygons = [iu.project_to_xy_poly(mesh) for mesh in a_meshes]
+
+        # Get the union of all space polygons
+        union_space = unary_union(space_polygons)
+
+        # Get bounding box of the union space
+        minx, miny, maxx, maxy = union_space.bounds
+
+        # Create a grid over the bounding box
+        x_coords = np.arange(minx, maxx, cell_size)
+        y_coords = np.arange(miny, maxy, cell_size)
+        x_centers = x_coords + cell_size / 2
+        y_centers = y_coords + cell_size / 2
+
+        space_mask = rasterize_polygons([union_space], x_centers, y_centers)
+        cached = (space_polygons, x_centers, y_centers, space_mask)
+        if cache_space:
+            if len(_space_raster_cache) >= SPACE_RASTER_CACHE_SIZE:
+                del _space_raster_cache[next(iter(_space_raster_cache))]
+            _space_raster_cache[key] = cached
+    space_polygons, x_centers, y_centers, space_mask = cached
+
+    # cells whose center is inside the union space and outside all obstacle polygons
+    free = space_mask & ~rasterize_polygons(obstacle_polygons, x_centers, y_centers)
+
+    # Connect each node to its 4-neighbours, one shifted mask per direction
+    free_i, free_j = np.nonzero(free)
+    graph = nx.Graph()
+    graph.add_nodes_from(zip(x_centers[free_i], y_centers[free_j]))
+    right = free[:-1, :] & free[1:, :]
+    up = free[:, :-1] & free[:, 1:]
+    ri, rj = np.nonzero(right)
+    ui, uj = np.nonzero(up)
+    graph.add_edges_from(
+        zip(zip(x_centers[ri], y_centers[rj]), zip(x_centers[ri + 1], y_centers[rj]))
+    )
+    graph.add_edges_from(
+        zip(zip(x_centers[ui], y_centers[uj]), zip(x_centers[ui], y_centers[uj + 1]))
+    )
 
-    # Get bounding box of the union space
-    minx, miny, maxx, maxy = union_space.bounds
+    if len(free_i) == 0:
+        raise nx.NetworkXPointlessConcept("No free cells in the rasterized space")
 
-    # Create a grid over the bounding box
-    x_coords = np.arange(minx, maxx, cell_size)
-    y_coords = np.arange(miny, maxy, cell_size)
+    # Find the closest nodes to the start and end locations
+    centers = np.stack([x_centers[free_i], y_centers[free_j]], axis=-1)
+    start_k = np.argmin(np.linalg.norm(centers - np.array(start_location)[:2], axis=-1))
+    end_k = np.argmin(np.linalg.norm(centers - np.array(end_location)[:2], axis=-1))
+    start_cell = (free_i[start_k], free_j[start_k])
+    end_cell = (free_i[end_k], free_j[end_k])
 
-    graph = nx.Graph()
+    cells = grid_shortest_path(free, start_cell, end_cell)
+    path = [(x_centers[i], y_centers[j]) for i, j in cells]
+    start_node, end_node = path[0], path[-1]
 
-    # For visualization
+    # Visualize the path
     if visualize:
         fig, ax = plt.subplots()
         for space in space_polygons:
@@ -782,50 +995,7 @@ def rasterize_space_with_obstacles(
                     ax.fill(x, y, color="grey")
                     ax.plot(x, y, color="black")
 
-    # For each cell in the grid, check if its center is inside the union space and outside all obstacle polygons
-    for x in x_coords:
-        for y in y_coords:
-            cell_center = Point(x + cell_size / 2, y + cell_size / 2)
-            if cell_center.within(union_space) and all(
-                not cell_center.within(obstacle) for obstacle in obstacle_polygons
-            ):
-                graph.add_node((x + cell_size / 2, y + cell_size / 2))
-
-                # For visualization
-                if visualize:
-                    ax.plot(
-                        cell_center.x, cell_center.y, "bo", markersize=3
-                    )  # Plot the point inside the union space and outside obstacles
-
-    # Connect each node to its neighboring nodes
-    for node in graph.nodes():
-        x, y = node
-        neighbors = [
-            (x + cell_size, y),
-            (x - cell_size, y),
-            (x, y + cell_size),
-            (x, y - cell_size),
-        ]
-        for neighbor in neighbors:
-            closest_node = is_close_to_any_node(neighbor, graph)
-            if closest_node is not None:
-                graph.add_edge(node, closest_node)
-
-    # Find the closest nodes to the start and end locations
-    start_node = min(
-        graph.nodes(),
-        key=lambda node: np.linalg.norm(np.array(node) - np.array(start_location)),
-    )
-    end_node = min(
-        graph.nodes(),
-        key=lambda node: np.linalg.norm(np.array(node) - np.array(end_location)),
-    )
-
-    # Calculate the shortest path using Dijkstra's algorithm
-    path = nx.shortest_path(graph, source=start_node, target=end_node, weight="weight")
-
-    # Visualize the path
-    if visualize:
+        ax.plot(centers[:, 0], centers[:, 1], "bo", markersize=3)
         path_x = [x for x, y in path]
         path_y = [y for x, y in path]
         ax.plot(path_x, path_y, c="red", linewidth=2, label="Shortest Path")
@@ -1322,7 +1492,7 @@ def accessibility_cost_cuboid_penetration(
     visobjs = []
     for name in a:
         T, g = scene.graph[name]
-        geom = scene.geometry[g]
+        geom = iu.world_mesh(scene.geometry[g])
 
         # create an extrusion of the bbox by dist in the direction of normal_dir
         bpy_obj = bpy.data.objects[name]
@@ -4,6 +4,7 @@
 
 # Authors: Alexander Raistrick, Karhan Kayan
 
+import itertools
 import logging
 import os
 import time
@@ -22,6 +23,7 @@ from infinigen.core.constraints import reasoning as r
 from infinigen.core.constraints.constraint_language import util as impl_util
 from infinigen.core.util import blender as butil
 
+from .geometry import validity
 from .moves import Move
 from .state_def import State
 
@@ -30,6 +32,99 @@ logger = logging.getLogger(__name__)
 BPY_GARBAGE_COLLECT_FREQUENCY = 20  # every X optim steps
 
 
+@gin.configurable
+class ConvergenceCriterion:
+    """
+    Decides when a solve_objects stage has converged and can stop before n_steps.
+
+    A stage stops after at least min_steps once any enabled criterion has held
+    for `patience` consecutive steps:
+    - plateau: the loss has not improved by more than loss_rtol
+    - satisfied: no violations and no accepted moves
+    - still: no active object moved further than move_tol
+    A stage with violations left is never stopped early, since a plateau or no
+    movement there usually means every proposal is being rejected.
+    """
+
+    def __init__(
+        self,
+        enabled=True,
+        min_steps=50,
+        patience=30,
+        loss_rtol=1e-4,
+        move_tol=1e-4,
+        plateau=True,
+        satisfied=True,
+        still=True,
+        steps_per_obj=None,
+    ):
+        self.enabled = enabled
+        self.min_steps = min_steps
+        self.patience = patience
+        self.loss_rtol = loss_rtol
+        self.move_tol = move_tol
+        self.criteria = {"plateau": plateau, "satisfied": satisfied, "still": still}
+        self.steps_per_obj = steps_per_obj
+
+    def budget(self, n_steps: int, n_active: int) -> int:
+        """Per-stage step budget, scaled to the number of active objects if steps_per_obj is set"""
+        if self.steps_per_obj is None:
+            return n_steps
+        return min(n_steps, max(self.min_steps, self.steps_per_obj * n_active))
+
+    def _locations(self, state: State) -> dict:
+        return {
+            k: np.array(objstate.obj.location)
+            for k, objstate in state.objs.items()
+            if objstate.active and objstate.obj is not None
+        }
+
+    def reset(self, state: State):
+        self.steps = 0
+        self.best_loss = None
+        self.counts = {k: 0 for k in self.criteria}
+        self.ref_locs = self._locations(state)
+
+    def update(self, state: State, result: evaluator.EvalResult, accepted) -> str:
+        """Record one optim step, returns the name of the criterion that stopped the stage, if any"""
+        self.steps += 1
+
+        loss = result.loss()
+        if self.best_loss is None or self.best_loss - loss > self.loss_rtol * max(
+            abs(self.best_loss), 1
+        ):
+            self.best_loss = loss
+            self.counts["plateau"] = 0
+        else:
+            self.counts["plateau"] += 1
+
+        if result.viol_count() == 0 and not accepted:
+            self.counts["satisfied"] += 1
+        else:
+            self.counts["satisfied"] = 0
+
+        if self.criteria["still"]:
+            locs = self._locations(state)
+            moved = locs.keys() != self.ref_locs.keys() or any(
+                np.abs(v - self.ref_locs[k]).max() > self.move_tol
+                for k, v in locs.items()
+            )
+            if moved:
+                self.ref_locs = locs
+                self.counts["still"] = 0
+            else:
+                self.counts["still"] += 1
+
+        if not self.enabled or self.steps < self.min_steps:
+            return None
+        if result.viol_count() > 0:
+            return None
+        for name, on in self.criteria.items():
+            if on and self.counts[name] >= self.patience:
+                return name
+        return None
+
+
 @gin.configurable
 class SimulatedAnnealingSolver:
     def __init__(
@@ -63,6 +158,7 @@ class SimulatedAnnealingSolver:
         self.last_eval_result = None
 
         self.eval_memo = {}
+        self.relevance = None
 
     def save_stats(self, path):
         if len(self.stats) == 0:
@@ -89,12 +185,15 @@ class SimulatedAnnealingSolver:
 
         logger.info(f"Total elapsed {path.stem} {self.stats[-1]['elapsed']:.2f}")
 
-    def reset(self, max_iters):
+    def reset(self, max_iters, consgraph=None, filter_domain=None):
         self.curr_iteration = 0
         self.stats = []
         self.curr_result = None
         self.best_loss = None
         self.eval_memo = {}
+        self.relevance = None
+        if consgraph is not None:
+            self.relevance = evaluator.relevance_table(consgraph, filter_domain)
 
         self.optim_start_time = time.perf_counter()
         self.max_iterations = max_iters
@@ -172,11 +271,11 @@ class SimulatedAnnealingSolver:
         if do_lazy_eval:
             evaluator.evict_memo_for_move(consgraph, state, self.eval_memo, move)
             prop_result = evaluator.evaluate_problem(
-                consgraph, state, filter_domain, self.eval_memo
+                consgraph, state, filter_domain, self.eval_memo, self.relevance
             )
         else:
             prop_result = evaluator.evaluate_problem(
-                consgraph, state, filter_domain, memo={}
+                consgraph, state, filter_domain, memo={}, relevance=self.relevance
             )
 
         if validate_lazy_eval:
@@ -184,6 +283,27 @@ class SimulatedAnnealingSolver:
 
         return prop_result
 
+    def rank_proposals(
+        self, gen: typing.Iterator[Move], state: State, batch_candidates: int
+    ) -> typing.Iterator[Move]:
+        """
+        Draw batch_candidates moves at once and score them all in one broad-phase
+        pass, so the max_invalid_candidates exact attempts go to the objects that
+        are actually in collision rather than to random picks.
+        """
+        batch = list(itertools.islice(gen, batch_candidates))
+        if len(batch) > 1 and all(len(m.names) == 1 for m in batch):
+            scores = validity.aabb_penetration_scores(
+                state, [m.names[0] for m in batch]
+            )
+            order = np.argsort(-scores, kind="stable")
+            logger.debug(
+                f"Ranked {len(batch)} proposals, {np.count_nonzero(scores)} overlapping"
+            )
+            batch = [batch[i] for i in order]
+        yield from batch
+        yield from gen
+
     @gin.configurable
     def retry_attempt_proposals(
         self,
@@ -193,8 +313,11 @@ class SimulatedAnnealingSolver:
         temp: float,
         filter_domain: r.Domain,
         expand_collision=False,
+        batch_candidates=1,
     ) -> typing.Tuple[Move, evaluator.EvalResult, int]:
         gen = propose_func(consgraph, state, filter_domain, temp)
+        if batch_candidates > 1:
+            gen = self.rank_proposals(gen, state, batch_candidates)
 
         move = None
         retry = None
@@ -272,7 +395,7 @@ class SimulatedAnnealingSolver:
     ):
         if self.curr_result is None:
             self.curr_result = evaluator.evaluate_problem(
-                consgraph, state, filter_domain
+                consgraph, state, filter_domain, relevance=self.relevance
             )
 
         move_start_time = time.perf_counter()  # 记录移动开始的时间
@@ -405,3 +528,25 @@ class SimulatedAnnealingSolver:
         self.curr_iteration += 1
         if prop_result is not None:  # 如果提案结果不为None
             self.last_eval_result = prop_result  # 更新上次评估结果
+
+        return accept_result["accept"]
+
+    def record_stop(self, n_steps: int, stop_reason: str = None, budget: int = None):
+        """
+        Add a final stats row saying how many steps were skipped. n_steps is the
+        stage budget actually run, budget the configured one before any scaling.
+        """
+        budget = n_steps if budget is None else budget
+        self.stats.append(
+            dict(
+                curr_iteration=self.curr_iteration,
+                loss=self.curr_result.loss() if self.curr_result else None,
+                viol=self.curr_result.viol_count() if self.curr_result else None,
+                best_loss=self.best_loss,
+                elapsed=time.perf_counter() - self.optim_start_time,
+                budget=budget,
+                stage_budget=n_steps,
+                saved_iters=budget - self.curr_iteration,
+                stop_reason=stop_reason,
+            )
+        )
@@ -5,22 +5,25 @@
 
 
 import bpy
-import fcl
-import numpy as np
 import trimesh
 from mathutils import Matrix
 
 from infinigen.core import tagging
-from infinigen.core.constraints.constraint_language.util import sync_trimesh
+from infinigen.core.constraints.constraint_language.util import (
+    build_collision_object,
+    index_node,
+    sync_trimesh,
+)
 from infinigen.core.util import blender as butil
 
 
 def to_trimesh(obj: bpy.types.Object):
     bpy.context.view_layer.update()
-    verts = np.array([obj.matrix_world @ v.co for v in obj.data.vertices])
-    faces = np.array([p.vertices for p in obj.data.polygons])
+    verts = butil.mesh_vertices(obj)
+    faces = butil.mesh_faces(obj)
     mesh = trimesh.Trimesh(vertices=verts, faces=faces, process=False)
     mesh.current_transform = trimesh.transformations.identity_matrix()
+    mesh.applied_transform = mesh.current_transform
     return mesh
 
 
@@ -72,11 +75,8 @@ def add_to_scene(scene, obj, preprocess=True):
         geom_name=obj.name + "_mesh",
         node_name=obj.name,
     )
-    col = trimesh.collision.CollisionManager()
-    T = trimesh.transformations.identity_matrix()
-    t = fcl.Transform(T[:3, :3], T[:3, 3])
-    tmesh.fcl_obj = col._get_fcl_obj(tmesh)
-    tmesh.col_obj = fcl.CollisionObject(tmesh.fcl_obj, t)
+    index_node(scene, obj.name, tmesh.metadata["tags"])
+    build_collision_object(tmesh)
     obj.matrix_world = obj_matrix_world
     # add transformation
     sync_trimesh(scene, obj.name)
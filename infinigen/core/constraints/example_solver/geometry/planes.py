@@ -6,6 +6,7 @@
 from __future__ import annotations
 
 import logging
+from collections import OrderedDict
 
 import bpy
 import gin
@@ -48,45 +49,94 @@ def global_polygon_normal(obj, polygon):
         )
 
 
+class LRUCache:
+    """Bounded mapping that evicts the least recently used key, with hit/miss counts"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        return dict(
+            hits=self.hits, misses=self.misses, size=len(self._data), maxsize=self.maxsize
+        )
+
+
+@gin.configurable
 class Planes:
-    def __init__(self):
-        self._mesh_hashes = {}  # Dictionary to store mesh hashes for each object
-        self._cached_planes = {}  # Dictionary to store computed planes, keyed by object and face_mask hash
-        self._cached_plane_masks = {}  # Dictionary to store computed plane masks, keyed by object, plane, and face_mask hash
+    def __init__(self, max_cached_planes=2048, max_cached_plane_masks=8192):
+        # keyed by mesh version and face_mask hash
+        self._cached_planes = LRUCache(max_cached_planes)
+        # keyed by mesh version, plane polygon and face_mask hash
+        self._cached_plane_masks = LRUCache(max_cached_plane_masks)
+
+    def cache_stats(self):
+        return {
+            "planes": self._cached_planes.stats(),
+            "plane_masks": self._cached_plane_masks.stats(),
+        }
+
+    @staticmethod
+    def calculate_mesh_hash(obj, n_samples=64):
+        """
+        Version of the mesh data of obj. Planes and plane masks only depend on the
+        local geometry, so the transform is left out, except for the scale.
 
-    def calculate_mesh_hash(self, obj):
-        # Simple hash based on counts of vertices, edges, and polygons
+        The mesh session_uid tells apart different meshes under the same object
+        name, and a digest of up to n_samples evenly spaced vertices catches edits
+        that keep the element counts.
+        """
         mesh = obj.data
-        hash_str = (
-            f"{obj.name}_{len(mesh.vertices)}_{len(mesh.edges)}_{len(mesh.polygons)}"
+        n_vert = len(mesh.vertices)
+        sample = tuple(
+            tuple(mesh.vertices[int(i)].co)
+            for i in np.linspace(0, n_vert - 1, min(n_vert, n_samples))
+        )
+        return (
+            obj.name,
+            mesh.session_uid,
+            n_vert,
+            len(mesh.edges),
+            len(mesh.polygons),
+            hash(sample),
+            tuple(obj.scale),
         )
-        return hash(hash_str)
 
     def hash_face_mask(self, face_mask):
         # Hash the face_mask to use as part of the key for caching
-        return hash(face_mask.tostring())
+        return hash(face_mask.tobytes())
 
     def get_all_planes_cached(self, obj, face_mask, tolerance=1e-4):
-        current_mesh_hash = self.calculate_mesh_hash(obj)
-        current_face_mask_hash = self.hash_face_mask(face_mask)
-        cache_key = (obj.name, current_face_mask_hash)
-
-        # Check if mesh has been modified or planes have not been computed before for this object and face_mask
-        if (
-            cache_key not in self._cached_planes
-            or self._mesh_hashes.get(obj.name) != current_mesh_hash
-        ):
-            self._mesh_hashes[obj.name] = (
-                current_mesh_hash  # Update the hash for this object
-            )
-            # Recompute planes for this object and face_mask and update cache
-            # logger.info(f'Cache MISS planes for {obj.name=}')
-            self._cached_planes[cache_key] = self.compute_all_planes_fast(
-                obj, face_mask, tolerance
-            )
-
-        # logger.info(f'Cache HIT planes for {obj.name=}')
-        return self._cached_planes[cache_key]
+        cache_key = (
+            self.calculate_mesh_hash(obj),
+            self.hash_face_mask(face_mask),
+            tolerance,
+        )
+        planes = self._cached_planes.get(cache_key)
+        if planes is None:
+            planes = self.compute_all_planes_fast(obj, face_mask, tolerance)
+            self._cached_planes.put(cache_key, planes)
+        return planes
 
     @staticmethod
     def normalize(v):
@@ -105,49 +155,33 @@ class Planes:
             round(distance / tolerance),
         )
 
-    def compute_all_planes_fast(self, obj, face_mask, tolerance=1e-4):
-        # Cache computations # 缓存计算结果
-
-        # 创建一个顶点缓存，存储每个顶点的全局坐标
-        vertex_cache = {
-            v.index: global_vertex_coordinates(obj, v) for v in obj.data.vertices
-        }
-        # 创建一个法线缓存，存储每个多边形的全局法线，只有在面掩码为真的情况下才计算
-        normal_cache = {
-            p.index: global_polygon_normal(obj, p)
-            for p in obj.data.polygons
-            if face_mask[p.index]
-        }
-
-        # 用于存储唯一平面
-        unique_planes = {}
-
-        # 遍历每个多边形
-        for polygon in obj.data.polygons:
-            # 如果当前多边形不在面掩码中，跳过
-            if not face_mask[polygon.index]:
-                continue
-
-            # Get the normal and a vertex to represent the plane
-            # 获取当前多边形的法线和一个顶点来表示平面
-            normal = normal_cache[polygon.index]
-
-            # 如果法线的范数太小，跳过（认为是零法线）
-            if np.linalg.norm(normal) < 1e-6:
-                continue
+    @staticmethod
+    def polygon_frames(obj):
+        """world-space first vertex and unit normal of each polygon, (n_poly, 3) each"""
+        loop_verts, loop_start, _ = butil.mesh_loops(obj)
+        points = butil.mesh_vertices(obj)[loop_verts[loop_start]]
+        normals = butil.mesh_polygon_normals(obj)
+        return points, normals
 
-            # 取第一个顶点作为代表
-            vertex = vertex_cache[polygon.vertices[0]]
+    def compute_all_planes_fast(self, obj, face_mask, tolerance=1e-4):
+        points, normals = self.polygon_frames(obj)
 
-            # Hash the plane using both normal and the point
-            # 使用法线和顶点哈希平面
-            plane_hash = self.hash_plane(normal, vertex, tolerance)
+        # skip faces outside the mask and zero normals
+        (idxs,) = np.nonzero(face_mask & (np.linalg.norm(normals, axis=-1) >= 1e-6))
+        if len(idxs) == 0:
+            return []
 
-            # 如果哈希值不在唯一平面字典中，添加到字典
-            if plane_hash not in unique_planes:
-                unique_planes[plane_hash] = (obj.name, polygon.index)
+        # vectorized hash_plane, one row per candidate polygon
+        normals, points = normals[idxs], points[idxs]
+        distance = (normals * points).sum(axis=-1)
+        keys = np.concatenate(
+            [np.round(normals / tolerance), np.round(distance / tolerance)[:, None]],
+            axis=-1,
+        ).astype(np.int64)
 
-        return list(unique_planes.values())  # 返回唯一平面的列表
+        # first polygon of each unique plane, in polygon order
+        _, first = np.unique(keys, axis=0, return_index=True)
+        return [(obj.name, int(i)) for i in idxs[np.sort(first)]]
 
     def get_all_planes_deprecated(
         self, obj, face_mask, tolerance=1e-4
@@ -422,54 +456,20 @@ class Planes:
         plane_tolerance=1e-2,
         fast=True,
     ) -> np.ndarray:
-        # t0 = time.time()
-        obj_id = obj.name
-        # t1 = time.time()
-        # print(f"Command 1 took {t1 - t0:.4f} seconds")
-        current_hash = self.calculate_mesh_hash(obj)
-        # t2 = time.time()
-        # print(f"Command 2 took {t2 - t1:.4f} seconds")
-        face_mask_hash = self.hash_face_mask(face_mask)
-        # t3 = time.time()
-        # print(f"Command 3 took {t3 - t2:.4f} seconds")
-        ref_poly = self.planerep_to_poly(plane)
-        # t4 = time.time()
-        # print(f"Command 4 took {t4 - t3:.4f} seconds")
-        ref_vertex = global_vertex_coordinates(
-            obj, obj.data.vertices[ref_poly.vertices[0]]
+        cache_key = (
+            self.calculate_mesh_hash(obj),
+            plane[1],
+            self.hash_face_mask(face_mask),
+            "single",
         )
-        # t5 = time.time()
-        # print(f"Command 5 took {t5 - t4:.4f} seconds")
-        ref_normal = global_polygon_normal(obj, ref_poly)
-        # t6 = time.time()
-        # print(f"Command 6 took {t6 - t5:.4f} seconds")
-        plane_hash = self.hash_plane(
-            ref_normal, ref_vertex, hash_tolerance
-        )  # Calculate hash for plane
-        # t7 = time.time()
-        # print(f"Command 7 took {t7 - t6:.4f} seconds")
-        cache_key = (obj_id, plane_hash, face_mask_hash)
-
-        mesh_or_face_mask_changed = (
-            cache_key not in self._cached_plane_masks
-            or self._mesh_hashes.get(obj_id) != current_hash
-        )
-        if not mesh_or_face_mask_changed:
-            # logger.info(f'Cache HIT plane mask for {obj.name=}')
-            return self._cached_plane_masks[cache_key]["mask"]
-
-        # If mesh or face mask changed, update the hash and recompute
-        self._mesh_hashes[obj_id] = current_hash
+        plane_mask = self._cached_plane_masks.get(cache_key)
+        if plane_mask is not None:
+            return plane_mask
 
         name, idx = plane
         plane_mask = np.zeros(face_mask.shape, dtype=bool)
         plane_mask[idx] = True
-
-        # Update the cache with the new result
-        self._cached_plane_masks[cache_key] = {
-            "mask": plane_mask,
-        }
-
+        self._cached_plane_masks.put(cache_key, plane_mask)
         return plane_mask
 
     def tagged_plane_mask(
@@ -485,77 +485,44 @@ class Planes:
             return self._compute_tagged_plane_mask(
                 obj, face_mask, plane, plane_tolerance
             )
-        obj_id = obj.name
-        current_hash = self.calculate_mesh_hash(obj)  # Calculate current mesh hash
-        face_mask_hash = self.hash_face_mask(face_mask)  # Calculate hash for face_mask
-        ref_poly = self.planerep_to_poly(plane)
-        ref_vertex = global_vertex_coordinates(
-            obj, obj.data.vertices[ref_poly.vertices[0]]
-        )
-        ref_normal = global_polygon_normal(obj, ref_poly)
-        plane_hash = self.hash_plane(
-            ref_normal, ref_vertex, hash_tolerance
-        )  # Calculate hash for plane
-
-        # Composite key now includes face_mask_hash
-        cache_key = (obj_id, plane_hash, face_mask_hash)
-
-        # Check if the mesh has been modified since last calculation or if the face mask has changed
-        mesh_or_face_mask_changed = (
-            cache_key not in self._cached_plane_masks
-            or self._mesh_hashes.get(obj_id) != current_hash
+        # coplanarity is invariant to the object transform, so the plane is keyed
+        # by its polygon rather than its world space hash
+        cache_key = (
+            self.calculate_mesh_hash(obj),
+            plane[1],
+            self.hash_face_mask(face_mask),
+            plane_tolerance,
         )
+        plane_mask = self._cached_plane_masks.get(cache_key)
+        if plane_mask is not None:
+            return plane_mask
 
-        if not mesh_or_face_mask_changed:
-            # logger.info(f'Cache HIT plane mask for {obj.name=}')
-            return self._cached_plane_masks[cache_key]["mask"]
-
-        # If mesh or face mask changed, update the hash and recompute
-        self._mesh_hashes[obj_id] = current_hash
-
-        # Compute and cache the plane mask
-        # logger.info(f'Cache MISS plane mask for {obj.name=}')
         plane_mask = self._compute_tagged_plane_mask(
             obj, face_mask, plane, plane_tolerance
         )
-
-        # Update the cache with the new result
-        self._cached_plane_masks[cache_key] = {
-            "mask": plane_mask,
-        }
-
+        self._cached_plane_masks.put(cache_key, plane_mask)
         return plane_mask
 
     def _compute_tagged_plane_mask(self, obj, face_mask, plane, tolerance):
         """
         Given a plane, return a mask of all polygons in obj that are coplanar with the plane.
         """
-        plane_mask = np.zeros(len(obj.data.polygons), dtype=bool)
-        ref_poly = self.planerep_to_poly(plane)
-        ref_vertex = global_vertex_coordinates(
-            obj, obj.data.vertices[ref_poly.vertices[0]]
+        points, normals = self.polygon_frames(obj)
+        _, ref_idx = plane
+        ref_vertex, ref_normal = points[ref_idx], normals[ref_idx]
+
+        diff_vec = ref_vertex - points
+        diff_norm = np.linalg.norm(diff_vec, axis=-1, keepdims=True)
+        diff_vec = np.divide(
+            diff_vec, diff_norm, out=diff_vec, where=~np.isclose(diff_norm, 0)
         )
-        ref_normal = global_polygon_normal(obj, ref_poly)
-
-        for candidate_polygon in obj.data.polygons:
-            if not face_mask[candidate_polygon.index]:
-                continue
-
-            candidate_vertex = global_vertex_coordinates(
-                obj, obj.data.vertices[candidate_polygon.vertices[0]]
-            )
-            candidate_normal = global_polygon_normal(obj, candidate_polygon)
-            diff_vec = ref_vertex - candidate_vertex
-            if not np.isclose(np.linalg.norm(diff_vec), 0):
-                diff_vec /= np.linalg.norm(diff_vec)
 
-            ndot = np.dot(ref_normal, candidate_normal)
-            pdot = np.dot(diff_vec, candidate_normal)
+        ndot = normals @ ref_normal
+        pdot = (diff_vec * normals).sum(axis=-1)
 
-            in_plane = np.allclose(ndot, 1, atol=tolerance) and np.allclose(
-                pdot, 0, atol=tolerance
-            )
-
-            plane_mask[candidate_polygon.index] = in_plane
+        in_plane = np.isclose(ndot, 1, atol=tolerance) & np.isclose(
+            pdot, 0, atol=tolerance
+        )
+        plane_mask = face_mask & in_plane
 
         return plane_mask
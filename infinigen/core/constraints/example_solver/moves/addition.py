@@ -318,8 +318,7 @@ class Resample(moves.Move):
         self._backup_poseinfo = pose_backup(os)
 
         scene = state.trimesh_scene
-        scene.graph.transforms.remove_node(os.obj.name)
-        scene.delete_geometry(os.obj.name + "_mesh")
+        iu.remove_from_scene(scene, os.obj.name)
 
         os.obj, os.generator = sample_rand_placeholder(os.generator.__class__)
 
@@ -7,6 +7,7 @@
 import logging
 from dataclasses import dataclass
 
+from infinigen.core.constraints.constraint_language import util as iu
 from infinigen.core.constraints.example_solver import state_def
 from infinigen.core.constraints.example_solver.geometry import parse_scene
 from infinigen.core.constraints.example_solver.moves.moves import Move
@@ -19,6 +20,9 @@ logger = logging.getLogger(__name__)
 class Deletion(Move):
     # remove obj from scene
     _backup_state: state_def.ObjectState = None
+    # names of the removed trimesh nodes, kept so evict_memo_for_move can
+    # target them even after accept() has deleted the blender objects
+    _backup_obj_names: list[str] = None
 
     def __repr__(self):
         return f"{self.__class__.__name__}({self.names})"
@@ -26,10 +30,12 @@ class Deletion(Move):
     def apply(self, state,expand_collision=False):
         (target_name,) = self.names
         self._backup_state = state.objs[target_name]
+        self._backup_obj_names = [
+            o.name for o in butil.iter_object_tree(self._backup_state.obj)
+        ]
 
         for obj in butil.iter_object_tree(state.objs[target_name].obj):
-            state.trimesh_scene.graph.transforms.remove_node(obj.name)
-            state.trimesh_scene.delete_geometry(obj.name + "_mesh")
+            iu.remove_from_scene(state.trimesh_scene, obj.name)
 
         del state.objs[target_name]
         return True
@@ -250,7 +250,7 @@ class TranslateMove(moves.Move):
 
         a = obj_state.obj.name
         T, g = scene.graph[a]  # 获取 b 的变换和几何信息
-        geom_a = scene.geometry[g]
+        geom_a = iu.world_mesh(scene.geometry[g])
         centroid_a = geom_a.centroid
 
         centroid_b_lst = []
@@ -268,7 +268,7 @@ class TranslateMove(moves.Move):
             if b.startswith("window"):
                 continue
             T, g = scene.graph[b]  # 获取 b 的变换和几何信息
-            geom_b = scene.geometry[g]
+            geom_b = iu.world_mesh(scene.geometry[g])
             centroid_b = geom_b.centroid
             depth = touch.contacts[i].depth
             if b not in b_names:
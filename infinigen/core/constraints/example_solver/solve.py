@@ -21,6 +21,7 @@ from tqdm import trange
 
 from infinigen.assets.metascene_assets import GeneralMetaFactory
 from infinigen.assets.objaverse_assets import GeneralObjavFactory
+from infinigen.assets.objaverse_assets.retrieval_client import retrieve_objav_files
 from infinigen.assets.threedfront_assets import GeneralThreedFrontFactory
 from infinigen.core import tags as t
 
@@ -45,7 +46,7 @@ from infinigen.core.util import blender as butil
 from infinigen_examples.util import constraint_util as cu
 
 from . import moves, propose_relations, state_def
-from .annealing import SimulatedAnnealingSolver
+from .annealing import ConvergenceCriterion, SimulatedAnnealingSolver
 from .room import MultistoryRoomSolver, RoomSolver
 
 # from infinigen_examples.steps.tools import calc_position_bias
@@ -107,6 +108,7 @@ class Solver:
         self.optim = SimulatedAnnealingSolver(
             output_folder=output_folder,
         )
+        self.convergence = ConvergenceCriterion()
 
         self.room_solver_fn = MultistoryRoomSolver if multistory else RoomSolver
         self.state: State = None
@@ -117,6 +119,12 @@ class Solver:
             restrict_moves, addition_weight_scalar=addition_weight_scalar
         )
 
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # solvers pickled before convergence checks existed, see load_legacy_record
+        if getattr(self, "convergence", None) is None:
+            self.convergence = ConvergenceCriterion()
+
     def _configure_move_weights(self, restrict_moves, addition_weight_scalar=1.0):
         schedules = {
             "addition": (
@@ -231,21 +239,19 @@ class Solver:
             f"{active_count=}/{len(self.state.objs)} objs"
         )
 
-        self.optim.reset(max_iters=n_steps)
+        max_steps = n_steps
+        n_steps = self.convergence.budget(n_steps, active_count)
+        self.optim.reset(
+            max_iters=n_steps, consgraph=consgraph, filter_domain=filter_domain
+        )
+        self.convergence.reset(self.state)
 
         ra = (
             trange(n_steps) if self.optim.print_report_freq == 0 else range(n_steps)
         )  # *len(self.state.objs))
 
-        # loc_record = dict()
-        # for objname in self.state.objs.keys():
-        #     if objname.startswith("window") or objname.startswith("entrance") or objname.startswith("newroom_0-0"):
-        #         continue
-        #     obj_state = self.state.objs[objname]
-        #     loc_record[objname] = obj_state.obj.location.copy()
-        #     # np.allclose(x1, x2):
-
         # 进行迭代
+        stop_reason = None
         for j in ra:
             print(j)
 
@@ -257,29 +263,20 @@ class Solver:
 
             gen = random.choice([move_gen])
 
-            self.optim.step(
+            accepted = self.optim.step(
                 consgraph, self.state, gen, filter_domain, expand_collision
             )  # MARK # 执行优化步骤
 
-            # Finish = True
-            # for objname in self.state.objs.keys():
-            #     if objname.startswith("window") or objname.startswith("entrance") or objname.startswith("newroom_0-0"):
-            #         continue
-            #     obj_state = self.state.objs[objname]
-            #     loc = obj_state.obj.location.copy()
-            #     loc_old = loc_record[objname]
-            #     # print(objname,loc-loc_old)
-            #     if np.allclose(loc_old[0], loc[0]) and \
-            #         np.allclose(loc_old[1], loc[1]) and \
-            #         np.allclose(loc_old[2], loc[2]):
-            #         continue
-            #     else:
-            #         Finish = False
-            #         break
-
-            # if j>150 and Finish:
-            #     break
+            stop_reason = self.convergence.update(
+                self.state, self.optim.curr_result, accepted
+            )
+            if stop_reason is not None:
+                logger.info(
+                    f"{desc_full} converged ({stop_reason}) after {j + 1}/{n_steps} steps"
+                )
+                break
 
+        self.optim.record_stop(n_steps, stop_reason, budget=max_steps)
         self.optim.save_stats(
             self.output_folder / f"optim_{desc}.csv"
         )  # 保存优化统计信息
@@ -365,7 +362,9 @@ class Solver:
             f"{active_count=}/{len(self.state.objs)} objs"
         )
 
-        self.optim.reset(max_iters=n_steps)
+        self.optim.reset(
+            max_iters=n_steps, consgraph=consgraph, filter_domain=filter_domain
+        )
 
         ra = (
             trange(n_steps) if self.optim.print_report_freq == 0 else range(n_steps)
@@ -451,11 +450,7 @@ class Solver:
         with open(f"{save_dir}/objav_cnts.json", "w") as f:
             json.dump(self.LoadObjavCnts, f, indent=4)
 
-        os.system(
-            f'bash -lic "source ./run/retrieve_holodeck.sh {save_dir}" > run.log 2>&1'
-        )
-        with open(f"{save_dir}/objav_files.json", mode="r") as f:
-            self.LoadObjavFiles = json.load(f)
+        self.LoadObjavFiles = retrieve_objav_files(self.LoadObjavCnts.keys(), save_dir)
         return
 
     @gin.configurable
@@ -1,7 +1,7 @@
-import copy
-
+import fcl
 import mathutils
 import numpy as np
+import trimesh
 
 D_base = 0.0
 EXPAND_DISTANCE = {
@@ -60,15 +60,42 @@ def get_expand_distance(name):
 
 
 def expand_mesh(geom, name):
-    d_front, d_back, d_side = get_expand_distance(name)
+    """
+    Return geom grown by its EXPAND_DISTANCE, or geom itself if it has none.
 
-    if d_front == 0 and d_back == 0 and d_side == 0:
+    The expanded mesh is built once in local space and cached on geom, keyed by
+    the distances and the scale of its transform, together with an FCL object
+    built from the local vertices. A moved object only hands its new
+    current_transform to the cached copy and its FCL object; as for geom, the
+    vertices of the returned mesh follow that transform lazily (see
+    util.world_mesh).
+    """
+    distances = tuple(get_expand_distance(name))
+    if not any(distances):
         return geom
 
-    T_old = geom.current_transform
-    mesh_copy = copy.deepcopy(geom)
-    mesh_copy.apply_transform(np.linalg.inv(T_old))
-    vertices = mesh_copy.vertices
+    T = geom.current_transform
+    _, _, scale = mathutils.Matrix(T).decompose()
+    key = (distances, tuple(np.round(np.array(scale), 6)))
+
+    expanded = getattr(geom, "expanded", None)
+    if expanded is None or expanded.expand_key != key:
+        expanded = _expand_local(geom, distances, scale)
+        expanded.expand_key = key
+        geom.expanded = expanded
+    expanded.current_transform = T
+    expanded.col_obj.setTransform(fcl.Transform(T[:3, :3], T[:3, 3]))
+    return expanded
+
+
+def _expand_local(geom, distances, scale):
+    d_front, d_back, d_side = distances
+
+    # vertices sit at applied_transform, which may lag behind current_transform
+    T_applied = getattr(geom, "applied_transform", geom.current_transform)
+    vertices = trimesh.transformations.transform_points(
+        geom.vertices, np.linalg.inv(T_applied)
+    )
     ### move to proper pose for rescale
     # back expand = False
     back, front = vertices.min(0)[0], vertices.max(0)[0]
@@ -80,7 +107,6 @@ def expand_mesh(geom, name):
     ]  # do not change z, so 0 is ok
     vertices -= v_center
 
-    loc, rot, scale = mathutils.Matrix(T_old).decompose()
     ### rescale
     scaling_factor_front = (
         ((front - back) / 2 * scale[0] + d_front) / scale[0] / ((front - back) / 2)
@@ -91,7 +117,6 @@ def expand_mesh(geom, name):
     scaling_factor_side = (
         ((right - left) * scale[1] + d_side) / scale[1] / (right - left)
     )
-    # print(name, scaling_factor_front, scaling_factor_back, scaling_factor_side)
 
     scale_matrix = np.eye(3)
 
@@ -109,6 +134,9 @@ def expand_mesh(geom, name):
 
     ### move back to original pose, finish expand
     vertices += v_center
-    mesh_copy.vertices = vertices
-    mesh_copy.apply_transform(T_old)
-    return mesh_copy
+    mesh = trimesh.Trimesh(vertices=vertices, faces=geom.faces, process=False)
+    mesh.current_transform = trimesh.transformations.identity_matrix()
+    mesh.applied_transform = mesh.current_transform
+    mesh.fcl_obj = trimesh.collision.mesh_to_BVH(mesh)
+    mesh.col_obj = fcl.CollisionObject(mesh.fcl_obj, fcl.Transform())
+    return mesh
@@ -11,7 +11,6 @@ from typing import Union
 
 import bpy
 import numpy as np
-from mathutils import Vector
 
 import infinigen.core.util.blender as butil
 from infinigen.core import surface
@@ -157,6 +156,7 @@ class AutoTag:
             mask_tag_attr = obj.data.attributes[COMBINED_ATTR_NAME]
 
         mask_tag_attr.data.foreach_set("value", tagint)
+        invalidate_tag_cache(obj)
 
     def relabel_obj(self, root_obj):
         tag_name_lookup = [None] * len(self.tag_dict)
@@ -330,71 +330,119 @@ def _name_for_tagval(i: int) -> str | None:
     return name
 
 
-def union_object_tags(obj):
-    if COMBINED_ATTR_NAME not in obj.data.attributes:
-        return set()
-    if obj.name == "MetaCategoryFactory(8823346).spawn_asset(6550758)":
-        a = 1
+# mesh session_uid -> number of times tagging rewrote its MaskTag attribute
+_tag_writes = {}
+# mesh session_uid -> TagTable, oldest first
+_tag_tables = {}
+TAG_TABLE_CACHE_SIZE = 4096
 
-    masktag = surface.read_attr_data(obj, COMBINED_ATTR_NAME)
-    res = set()
-    for v in np.unique(masktag):
-        if v == 0:
-            continue
-        res = res.union(_name_for_tagval(v).split("."))
 
-    def try_convert(x):
-        try:
-            return t.to_tag(x)
-        except ValueError:
-            return x
+def invalidate_tag_cache(obj):
+    """Mark the MaskTag of obj as rewritten, for writers outside this module"""
+    uid = obj.data.session_uid
+    _tag_writes[uid] = _tag_writes.get(uid, 0) + 1
 
-    return {try_convert(x) for x in res}
 
+def _try_convert_tag(x):
+    try:
+        return t.to_tag(x)
+    except ValueError:
+        return x
 
-def tagged_face_mask(obj: bpy.types.Object, tags: Union[t.Subpart]) -> np.ndarray:
-    # ASSUMES: object is triangulated, no quads/polygons
-    # find the face that satisfy tags
-    # MARK Important
-    # import pdb
 
-    # pdb.set_trace()
-    tags = t.to_tag_set(tags)
-    # print(tags)
-    pos_tags = [
-        t.to_string(tagval) for tagval in tags if not isinstance(tagval, t.Negated)
-    ]
-    neg_tags = [
-        t.to_string(tagval.tag) for tagval in tags if isinstance(tagval, t.Negated)
-    ]
-    del tags
+class TagTable:
+    """
+    Decoded MaskTag attribute of one mesh.
+
+    Every distinct tag value on the mesh is decoded to its name parts once, and
+    each face stores the index of its value, so any tag query reduces to
+    selecting values and indexing with face_values.
+    """
 
-    n_poly = len(obj.data.polygons)
-    if COMBINED_ATTR_NAME not in obj.data.attributes:
-        return np.ones(n_poly, dtype=bool)
-    # load masked tag for each face
-    masktag = surface.read_attr_data(obj, COMBINED_ATTR_NAME, domain="FACE")
-    face_mask = np.zeros(n_poly, dtype=bool)
+    def __init__(self, obj, version):
+        self.version = version
+        masktag = surface.read_attr_data(obj, COMBINED_ATTR_NAME, domain="FACE")
+        self.values, self.face_values = np.unique(masktag, return_inverse=True)
+        self.name_parts = [
+            [] if v == 0 else _name_for_tagval(v).split(".") for v in self.values
+        ]
+        self.tags = frozenset(
+            _try_convert_tag(x) for parts in self.name_parts for x in parts
+        )
+        self._selections = {}
+
+    def selection(self, pos_tags: tuple, neg_tags: tuple) -> np.ndarray:
+        key = (pos_tags, neg_tags)
+        sel = self._selections.get(key)
+        if sel is None:
+            sel = np.array(
+                [
+                    all(tag in parts for tag in pos_tags)
+                    and not any(tag in parts for tag in neg_tags)
+                    for parts in self.name_parts
+                ],
+                dtype=bool,
+            )
+            self._selections[key] = sel
+        return sel
 
-    for v in np.unique(masktag):
-        if v == 0:
-            name_parts = []
-        else:
-            # convert masked tag to name tag
-            name_parts = _name_for_tagval(v).split(".")
-            # ['interior', 'invisible', 'room', 'wall']
-        # print(name_parts)
+    def face_mask(self, pos_tags: tuple, neg_tags: tuple) -> np.ndarray:
+        return self.selection(pos_tags, neg_tags)[self.face_values]
 
-        v_mask = masktag == v
 
-        if len(pos_tags) > 0 and not all(
-            tag in name_parts for tag in pos_tags
-        ):  # pos_tags=['wall', 'visible']
-            continue
-        if len(neg_tags) > 0 and any(tag in name_parts for tag in neg_tags):
-            continue
+def tag_table(obj) -> TagTable | None:
+    """Cached TagTable of obj, or None if it has no MaskTag attribute"""
+    attr = obj.data.attributes.get(COMBINED_ATTR_NAME)
+    if attr is None:
+        return None
+
+    uid = obj.data.session_uid
+    version = (
+        len(obj.data.polygons),
+        attr.as_pointer(),
+        _tag_writes.get(uid, 0),
+        id(tag_system.tag_dict),
+        len(tag_system.tag_dict),
+    )
+    table = _tag_tables.get(uid)
+    if table is not None and table.version == version:
+        return table
 
-        face_mask |= v_mask
+    table = TagTable(obj, version)
+    _tag_tables.pop(uid, None)
+    _tag_tables[uid] = table
+    if len(_tag_tables) > TAG_TABLE_CACHE_SIZE:
+        del _tag_tables[next(iter(_tag_tables))]
+    return table
+
+
+def union_object_tags(obj):
+    table = tag_table(obj)
+    if table is None:
+        return set()
+    return set(table.tags)
+
+
+def tagged_face_mask(obj: bpy.types.Object, tags: Union[t.Subpart]) -> np.ndarray:
+    # ASSUMES: object is triangulated, no quads/polygons
+    # find the face that satisfy tags
+    tags = t.to_tag_set(tags)
+    pos_tags = tuple(
+        sorted(
+            t.to_string(tagval) for tagval in tags if not isinstance(tagval, t.Negated)
+        )
+    )
+    neg_tags = tuple(
+        sorted(
+            t.to_string(tagval.tag) for tagval in tags if isinstance(tagval, t.Negated)
+        )
+    )
+    del tags
+
+    table = tag_table(obj)
+    if table is None:
+        return np.ones(len(obj.data.polygons), dtype=bool)
+    face_mask = table.face_mask(pos_tags, neg_tags)
 
     lazydebug(
         logger,
@@ -481,18 +529,9 @@ def tag_support_surfaces(obj, angle_threshold=0.1):
     """
 
     def process_mesh(mesh_obj):
-        up_vector = Vector((0, 0, 1))
-
-        n_poly = len(mesh_obj.data.polygons)
-        support_mask = np.zeros(n_poly, dtype=bool)
-
-        for poly in mesh_obj.data.polygons:
-            try:
-                global_normal = butil.global_polygon_normal(mesh_obj, poly)
-                if global_normal.dot(up_vector) > 1 - angle_threshold:
-                    support_mask[poly.index] = True
-            except:
-                continue
+        # degenerate polygons have a zero normal and are never support surfaces
+        normals = butil.mesh_polygon_normals(mesh_obj)
+        support_mask = normals[:, 2] > 1 - angle_threshold
 
         if t.Subpart.SupportSurface.value not in tag_system.tag_dict:
             tag_system.tag_dict[t.Subpart.SupportSurface.value] = (
@@ -902,6 +902,54 @@ def object_to_trimesh(obj):
     return mesh
 
 
+def mesh_vertices(obj, world=True) -> np.ndarray:
+    """(n_vert, 3) vertex coordinates, transformed by matrix_world with one matmul"""
+    verts = np.empty(len(obj.data.vertices) * 3, dtype=np.float32)
+    obj.data.vertices.foreach_get("co", verts)
+    verts = verts.reshape(-1, 3).astype(np.float64)
+    if world:
+        m = np.array(obj.matrix_world)
+        verts = verts @ m[:3, :3].T + m[:3, 3]
+    return verts
+
+
+def mesh_loops(obj):
+    """vertex index of every loop, plus loop_start / loop_total of every polygon"""
+    mesh = obj.data
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int64)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
+    loop_start = np.empty(len(mesh.polygons), dtype=np.int64)
+    mesh.polygons.foreach_get("loop_start", loop_start)
+    loop_total = np.empty(len(mesh.polygons), dtype=np.int64)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+    return loop_verts, loop_start, loop_total
+
+
+def mesh_faces(obj):
+    """(n_poly, k) polygon vertex indices when every polygon has k sides, else a list of lists"""
+    loop_verts, loop_start, loop_total = mesh_loops(obj)
+    if len(loop_total) == 0:
+        return np.zeros((0, 3), dtype=np.int64)
+    if (loop_total == loop_total[0]).all():
+        return loop_verts.reshape(-1, loop_total[0])
+    return [list(loop_verts[s : s + n]) for s, n in zip(loop_start, loop_total)]
+
+
+def mesh_polygon_normals(obj, world=True) -> np.ndarray:
+    """
+    (n_poly, 3) unit polygon normals, rotated like global_polygon_normal.
+    Degenerate polygons keep a zero normal.
+    """
+    normals = np.empty(len(obj.data.polygons) * 3, dtype=np.float32)
+    obj.data.polygons.foreach_get("normal", normals)
+    normals = normals.reshape(-1, 3).astype(np.float64)
+    if world:
+        _, rot, _ = obj.matrix_world.decompose()
+        normals = normals @ np.array(rot.to_matrix()).T
+    norm = np.linalg.norm(normals, axis=-1, keepdims=True)
+    return np.divide(normals, norm, out=np.zeros_like(normals), where=norm > 0)
+
+
 def blender_internal_attr(a):
     if hasattr(a, "name"):
         a = a.name
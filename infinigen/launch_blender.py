@@ -27,6 +27,22 @@ HEADLESS_ARGS = [
 ]
 
 
+def record_scene_args(record_dir, iter):
+    """
+    Blender arguments opening iteration iter of a save_record directory: its
+    scene_{iter}.blend when one was written, else a restore from the snapshot
+    store (infinigen_examples/steps/snapshot.py) before any other script runs.
+    """
+    scene_file = Path(record_dir) / f"scene_{iter}.blend"
+    if scene_file.exists():
+        return [str(scene_file)]
+    expr = (
+        "from infinigen_examples.steps.snapshot import SnapshotStore; "
+        f"SnapshotStore({str(record_dir)!r}).restore_scene({iter})"
+    )
+    return ["--python", str(APPEND_SYSPATH_SCRIPT), "--python-expr", expr]
+
+
 # 获取Blender可执行文件的路径
 def get_standalone_blender_path():
     try:
@@ -63,10 +79,8 @@ if __name__ == "__main__":
 
     cmd_args = [str(get_standalone_blender_path())]
     if args.iter != 0:
-        if args.inplace:
-            cmd_args += [f"{save_dir}/record_files/scene_{args.iter}.blend"]
-        else:
-            cmd_args += [f"{save_dir}/record_files/scene_{args.iter-1}.blend"]
+        load_iter = args.iter if args.inplace else args.iter - 1
+        cmd_args += record_scene_args(f"{save_dir}/record_files", load_iter)
     if args.module is not None:
         # cmd_args += HEADLESS_ARGS
 
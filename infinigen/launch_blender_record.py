@@ -8,6 +8,8 @@ import argparse
 import subprocess
 from pathlib import Path
 
+from infinigen.launch_blender import record_scene_args
+
 root = Path(__file__).parent.parent
 
 BLENDER_BINARY_RELATIVE = [
@@ -61,7 +63,7 @@ if __name__ == "__main__":
         
 
     cmd_args = [str(get_standalone_blender_path())]
-    cmd_args += [f"{save_dir}/record_files/scene_{args.iter}.blend"]
+    cmd_args += record_scene_args(f"{save_dir}/record_files", args.iter)
    
     if args.module is not None:
         # cmd_args += HEADLESS_ARGS
@@ -0,0 +1,104 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
+
+# Compare the voxel penetration-depth estimator against the exact mesh boolean
+# used by trimesh_geometry.intersection, on every overlapping pair of a saved scene.
+#
+# Usage:
+#   python -m infinigen.tools.benchmark_intersection --blend {save_dir}/record_files/scene_3.blend
+
+import argparse
+import time
+from pathlib import Path
+
+import bpy
+import numpy as np
+import pandas as pd
+
+from infinigen.core.constraints.constraint_language import util as iu
+from infinigen.core.constraints.evaluator.node_impl.trimesh_geometry import (
+    boolean_penetration_depth,
+    voxel_penetration_depth,
+)
+from infinigen.core.constraints.example_solver.geometry.parse_scene import to_trimesh
+
+
+def load_meshes(blend: Path, name_filter: str):
+    bpy.ops.wm.open_mainfile(filepath=str(blend), load_ui=False, use_scripts=False)
+    meshes = {}
+    for obj in bpy.data.objects:
+        if obj.type != "MESH" or len(obj.data.polygons) == 0:
+            continue
+        if name_filter and name_filter not in obj.name:
+            continue
+        mesh = to_trimesh(obj)
+        if mesh.is_watertight:
+            meshes[obj.name] = mesh
+    return meshes
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    res = func(*args)
+    return res, time.perf_counter() - start
+
+
+def main(args):
+    meshes = load_meshes(args.blend, args.filter)
+    names = list(meshes.keys())
+    geoms = list(meshes.values())
+    print(f"Loaded {len(names)} watertight meshes from {args.blend}")
+
+    overlap = iu.aabb_penetration_depth(iu.stack_bounds(geoms), iu.stack_bounds(geoms))
+    pairs = [(i, j) for i, j in np.argwhere(overlap > 0) if i < j]
+    print(f"{len(pairs)} pairs with overlapping AABBs")
+
+    rows = []
+    for i, j in pairs:
+        boolean, t_boolean = timed(boolean_penetration_depth, geoms[i], geoms[j])
+        voxel, t_voxel = timed(
+            voxel_penetration_depth, geoms[i], geoms[j], args.resolution
+        )
+        rows.append(
+            dict(
+                a=names[i],
+                b=names[j],
+                boolean=boolean,
+                voxel=voxel,
+                t_boolean=t_boolean,
+                t_voxel=t_voxel,
+            )
+        )
+
+    df = pd.DataFrame.from_records(rows)
+    if len(df) == 0:
+        return
+
+    both = df.dropna(subset=["boolean", "voxel"])
+    agree = (df["boolean"].isna() == df["voxel"].isna()).mean()
+    print(df.to_string())
+    print(f"hit agreement {agree:.2%}")
+    if len(both):
+        err = (both["voxel"] - both["boolean"]).abs()
+        print(f"depth abs err mean={err.mean():.4f} max={err.max():.4f}")
+    print(
+        f"total boolean={df['t_boolean'].sum():.2f}s voxel={df['t_voxel'].sum():.2f}s "
+        f"speedup={df['t_boolean'].sum() / max(df['t_voxel'].sum(), 1e-9):.1f}x"
+    )
+
+    if args.output is not None:
+        df.to_csv(args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blend", type=Path, required=True)
+    parser.add_argument(
+        "--filter",
+        type=str,
+        default="spawn_asset",
+        help="only benchmark objects whose name contains this",
+    )
+    parser.add_argument("--resolution", type=int, default=16)
+    parser.add_argument("--output", type=Path, default=None)
+    main(parser.parse_args())
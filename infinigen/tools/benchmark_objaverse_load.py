@@ -0,0 +1,110 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
+
+# Time the foreach_set mesh construction of load_asset against the original
+# from_pydata + per-loop UV path, on real objathor .pkl.gz assets, and check
+# that both produce the same vertices, faces and UVs.
+#
+# Usage:
+#   python -m infinigen.tools.benchmark_objaverse_load --assets_dir $OBJATHOR_ASSETS_DIR --n 20
+
+import argparse
+import gzip
+import pickle
+import time
+from pathlib import Path
+
+import bpy
+import numpy as np
+import pandas as pd
+
+from infinigen.assets.objaverse_assets.load_asset import asset_arrays, fill_mesh
+
+
+def mesh_from_pydata(data):
+    mesh = bpy.data.meshes.new(name="ReferenceMesh")
+    vertices = [[v["x"], v["z"], v["y"]] for v in data["vertices"]]
+    triangles = np.array(data["triangles"]).reshape(-1, 3)
+    mesh.from_pydata(vertices, [], triangles)
+    uvs = [[uv["x"], uv["y"]] for uv in data["uvs"]]
+    mesh.update()
+    uv_layer = mesh.uv_layers.new(name="UVMap")
+    for poly in mesh.polygons:
+        for loop_index in poly.loop_indices:
+            vertex_index = mesh.loops[loop_index].vertex_index
+            uv_layer.data[loop_index].uv = uvs[vertex_index]
+    return mesh
+
+
+def mesh_from_arrays(data):
+    mesh = bpy.data.meshes.new(name="ArrayMesh")
+    fill_mesh(mesh, *asset_arrays(data))
+    return mesh
+
+
+def read(collection, attr, dim, dtype):
+    arr = np.empty(len(collection) * dim, dtype=dtype)
+    collection.foreach_get(attr, arr)
+    return arr
+
+
+def mesh_arrays(mesh):
+    return dict(
+        co=read(mesh.vertices, "co", 3, np.float32),
+        loops=read(mesh.loops, "vertex_index", 1, np.int32),
+        uv=read(mesh.uv_layers["UVMap"].data, "uv", 2, np.float32),
+    )
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    res = func(*args)
+    return res, time.perf_counter() - start
+
+
+def main(args):
+    files = sorted(args.assets_dir.glob("*/*.pkl.gz"))[: args.n]
+    print(f"Benchmarking {len(files)} assets from {args.assets_dir}")
+
+    rows = []
+    for path in files:
+        with gzip.open(path, "rb") as f:
+            data = pickle.load(f)
+
+        ref, t_ref = timed(mesh_from_pydata, data)
+        new, t_new = timed(mesh_from_arrays, data)
+
+        a, b = mesh_arrays(ref), mesh_arrays(new)
+        rows.append(
+            dict(
+                asset=path.parent.name,
+                n_tris=len(new.polygons),
+                t_pydata=t_ref,
+                t_foreach=t_new,
+                match=all(np.allclose(a[k], b[k]) for k in a),
+            )
+        )
+        bpy.data.meshes.remove(ref)
+        bpy.data.meshes.remove(new)
+
+    df = pd.DataFrame.from_records(rows)
+    if len(df) == 0:
+        return
+
+    print(df.to_string())
+    print(f"all match: {df['match'].all()}")
+    print(
+        f"total pydata={df['t_pydata'].sum():.2f}s foreach={df['t_foreach'].sum():.2f}s "
+        f"speedup={df['t_pydata'].sum() / max(df['t_foreach'].sum(), 1e-9):.1f}x"
+    )
+
+    if args.output is not None:
+        df.to_csv(args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets_dir", type=Path, required=True)
+    parser.add_argument("--n", type=int, default=20)
+    parser.add_argument("--output", type=Path, default=None)
+    main(parser.parse_args())
@@ -781,10 +781,14 @@ def export_scene(
     output_folder: Path,
     pipeline_folder=None,
     task_uniqname=None,
+    name=None,
     **kwargs,
 ):
-    bpy.ops.wm.open_mainfile(filepath=str(input_blend))
-    folder = output_folder / f"export_{input_blend.name}"
+    """Export input_blend, or the scene already open (named name) if it is None"""
+    if input_blend is not None:
+        bpy.ops.wm.open_mainfile(filepath=str(input_blend))
+        name = input_blend.name
+    folder = output_folder / f"export_{name}"
     folder.mkdir(exist_ok=True, parents=True)
     export_curr_scene(folder, **kwargs)
 
@@ -1050,6 +1054,15 @@ def main(args):
     targets = sorted(list(args.input_folder.iterdir()))
     blendfile = find_blend_file(targets)
 
+    # save_record directories hold snapshots rather than a scene_{i}.blend per step
+    from infinigen_examples.steps.snapshot import SnapshotStore
+
+    name = None
+    snapshot_iter = SnapshotStore(args.input_folder).latest_iter()
+    if snapshot_iter is not None:
+        SnapshotStore(args.input_folder).restore_scene(snapshot_iter)
+        blendfile, name = None, f"scene_{snapshot_iter}.blend"
+
     for file in targets:
         if file.stem == "solve_state":
             shutil.copy(file, args.output_folder / "solve_state.json")
@@ -1062,6 +1075,7 @@ def main(args):
         vertex_colors=args.vertex_colors,
         individual_export=args.individual,
         omniverse_export=args.omniverse,
+        name=name,
     )
 
     # # wanted to use shutil here but kept making corrupted files
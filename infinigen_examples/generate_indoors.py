@@ -42,6 +42,7 @@ from infinigen_examples.util import constraint_util as cu
 from infinigen_examples.util.generate_indoors_util import (
     restrict_solving,
 )
+from infinigen_examples.util.iteration_branch import IterationBranches
 from infinigen_examples.util.visible import (
     invisible_wall,
 )
@@ -143,42 +144,7 @@ def compose_indoors(
     else:
         if inplace:
             load_iter = iter
-            os.system(
-                f"cp {save_dir}/record_scene/render_{iter}_marked.jpg {save_dir}/record_scene/render_{iter}_marked_inplaced.jpg"
-            )
-            os.system(
-                f"cp {save_dir}/record_scene/render_{iter}.jpg {save_dir}/record_scene/render_{iter}_inplaced.jpg"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/metric_{iter}.json {save_dir}/record_files/metric_{iter}_inplaced.json"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/scene_{iter}.blend {save_dir}/record_files/scene_{iter}_inplaced.blend"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/env_{iter}.pkl {save_dir}/record_files/env_{iter}_inplaced.pkl"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/house_bbox_{iter}.pkl {save_dir}/record_files/house_bbox_{iter}_inplaced.pkl"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/p_{iter}.pkl {save_dir}/record_files/p_{iter}_inplaced.pkl"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/solved_bbox_{iter}.pkl {save_dir}/record_files/solved_bbox_{iter}_inplaced.pkl"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/solver_{iter}.pkl {save_dir}/record_files/solver_{iter}_inplaced.pkl"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/state_{iter}.pkl {save_dir}/record_files/state_{iter}_inplaced.pkl"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/terrain_{iter}.pkl {save_dir}/record_files/terrain_{iter}_inplaced.pkl"
-            )
-            os.system(
-                f"cp {save_dir}/pipeline/metric_{iter}.json {save_dir}/pipeline/metric_{iter}_inplaced.json"
-            )
+            IterationBranches(save_dir).branch(iter, "inplaced")
         else:
             load_iter = iter - 1
         p = pipeline.RandomStageExecutor(scene_seed, output_folder, overrides)
@@ -3,6 +3,7 @@
 # of this source tree.
 
 import argparse
+import itertools
 import logging
 from pathlib import Path
 
@@ -18,7 +19,6 @@ import os
 import socket
 import sys
 import threading
-import time
 
 import bpy
 import gin
@@ -52,6 +52,13 @@ from infinigen_examples.util import constraint_util as cu
 from infinigen_examples.util.generate_indoors_util import (
     restrict_solving,
 )
+from infinigen_examples.util.iteration_branch import IterationBranches
+from infinigen_examples.util.socket_protocol import (
+    ConnectionClosed,
+    MessageTooLarge,
+    recv_message,
+    send_message,
+)
 from infinigen_examples.util.visible import (
     invisible_others,
     invisible_wall,
@@ -68,9 +75,16 @@ socket_server = None
 is_listening = True
 action_queue = []
 action_lock = threading.Lock()
+action_cond = threading.Condition(action_lock)
 global_overrides = []  # Store initial overrides from command line
 global_configs = ["base"]  # Store initial configs from command line
 command_results = {}
+results_cond = threading.Condition()
+command_ids = itertools.count()
+_NO_RESULT = object()  # command_results had no entry when the server stopped
+
+# iteration whose state / solver / scene are still live in this process
+resident_iter = None
 
 
 def view_all():
@@ -95,7 +109,7 @@ class SocketServer:
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         try:
             self.socket.bind((self.host, self.port))
-            self.socket.listen(1)
+            self.socket.listen(5)
             self.running = True
             logger.info(f"Socket server started on {self.host}:{self.port}")
 
@@ -126,54 +140,61 @@ class SocketServer:
                 self.socket.close()
 
     def handle_client(self, client_socket):
+        """Serve framed requests on one persistent connection until it closes."""
         try:
             while self.running:
-                data = client_socket.recv(1024)
-                if not data:
+                try:
+                    command = recv_message(client_socket)
+                except ConnectionClosed:
+                    break
+                except MessageTooLarge as e:
+                    send_message(
+                        client_socket,
+                        {"status": "error", "message": f"Invalid message: {e}"},
+                    )
                     break
+                except (json.JSONDecodeError, UnicodeDecodeError, ValueError) as e:
+                    send_message(
+                        client_socket,
+                        {"status": "error", "message": f"Invalid message: {e}"},
+                    )
+                    continue
 
-                try:
-                    command = json.loads(data.decode("utf-8"))
-                    logger.info(f"Received command: {command}")
-
-                    # Handle special commands immediately
-                    action = command.get("action", "")
-                    if action in ["ping", "status", "stop_server"]:
-                        result = process_action_command(command)
-                        response = {"status": "completed", "result": result}
-                        client_socket.send(json.dumps(response).encode("utf-8"))
-                        if action == "stop_server":
-                            break
-                    else:
-                        # Add command to action queue for processing
-                        command_id = len(action_queue)  # Simple ID assignment
-                        command["command_id"] = command_id
-
-                        with action_lock:
-                            action_queue.append(command)
-
-                        # # Send acknowledgment
-                        # response = {"status": "queued", "command_id": command_id, "message": "Command queued for processing"}
-                        # client_socket.send(json.dumps(response).encode('utf-8'))
-                        # 3. 阻塞等待结果
-                        while self.running:
-                            if command_id in command_results:
-                                result = command_results.pop(command_id)
-                                response = {
-                                    "status": "completed",
-                                    "command_id": command_id,
-                                    "result": result,
-                                }
-                                client_socket.send(json.dumps(response).encode("utf-8"))
-                                break
-                            time.sleep(0.1)
-
-                except json.JSONDecodeError as e:
-                    error_response = {
-                        "status": "error",
-                        "message": f"Invalid JSON: {e}",
+                request_id = command.get("request_id")
+                logger.info(f"Received command: {command}")
+
+                # Handle special commands immediately
+                action = command.get("action", "")
+                if action in ["ping", "status", "stop_server"]:
+                    result = process_action_command(command)
+                    response = {"status": "completed", "result": result}
+                else:
+                    command_id = next(command_ids)
+                    command["command_id"] = command_id
+
+                    with action_cond:
+                        action_queue.append(command)
+                        action_cond.notify()
+
+                    # Block until blender_action_handler publishes the result
+                    with results_cond:
+                        results_cond.wait_for(
+                            lambda: command_id in command_results or not self.running
+                        )
+                        result = command_results.pop(command_id, _NO_RESULT)
+                    if result is _NO_RESULT:
+                        # server stopped before the command ran
+                        break
+                    response = {
+                        "status": "completed",
+                        "command_id": command_id,
+                        "result": result,
                     }
-                    client_socket.send(json.dumps(error_response).encode("utf-8"))
+
+                response["request_id"] = request_id
+                send_message(client_socket, response)
+                if action == "stop_server":
+                    break
 
         except Exception as e:
             logger.error(f"Client handling error: {e}")
@@ -182,13 +203,15 @@ class SocketServer:
 
     def stop(self):
         self.running = False
+        with results_cond:
+            results_cond.notify_all()
         if self.socket:
             self.socket.close()
 
 
-def start_socket_server():
+def start_socket_server(host="localhost", port=12345):
     global socket_server
-    socket_server = SocketServer()
+    socket_server = SocketServer(host, port)
     server_thread = threading.Thread(target=socket_server.start)
     server_thread.daemon = True
     server_thread.start()
@@ -454,7 +477,9 @@ def blender_action_handler():
         # 这里写入 command_results
         command_id = action.get("command_id")
         if command_id is not None:
-            command_results[command_id] = result
+            with results_cond:
+                command_results[command_id] = result
+                results_cond.notify_all()
 
         # Make sure Blender UI updates
         if not bpy.app.background:
@@ -464,6 +489,22 @@ def blender_action_handler():
     return 0.1  # Check again in 0.1 seconds
 
 
+def serve_actions():
+    """Run queued actions on the main thread of a background Blender worker.
+
+    Unlike a fresh generate_indoors process per tool call, the worker keeps
+    bpy, infinigen and the last State / solver / scene loaded between agent
+    steps, so a step only pays for the action itself.
+    """
+    server = socket_server
+    while server is not None and server.running:
+        with action_cond:
+            action_cond.wait_for(
+                lambda: len(action_queue) > 0 or not server.running, timeout=1.0
+            )
+        blender_action_handler()
+
+
 @gin.configurable
 def compose_indoors(
     output_folder: Path,
@@ -481,6 +522,11 @@ def compose_indoors(
     # bpy.ops.wm.save_as_mainfile(filepath="debug.blend")
     height = 1
     global state, solver, terrain, house_bbox, solved_bbox, camera_rigs, p
+    global resident_iter
+
+    # the live objects are about to be modified, they only match a saved
+    # iteration again once record_scene below has run
+    last_resident_iter, resident_iter = resident_iter, None
 
     # Add debugging to see if terrain is disabled
     logger.info(f"compose_indoors called with terrain_enabled={terrain_enabled}")
@@ -524,49 +570,17 @@ def compose_indoors(
     else:
         if inplace:
             load_iter = iter
-            os.system(
-                f"cp {save_dir}/record_scene/render_{iter}_marked.jpg {save_dir}/record_scene/render_{iter}_marked_inplaced.jpg"
-            )
-            os.system(
-                f"cp {save_dir}/record_scene/render_{iter}.jpg {save_dir}/record_scene/render_{iter}_inplaced.jpg"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/metric_{iter}.json {save_dir}/record_files/metric_{iter}_inplaced.json"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/scene_{iter}.blend {save_dir}/record_files/scene_{iter}_inplaced.blend"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/env_{iter}.pkl {save_dir}/record_files/env_{iter}_inplaced.pkl"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/house_bbox_{iter}.pkl {save_dir}/record_files/house_bbox_{iter}_inplaced.pkl"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/p_{iter}.pkl {save_dir}/record_files/p_{iter}_inplaced.pkl"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/solved_bbox_{iter}.pkl {save_dir}/record_files/solved_bbox_{iter}_inplaced.pkl"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/solver_{iter}.pkl {save_dir}/record_files/solver_{iter}_inplaced.pkl"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/state_{iter}.pkl {save_dir}/record_files/state_{iter}_inplaced.pkl"
-            )
-            os.system(
-                f"cp {save_dir}/record_files/terrain_{iter}.pkl {save_dir}/record_files/terrain_{iter}_inplaced.pkl"
-            )
-            os.system(
-                f"cp {save_dir}/pipeline/metric_{iter}.json {save_dir}/pipeline/metric_{iter}_inplaced.json"
-            )
+            IterationBranches(save_dir).branch(iter, "inplaced")
         else:
             load_iter = iter - 1
         p = pipeline.RandomStageExecutor(scene_seed, output_folder, overrides)
-        state, solver, terrain, house_bbox, solved_bbox, _ = record.load_scene(
-            load_iter
-        )
-        view_all()
+        if last_resident_iter is not None and last_resident_iter == load_iter:
+            logger.info(f"Reusing resident scene of iter {load_iter}")
+        else:
+            state, solver, terrain, house_bbox, solved_bbox, _ = record.load_scene(
+                load_iter
+            )
+            view_all()
         camera_rigs = [bpy.data.objects.get("CameraRigs/0")]
 
         if action == "add_relation":
@@ -701,6 +715,7 @@ def compose_indoors(
         state, solver, terrain, house_bbox, solved_bbox, camera_rigs, iter, p
     )
     evaluate.eval_metric(state, iter, remove_bad=True)
+    resident_iter = iter
 
     record_success()
 
@@ -1093,18 +1108,23 @@ def main(args):
 
     # Start socket server
     logger.info("Starting socket server for remote commands...")
-    start_socket_server()
+    start_socket_server(port=args.port)
 
     # Register Blender timer for action handling
     if not bpy.app.background:
         # Option 1: Use global overrides (current implementation)
         bpy.app.timers.register(blender_action_handler, persistent=True)
         logger.info("Blender action handler registered. Waiting for socket commands...")
-        logger.info("Send JSON commands to localhost:12345 with format:")
+        logger.info("Send length-prefixed JSON commands to localhost:12345 with format:")
         iter = args.iter
         
         logger.info('{"iter": '+str(iter)+ ', "save_dir": '+args.save_dir+'}')
 
+    elif args.serve:
+        # Background worker: keep the scene resident and serve socket commands
+        logger.info("Serving socket commands from a background Blender worker...")
+        serve_actions()
+
     else:
         # If running in background mode, execute once with provided args
         execute_main_logic(args)
@@ -1155,6 +1175,12 @@ if __name__ == "__main__":
         "e.g. --gin_param module_1.a=2 module_2.b=3",
     )
     parser.add_argument("--task_uniqname", type=str, default=None)
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="In background mode, keep serving socket commands instead of running once",
+    )
+    parser.add_argument("--port", type=int, default=12345)
     parser.add_argument("-d", "--debug", type=str, nargs="*", default=None)
 
     # invisible_others()
@@ -5,24 +5,17 @@ This script demonstrates how to communicate with the modified generate_indoors_m
 """
 
 import argparse
-import json
 import socket
 
+from infinigen_examples.util.socket_protocol import recv_message, send_message
+
 
 def send_command(host="localhost", port=12345, command=None):
     """Send a single command to the Blender socket server"""
     try:
-        # Create socket connection
-        client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client_socket.connect((host, port))
-
-        # Send command
-        command_json = json.dumps(command)
-        client_socket.send(command_json.encode("utf-8"))
-
-        # Receive response
-        response = client_socket.recv(1024)
-        response_data = json.loads(response.decode("utf-8"))
+        with socket.create_connection((host, port)) as client_socket:
+            send_message(client_socket, {**command, "request_id": 0})
+            response_data = recv_message(client_socket)
 
         print(f"Sent: {command}")
         print(f"Response: {response_data}")
@@ -32,9 +25,6 @@ def send_command(host="localhost", port=12345, command=None):
     except Exception as e:
         print(f"Error: {e}")
         return None
-    finally:
-        if "client_socket" in locals():
-            client_socket.close()
 
 
 def main():
@@ -15,6 +15,7 @@ from infinigen.core.constraints.constraint_language.util import delete_obj_with_
 
 # from infinigen.core import tags as t
 from infinigen.core.constraints.evaluator.node_impl.trimesh_geometry import any_touching
+from infinigen_examples.steps.physics_metrics import physics_metrics
 
 
 def eval_metric(state, iter, remove_bad=False, save=True):
@@ -74,8 +75,7 @@ def calc_intersection_volume(obj_a, obj_b):
     return volume
 
 
-def eval_physics_score(state, remove_bad=False):
-    scene = state.trimesh_scene
+def physics_objs(state):
     collision_objs = []
     map_names = dict()
     for name, info in state.objs.items():
@@ -90,6 +90,28 @@ def eval_physics_score(state, remove_bad=False):
             name_obj = state.objs[name].populate_obj
             map_names[name_obj] = name
             collision_objs.append(name_obj)  # mesh
+    return collision_objs, map_names
+
+
+def eval_physics_score(state, remove_bad=False, exact=False):
+    """
+    exact: run the per-object any_touching and mesh boolean path instead of
+    the single pass engine in physics_metrics. Both return the same dict.
+    """
+    if exact:
+        return eval_physics_score_exact(state, remove_bad=remove_bad)
+
+    collision_objs, map_names = physics_objs(state)
+    print("Nobj: ", len(collision_objs))
+    results = physics_metrics(state, collision_objs, map_names)
+    print("OOB: ", results["OOB"], results["OOB Objects"])
+    print("BBL: ", results["BBL"])
+    return results, map_names
+
+
+def eval_physics_score_exact(state, remove_bad=False):
+    scene = state.trimesh_scene
+    collision_objs, map_names = physics_objs(state)
 
     Nobj = len(collision_objs)
     print("Nobj: ", Nobj)
@@ -164,12 +186,10 @@ def eval_physics_score(state, remove_bad=False):
                     if collide_pair not in collide_pairs:
                         # check again
                         # Example usage:
-                        obj1 = state.trimesh_scene.geometry[
-                            state.objs[collide_pair[0]].obj.name + "_mesh"
-                        ]
-                        obj2 = state.trimesh_scene.geometry[
-                            state.objs[collide_pair[1]].obj.name + "_mesh"
-                        ]
+                        obj1, obj2 = iu.meshes_from_names(
+                            state.trimesh_scene,
+                            [state.objs[n].obj.name for n in collide_pair],
+                        )
 
                         if obj1.is_watertight and obj2.is_watertight:
                             vol = trimesh.boolean.boolean_manifold(
@@ -0,0 +1,175 @@
+"""
+2D annotation overlay drawn straight onto a rendered image.
+
+draw_bbox builds wireframe cubes, text, arrows and grid markers as blender
+objects and render_scene renders them a second time. Here the same marks are
+projected through the camera that produced the render and drawn with PIL, so
+no second render and no temporary datablocks are needed.
+"""
+
+import bpy
+import numpy as np
+from mathutils import Vector
+from PIL import Image, ImageDraw, ImageFont
+
+# box corners of obj.bound_box joined by an edge
+BBOX_EDGES = [
+    (0, 1), (1, 2), (2, 3), (3, 0),
+    (4, 5), (5, 6), (6, 7), (7, 4),
+    (0, 4), (1, 5), (2, 6), (3, 7),
+]  # fmt: skip
+
+BBOX_COLOR = (0, 77, 255)
+LABEL_COLOR = (255, 255, 255)
+ARROW_COLOR = (255, 128, 0)
+COORD_COLOR = (255, 0, 0)
+AXIS_COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+
+
+def load_font(size):
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except IOError:
+        return ImageFont.load_default(size)
+
+
+class CameraProjection:
+    """Projects world points to pixels of a render from scene.camera"""
+
+    def __init__(self, scene, width, height):
+        render = scene.render
+        cam = scene.camera
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        proj = cam.calc_matrix_camera(
+            depsgraph,
+            x=render.resolution_x,
+            y=render.resolution_y,
+            scale_x=render.pixel_aspect_x,
+            scale_y=render.pixel_aspect_y,
+        )
+        view = cam.matrix_world.normalized().inverted()
+        self.matrix = np.array(proj @ view)
+        self.width = width
+        self.height = height
+
+    def __call__(self, points) -> np.ndarray:
+        """(N, 2) pixel coordinates of (N, 3) world points, nan behind the camera"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        clip = np.concatenate([points, np.ones((len(points), 1))], axis=-1)
+        clip = clip @ self.matrix.T
+        w = clip[:, 3:]
+        ndc = np.where(w > 1e-9, clip[:, :2] / np.where(w > 1e-9, w, 1), np.nan)
+        return np.stack(
+            [(ndc[:, 0] + 1) / 2 * self.width, (1 - ndc[:, 1]) / 2 * self.height],
+            axis=-1,
+        )
+
+
+def _visible(*pixels):
+    return all(np.isfinite(p).all() for p in pixels)
+
+
+def draw_arrow(draw, project, start, end, color, width=4, head=14):
+    (p0, p1) = project([start, end])
+    if not _visible(p0, p1):
+        return
+    draw.line([tuple(p0), tuple(p1)], fill=color, width=width)
+
+    d = p1 - p0
+    length = np.linalg.norm(d)
+    if length < 1e-6:
+        return
+    d /= length
+    n = np.array([-d[1], d[0]])
+    tip = p1 + d * head
+    draw.polygon(
+        [tuple(tip), tuple(p1 + n * head / 2), tuple(p1 - n * head / 2)], fill=color
+    )
+
+
+def draw_label(draw, xy, text, font, padding=4):
+    left, top, right, bottom = draw.textbbox(tuple(xy), text, font=font)
+    draw.rectangle(
+        [left - padding, top - padding, right + padding, bottom + padding],
+        fill=BBOX_COLOR,
+    )
+    draw.text(tuple(xy), text, fill=LABEL_COLOR, font=font)
+
+
+def object_label(name):
+    cat_name = "_".join(name.split("_")[1:])
+    if cat_name.endswith("Factory"):
+        cat_name = cat_name[:-7]
+    return cat_name
+
+
+def draw_object_marks(draw, project, state, font):
+    """Rotated bbox, category label and front arrow of every object, as get_bbox"""
+    for name, os in state.objs.items():
+        if name.startswith("window") or name == "newroom_0-0" or name == "entrance":
+            continue
+        obj = os.obj
+        if obj.type != "MESH":
+            continue
+
+        m = np.array(obj.matrix_world)
+        local = np.array([tuple(c) for c in obj.bound_box])
+        pixels = project(local @ m[:3, :3].T + m[:3, 3])
+        for i, j in BBOX_EDGES:
+            if _visible(pixels[i], pixels[j]):
+                edge = [tuple(pixels[i]), tuple(pixels[j])]
+                draw.line(edge, fill=BBOX_COLOR, width=3)
+
+        # top center of the box, where draw_bbox puts the label and arrow
+        lo, hi = local.min(axis=0), local.max(axis=0)
+        center = (lo + hi) / 2
+        top = m[:3, :3] @ np.array([center[0], center[1], hi[2]]) + m[:3, 3]
+        front = obj.matrix_world.to_3x3() @ Vector((1, 0, 0))
+        front = np.array(front.normalized())
+        size = (hi - lo) * np.array(obj.matrix_world.to_scale())
+        draw_arrow(draw, project, top, top + front * size[0] * 0.75, ARROW_COLOR)
+
+        (label_xy,) = project([top])
+        if _visible(label_xy):
+            draw_label(draw, label_xy, object_label(name), font)
+
+
+def draw_axes(draw, project, length=1.3):
+    """World axes at the origin, as get_arrow"""
+    for axis, color in zip(np.eye(3), AXIS_COLORS):
+        draw_arrow(draw, project, np.zeros(3), axis * length, color)
+
+
+def draw_coords(draw, project, dimensions, font, radius=6):
+    """Dot and (x,y) label on every integer floor coordinate, as get_coord"""
+    xs, ys = np.meshgrid(
+        np.arange(round(dimensions[0]) + 1),
+        np.arange(round(dimensions[1]) + 1),
+        indexing="ij",
+    )
+    grid = np.stack([xs.ravel(), ys.ravel(), np.zeros(xs.size)], axis=-1)
+    for (x, y, _), p in zip(grid.astype(int), project(grid)):
+        if not _visible(p):
+            continue
+        draw.ellipse([tuple(p - radius), tuple(p + radius)], fill=COORD_COLOR)
+        xy = (p[0] + radius, p[1] - 3 * radius)
+        draw.text(xy, f"({x},{y})", fill=COORD_COLOR, font=font)
+
+
+def draw_overlay(image_path, output_path, state, solver, transparent=False):
+    """Draw the annotation marks over the render in image_path, save to output_path"""
+    image = Image.open(image_path).convert("RGBA")
+    project = CameraProjection(bpy.context.scene, *image.size)
+
+    layer = Image.new("RGBA", image.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+    draw_coords(draw, project, solver.dimensions, load_font(20))
+    draw_axes(draw, project)
+    draw_object_marks(draw, project, state, load_font(24))
+
+    combined = Image.alpha_composite(image, layer)
+    if transparent:
+        combined.save(output_path, "PNG")
+    else:
+        combined.convert("RGB").save(output_path, "JPEG", quality=95)
+    return output_path
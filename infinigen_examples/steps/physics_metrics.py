@@ -0,0 +1,112 @@
+"""
+Single pass physics metrics for eval_physics_score.
+
+The exact path runs any_touching once per object against all others and a
+mesh boolean per contact. Here every object is projected to the floor in one
+vectorized shapely call, a single AABB broad phase over all objects picks the
+candidate pairs, FCL only runs on those, and overlap volumes are estimated on
+a voxel grid over the AABB overlap of each colliding pair.
+"""
+
+import fcl
+import numpy as np
+import shapely
+import trimesh
+
+from infinigen.core.constraints.constraint_language import util as iu
+from infinigen.core.constraints.evaluator.node_impl.trimesh_geometry import (
+    voxel_overlap_volume,
+)
+
+
+def out_of_bounds(scene, names, room_name, tolerance=1e-2) -> np.ndarray:
+    """
+    Whether the floor footprint of each object leaves the room footprint.
+
+    The projection of an object's convex hull onto the floor is the 2D convex
+    hull of its vertices, so all footprints come out of one shapely call.
+    """
+    if len(names) == 0:
+        return np.zeros(0, dtype=bool)
+
+    room = iu.meshes_from_names(scene, room_name)[0]
+    room_poly = trimesh.path.polygons.projected(room, (0, 0, 1), (0, 0, 0))
+    room_poly = room_poly.buffer(tolerance)
+    shapely.prepare(room_poly)
+
+    meshes = iu.meshes_from_names(scene, names)
+    coords = np.concatenate([m.vertices[:, :2] for m in meshes])
+    indices = np.repeat(np.arange(len(meshes)), [len(m.vertices) for m in meshes])
+    footprints = shapely.convex_hull(shapely.multipoints(coords, indices=indices))
+    return ~shapely.within(footprints, room_poly)
+
+
+def colliding_pairs(scene, names, threshold=1e-3, max_contacts=100000):
+    """Pairs of names whose FCL contacts go deeper than threshold, in names order"""
+    if len(names) < 2:
+        return []
+
+    # broad phase, only pairs of overlapping boxes reach FCL
+    bounds = iu.world_aabbs(scene, names)
+    overlap = iu.aabb_penetration_depth(bounds, bounds)
+    candidates = np.argwhere(np.triu(overlap > 0, k=1))
+
+    geoms = [scene.geometry[g] for _, g in (scene.graph[n] for n in names)]
+    for geom in geoms:
+        # e.g. a state whose collision objects were dropped for pickling
+        if geom.col_obj is None:
+            iu.build_collision_object(geom)
+    request = fcl.CollisionRequest(num_max_contacts=max_contacts, enable_contact=True)
+    pairs = []
+    for i, j in candidates:
+        result = fcl.CollisionResult()
+        fcl.collide(geoms[i].col_obj, geoms[j].col_obj, request, result)
+        if any(c.penetration_depth > threshold for c in result.contacts):
+            pairs.append((names[i], names[j]))
+    return pairs
+
+
+def physics_metrics(
+    state,
+    collision_objs,
+    map_names,
+    depth_threshold=1e-3,
+    volume_threshold=1e-4,
+    resolution=16,
+):
+    """OOB and BBL entries of eval_physics_score, see the module docstring"""
+    scene = state.trimesh_scene
+
+    room_name = state.objs["newroom_0-0"].obj.name
+    oob = out_of_bounds(scene, collision_objs, room_name)
+    OOB_objs = [map_names[n] for n, out in zip(collision_objs, oob) if out]
+
+    collision_objs_norug = [i for i in collision_objs if "rug" not in map_names[i]]
+    collide_pairs = []
+    collide_volume = []
+    for a, b in colliding_pairs(scene, collision_objs_norug, depth_threshold):
+        name1, name2 = map_names[a], map_names[b]
+        collide_pair = [max(name1, name2), min(name1, name2)]
+        if collide_pair in collide_pairs:
+            continue
+
+        obj1, obj2 = iu.meshes_from_names(
+            scene, [state.objs[n].obj.name for n in collide_pair]
+        )
+        if obj1.is_watertight and obj2.is_watertight:
+            vol = voxel_overlap_volume(obj1, obj2, resolution)
+            if vol > volume_threshold:
+                collide_volume.append(vol)
+                collide_pairs.append(collide_pair)
+        else:
+            collide_volume.append(-1)
+            collide_pairs.append(collide_pair)
+
+    return {
+        "Nobj": len(collision_objs),
+        "OOB": len(OOB_objs),
+        "OOB Objects": OOB_objs,
+        "BBL": len(collide_pairs),
+        "BBL objects": collide_pairs,
+        "collide volume": collide_volume,
+    }
@@ -0,0 +1,368 @@
+"""
+Incremental, content-addressed record of the scene at every agent iteration.
+
+Layout under ``{save_dir}/record_files``::
+
+    blobs/<hash>.pkl        dill payloads (one per ObjectState, solver, p, terrain, ...)
+    blobs/<hash>.blend      blender library holding one object tree (root + children)
+    blobs/keyframe_*.blend  full scene saves that deltas are applied on top of
+    blobs/keyframe_*.json   object tree fingerprints of the matching keyframe
+    snapshot_{iter}.json    manifest mapping every entry of an iteration to a blob
+    scene_{iter}.blend      optional full scene of the iteration (scene_files=True)
+
+Unchanged entries hash to the blob already written by an earlier iteration, so
+saving costs time and disk proportional to what the agent step actually edited.
+A manifest lists every object tree of its iteration, so loading is always one
+keyframe plus a single diff rather than a replay of the whole chain. Tools that
+need the scene of an iteration call restore_scene, see also
+infinigen.launch_blender.record_scene_args for opening one in a new blender.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import bpy
+import dill
+import numpy as np
+
+from infinigen.core.util import blender as butil
+
+logger = logging.getLogger(__name__)
+
+# iteration whose snapshot is currently resident in blender, used as delta parent
+_resident_iter = None
+
+
+def resident_iter():
+    return _resident_iter
+
+
+def _digest(*chunks) -> str:
+    h = hashlib.sha1()
+    for c in chunks:
+        h.update(c if isinstance(c, bytes) else str(c).encode("utf-8"))
+    return h.hexdigest()
+
+
+# foreach_get field, components and dtype of each attribute data_type
+_ATTR_LAYOUT = {
+    "FLOAT": ("value", 1, np.float32),
+    "INT": ("value", 1, np.int32),
+    "INT8": ("value", 1, np.int32),
+    "BOOLEAN": ("value", 1, bool),
+    "FLOAT2": ("vector", 2, np.float32),
+    "INT32_2D": ("value", 2, np.int32),
+    "FLOAT_VECTOR": ("vector", 3, np.float32),
+    "FLOAT_COLOR": ("color", 4, np.float32),
+    "BYTE_COLOR": ("color", 4, np.float32),
+}
+
+
+def _attribute_bytes(attr) -> bytes:
+    if attr.data_type not in _ATTR_LAYOUT:
+        return str([getattr(d, "value", None) for d in attr.data]).encode("utf-8")
+    field, dim, dtype = _ATTR_LAYOUT[attr.data_type]
+    values = np.empty(len(attr.data) * dim, dtype=dtype)
+    attr.data.foreach_get(field, values)
+    return values.tobytes()
+
+
+def _mesh_digest(mesh) -> str:
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    loops = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loops)
+
+    # attribute values cover MaskTag retags, material_index and, since UV maps
+    # are stored as corner attributes, UV edits too
+    attrs = []
+    for name in sorted(mesh.attributes.keys()):
+        attr = mesh.attributes[name]
+        attrs += [name, attr.domain, attr.data_type, _attribute_bytes(attr)]
+    uvs = []
+    for layer in mesh.uv_layers:
+        uv = np.empty(len(layer.data) * 2, dtype=np.float32)
+        layer.data.foreach_get("uv", uv)
+        uvs += [layer.name, uv.tobytes()]
+
+    return _digest(
+        co.tobytes(),
+        loops.tobytes(),
+        len(mesh.polygons),
+        *attrs,
+        *uvs,
+        [m.name if m else None for m in mesh.materials],
+    )
+
+
+def object_fingerprint(obj) -> str:
+    data = obj.data
+    if data is None:
+        data_key = None
+    elif obj.type == "MESH":
+        data_key = _mesh_digest(data)
+    elif obj.type == "LIGHT":
+        data_key = (data.type, data.energy, tuple(data.color))
+    elif obj.type == "CAMERA":
+        data_key = (data.lens, data.sensor_width, data.clip_start, data.clip_end)
+    else:
+        data_key = data.name
+
+    return _digest(
+        obj.name,
+        obj.type,
+        np.array(obj.matrix_basis, dtype=np.float64).tobytes(),
+        obj.parent.name if obj.parent else None,
+        obj.hide_render,
+        obj.hide_viewport,
+        sorted(c.name for c in obj.users_collection),
+        [s.material.name if s.material else None for s in obj.material_slots],
+        [(m.name, m.type, m.show_viewport, m.show_render) for m in obj.modifiers],
+        data_key,
+    )
+
+
+def scene_trees() -> dict:
+    """Fingerprint every top-level object together with its children."""
+    trees = {}
+    for root in bpy.data.objects:
+        if root.parent is not None:
+            continue
+        objs = list(butil.iter_object_tree(root))
+        trees[root.name] = {
+            "hash": _digest(*[object_fingerprint(o) for o in objs]),
+            "objects": [o.name for o in objs],
+            "collections": {
+                o.name: [c.name for c in o.users_collection] for o in objs
+            },
+        }
+    return trees
+
+
+class SnapshotStore:
+    def __init__(
+        self, root, keyframe_interval=5, max_delta_fraction=0.5, scene_files=False
+    ):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.keyframe_interval = keyframe_interval
+        self.max_delta_fraction = max_delta_fraction
+        self.scene_files = scene_files
+
+    def manifest_path(self, iter) -> Path:
+        return self.root / f"snapshot_{iter}.json"
+
+    def has_snapshot(self, iter) -> bool:
+        return self.manifest_path(iter).exists()
+
+    def latest_iter(self):
+        iters = [int(p.stem.split("_")[-1]) for p in self.root.glob("snapshot_*.json")]
+        return max(iters, default=None)
+
+    def read_manifest(self, iter) -> dict:
+        with open(self.manifest_path(iter), "r") as f:
+            return json.load(f)
+
+    def _put(self, payload: bytes) -> str:
+        key = _digest(payload)
+        path = self.blob_dir / f"{key}.pkl"
+        if not path.exists():
+            tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            tmp.write_bytes(payload)
+            os.replace(tmp, path)
+        return key
+
+    def _get(self, key):
+        with open(self.blob_dir / f"{key}.pkl", "rb") as f:
+            return dill.load(f)
+
+    def _dump_state(self, state):
+        # trimesh_scene, planes and bvh_cache are rebuilt by State.__post_init__
+        # on load, so only the ObjectStates and the relation graph are stored
+        shell = copy.copy(state)
+        shell.objs = OrderedDict()
+        shell.trimesh_scene = None
+        shell.planes = None
+        shell.bvh_cache = {}
+        return {
+            "shell": self._put(dill.dumps(shell)),
+            "objs": {k: self._put(dill.dumps(v)) for k, v in state.objs.items()},
+        }
+
+    def _write_tree(self, tree):
+        path = self.blob_dir / f"{tree['hash']}.blend"
+        if path.exists():
+            return
+        objs = {bpy.data.objects[n] for n in tree["objects"]}
+        tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp.blend")
+        bpy.data.libraries.write(str(tmp), objs, fake_user=False, compress=True)
+        os.replace(tmp, path)
+
+    def _keyframe_trees(self, keyframe) -> dict:
+        with open(self.blob_dir / f"{keyframe}.json", "r") as f:
+            return json.load(f)
+
+    def _save_blend(self, iter, parent):
+        bpy.ops.file.make_paths_absolute()
+        trees = scene_trees()
+
+        if parent is not None:
+            base = parent["blend"]
+            base_trees = self._keyframe_trees(base["keyframe"])
+            changed = [
+                name
+                for name, tree in trees.items()
+                if base_trees.get(name, {}).get("hash") != tree["hash"]
+            ]
+            too_long = base["chain"] + 1 >= self.keyframe_interval
+            too_large = len(changed) > self.max_delta_fraction * max(len(trees), 1)
+            is_keyframe = too_long or too_large
+        else:
+            is_keyframe = True
+
+        if is_keyframe:
+            # deltas reference images by absolute path, only keyframes embed them
+            bpy.ops.file.pack_all()
+            keyframe = f"keyframe_{iter}_{uuid.uuid4().hex[:8]}.blend"
+            bpy.ops.wm.save_as_mainfile(
+                filepath=str(self.blob_dir / keyframe), check_existing=False, copy=True
+            )
+            with open(self.blob_dir / f"{keyframe}.json", "w") as f:
+                json.dump(trees, f)
+            self._write_scene_file(iter, keyframe)
+            return {"keyframe": keyframe, "chain": 0, "trees": trees}
+
+        for name in changed:
+            self._write_tree(trees[name])
+        logger.info(
+            f"Snapshot {iter}: {len(changed)}/{len(trees)} object trees differ from keyframe"
+        )
+        self._write_scene_file(iter)
+        return {"keyframe": base["keyframe"], "chain": base["chain"] + 1, "trees": trees}
+
+    def _write_scene_file(self, iter, keyframe=None):
+        """
+        Opt-in full scene_{iter}.blend, e.g. to open an iteration by hand. A
+        keyframe is shared by hardlink (or copied where links are unsupported),
+        other iterations cost a full save.
+        """
+        if not self.scene_files:
+            return
+        scene_path = self.root / f"scene_{iter}.blend"
+        if scene_path.exists():
+            scene_path.unlink()
+        if keyframe is None:
+            bpy.ops.wm.save_as_mainfile(
+                filepath=str(scene_path), check_existing=False, copy=True
+            )
+            return
+        try:
+            os.link(self.blob_dir / keyframe, scene_path)
+        except OSError:
+            shutil.copyfile(self.blob_dir / keyframe, scene_path)
+
+    def save(self, iter, state, **payloads):
+        global _resident_iter
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+
+        parent_iter = _resident_iter
+        parent = None
+        if parent_iter is not None and self.has_snapshot(parent_iter):
+            parent = self.read_manifest(parent_iter)
+
+        solver = payloads.get("solver")
+        solver_state = getattr(solver, "state", None)
+        if solver_state is not None:
+            # the state is stored separately, dont dump it a second time inside solver
+            solver.state = None
+        try:
+            entries = {k: self._put(dill.dumps(v)) for k, v in payloads.items()}
+        finally:
+            if solver_state is not None:
+                solver.state = solver_state
+
+        manifest = {
+            "iter": iter,
+            "parent": parent_iter,
+            "state": self._dump_state(state),
+            "entries": entries,
+            "blend": self._save_blend(iter, parent),
+        }
+
+        tmp = self.manifest_path(iter).with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=4)
+        os.replace(tmp, self.manifest_path(iter))
+        _resident_iter = iter
+        return manifest
+
+    def _restore_blend(self, blend):
+        bpy.ops.wm.open_mainfile(
+            filepath=str(self.blob_dir / blend["keyframe"]),
+            load_ui=False,
+            use_scripts=False,
+        )
+        if blend["chain"] == 0:
+            return
+
+        base_trees = self._keyframe_trees(blend["keyframe"])
+        trees = blend["trees"]
+
+        stale = [
+            name
+            for name, tree in base_trees.items()
+            if trees.get(name, {}).get("hash") != tree["hash"]
+        ]
+        for name in stale:
+            for objname in base_trees[name]["objects"]:
+                obj = bpy.data.objects.get(objname)
+                if obj is None:
+                    continue
+                mesh = obj.data if obj.type == "MESH" else None
+                bpy.data.objects.remove(obj, do_unlink=True)
+                if mesh is not None and mesh.users == 0:
+                    bpy.data.meshes.remove(mesh)
+
+        for name, tree in trees.items():
+            if base_trees.get(name, {}).get("hash") == tree["hash"]:
+                continue
+            path = str(self.blob_dir / f"{tree['hash']}.blend")
+            with bpy.data.libraries.load(path, link=False) as (_, data_to):
+                data_to.objects = list(tree["objects"])
+            for obj in data_to.objects:
+                for cname in tree["collections"].get(obj.name, []):
+                    col = bpy.data.collections.get(cname)
+                    if col is None:
+                        col = bpy.context.scene.collection
+                    if obj.name not in col.objects:
+                        col.objects.link(obj)
+
+    def restore_scene(self, iter):
+        """Bring the blender scene of iteration iter back, without any payloads"""
+        global _resident_iter
+        self._restore_blend(self.read_manifest(iter)["blend"])
+        _resident_iter = iter
+
+    def load(self, iter, restore_blend=True) -> dict:
+        global _resident_iter
+        manifest = self.read_manifest(iter)
+
+        if restore_blend:
+            self._restore_blend(manifest["blend"])
+
+        state = self._get(manifest["state"]["shell"])
+        state.objs = OrderedDict(
+            (k, self._get(v)) for k, v in manifest["state"]["objs"].items()
+        )
+
+        result = {k: self._get(v) for k, v in manifest["entries"].items()}
+        result["state"] = state
+        _resident_iter = iter
+        return result
@@ -17,6 +17,9 @@ from infinigen_examples.steps.draw_bbox import (
     get_bbox,
     get_coord,
 )
+from infinigen_examples.steps import snapshot
+from infinigen_examples.steps.overlay import draw_overlay
+from infinigen_examples.steps.snapshot import SnapshotStore
 from infinigen_examples.util import constraint_util as cu
 from infinigen_examples.util.generate_indoors_util import (
     place_cam_overhead,
@@ -339,8 +342,21 @@ def delete_collection_and_objects(collection_name):
 
 
 def render_scene(
-    p, solved_bbox, camera_rigs, state, solver, filename="debug.jpg", transparent=False
+    p,
+    solved_bbox,
+    camera_rigs,
+    state,
+    solver,
+    filename="debug.jpg",
+    transparent=False,
+    overlay="projection",
 ):
+    """
+    overlay: "projection" draws the bbox / arrow / label / coordinate marks onto
+    the render with PIL, "render" builds them as blender objects and renders
+    them a second time to composite with merge_two_image.
+    """
+
     def invisible_room_ceilings():
         rooms_split["exterior"].hide_viewport = True
         rooms_split["exterior"].hide_render = True
@@ -387,6 +403,20 @@ def render_scene(
     bpy.ops.render.render(write_still=True)
     visible_others()
 
+    if overlay == "projection":
+        if transparent:
+            marked = filename.replace(".png", "_marked.png")
+        else:
+            marked = filename.replace(".jpg", "_marked.jpg")
+        draw_overlay(filename, marked, state, solver, transparent=transparent)
+        # same end state as the render path below
+        visible_others(view_all=True)
+        invisible_others(hide_placeholder=True)
+        bpy.context.scene.camera = None
+        return
+    elif overlay != "render":
+        raise ValueError(f"Unknown {overlay=}")
+
     invisible_others(hide_all=True)
 
     get_bbox(state)
@@ -521,19 +551,13 @@ def world_to_image(image_path, output_path):
 def save_record(state, solver, terrain, house_bbox, solved_bbox, iter, p):
     # state.trimesh_scene = None
     save_dir = os.getenv("save_dir")
-    save_path = f"{save_dir}/record_files/scene_{iter}.blend"
-    bpy.ops.file.make_paths_absolute()
-    bpy.ops.file.pack_all()
-    bpy.ops.wm.save_as_mainfile(filepath=save_path, check_existing=False)
 
     # COMBINED_ATTR_NAME = "MaskTag"
     # obj = bpy.data.objects.get("MetaCategoryFactory(8823346).spawn_asset(6550758)")
     # masktag = surface.read_attr_data(obj, COMBINED_ATTR_NAME)
 
-    for name in state.trimesh_scene.geometry.keys():
-        state.trimesh_scene.geometry[name].fcl_obj = None
-        state.trimesh_scene.geometry[name].col_obj = None
-
+    # the snapshot never pickles trimesh_scene, so its collision objects stay
+    # live for the in-process state
     state.bvh_cache = None
 
     for obj_name in state.objs.keys():
@@ -578,57 +602,26 @@ def save_record(state, solver, terrain, house_bbox, solved_bbox, iter, p):
             "name",
         )
 
-    # for path, value in matches:
-    # print(f"Found int at {path}: {value}")
-    with open(f"{save_dir}/record_files/state_{iter}.pkl", "wb") as file:
-        # for obj_name in state.objs.keys():
-        #     #blender obj
-        #     try:
-        #         dill.dump(state.objs[obj_name], file)
-        #     except:
-        #         import pdb
-        #         pdb.set_trace()
-        dill.dump(state, file)
-    # print("\n".join(state.trimesh_scene.geometry.keys()))
-
     tagging.tag_system.save_tag(f"{save_dir}/record_files/MaskTag.json")
 
-    with open(f"{save_dir}/record_files/solver_{iter}.pkl", "wb") as file:
-        dill.dump(solver, file)
-
-    with open(f"{save_dir}/record_files/p_{iter}.pkl", "wb") as file:
-        dill.dump(p, file)
-
-    # with open(f"record_files/stages_{iter}.pkl", "wb") as file:
-    #     pickle.dump(stages, file)
-
-    # with open(f"record_files/consgraph_{iter}.pkl", "wb") as file:
-    #     pickle.dump(consgraph, file)
-
-    # with open(f"record_files/limits_{iter}.pkl", "wb") as file:
-    #     pickle.dump(limits, file)
-
-    with open(f"{save_dir}/record_files/terrain_{iter}.pkl", "wb") as file:
-        pickle.dump(terrain, file)
-
-    # with open(f"{save_dir}/record_files/solved_rooms_{iter}.pkl", "wb") as file:
-    #     pickle.dump(solved_rooms, file)
-
-    with open(f"{save_dir}/record_files/house_bbox_{iter}.pkl", "wb") as file:
-        pickle.dump(house_bbox, file)
-
-    with open(f"{save_dir}/record_files/solved_bbox_{iter}.pkl", "wb") as file:
-        pickle.dump(solved_bbox, file)
-
-    # with open(f"record_files/camera_rigs_{iter}.pkl", "wb") as file:
-    #     pickle.dump(camera_rigs, file)
-
-    env_file = f"{save_dir}/record_files/env_{iter}.pkl"
-    with open(env_file, "wb") as f:
-        pickle.dump(dict(os.environ), f)
+    # only objects, meshes and payloads that changed since the parent iteration
+    # are written, everything else is shared with earlier snapshots by hash
+    SnapshotStore(f"{save_dir}/record_files").save(
+        iter,
+        state,
+        solver=solver,
+        p=p,
+        terrain=terrain,
+        house_bbox=house_bbox,
+        solved_bbox=solved_bbox,
+        env=dict(os.environ),
+    )
 
+    # leave the state usable in-process, e.g. by a resident Blender worker
     for obj_name in state.objs.keys():
         state.objs[obj_name].obj = bpy.data.objects.get(state.objs[obj_name].obj)
+        recover_generator(state.objs[obj_name].generator)
+    state.bvh_cache = {}
 
     return
 
@@ -663,79 +656,95 @@ def is_collection(attr):
     return x is not None
 
 
-def load_record(iter):
+def recover_generator(generator):
+    """Undo the name substitutions save_record applies to a generator."""
+    recover_attr(
+        generator,
+        is_module,
+        lambda attr: importlib.import_module(attr),
+    )
+    recover_attr(
+        generator,
+        is_material,
+        lambda attr: bpy.data.materials.get(attr),
+    )
+    recover_attr(
+        generator,
+        is_collection,
+        lambda attr: bpy.data.collections.get(attr),
+    )
+
+
+def load_legacy_record(iter):
+    """Load an iteration saved as full per-file dumps, before SnapshotStore."""
     save_dir = os.getenv("save_dir")
     with open(f"{save_dir}/record_files/solver_{iter}.pkl", "rb") as file:
         solver = dill.load(file)
 
-    # with open(f"record_files/stages_{iter}.pkl", "wb") as file:
-    #     stages = pickle.load(file)
-
-    # with open(f"record_files/consgraph_{iter}.pkl", "wb") as file:
-    #     consgraph = pickle.load(file)
-
-    # with open(f"record_files/limits_{iter}.pkl", "wb") as file:
-    #     limits = pickle.load(file)
-
     with open(f"{save_dir}/record_files/terrain_{iter}.pkl", "rb") as file:
         terrain = pickle.load(file)
 
-    # with open(f"record_files/solved_rooms_{iter}.pkl", "wb") as file:
-    #     solved_rooms = pickle.load(file)
-
     with open(f"{save_dir}/record_files/house_bbox_{iter}.pkl", "rb") as file:
         house_bbox = pickle.load(file)
 
     with open(f"{save_dir}/record_files/solved_bbox_{iter}.pkl", "rb") as file:
         solved_bbox = pickle.load(file)
 
-    # with open(f"record_files/camera_rigs_{iter}.pkl", "wb") as file:
-    #     camera_rigs = pickle.load(file)
+    save_path = f"{save_dir}/record_files/scene_{iter}.blend"
+    if not bpy.data.objects.get("newroom_0-0"):
+        bpy.ops.wm.open_mainfile(filepath=save_path, load_ui=False, use_scripts=False)
+
+    with open(f"{save_dir}/record_files/state_{iter}.pkl", "rb") as file:
+        state = dill.load(file)
+
+    with open(f"{save_dir}/record_files/env_{iter}.pkl", "rb") as f:
+        env_vars = pickle.load(f)
+
+    return state, solver, terrain, house_bbox, solved_bbox, env_vars
+
+
+def load_record(iter):
+    save_dir = os.getenv("save_dir")
 
     tagging.tag_system.load_tag(f"{save_dir}/record_files/MaskTag.json")
 
-    # with open(f"record_files/p_{iter}.pkl", "rb") as file:
-    #     p = pickle.load(file)
     p = None
 
-    save_path = f"{save_dir}/record_files/scene_{iter}.blend"
-
-    if not bpy.data.objects.get("newroom_0-0"):
-        bpy.ops.wm.open_mainfile(filepath=save_path, load_ui=False, use_scripts=False)
+    store = SnapshotStore(f"{save_dir}/record_files")
+    if store.has_snapshot(iter):
+        # a live scene is reused unless it belongs to a different iteration,
+        # e.g. after the agent rolled back a failed step
+        resident = snapshot.resident_iter()
+        restore_blend = not bpy.data.objects.get("newroom_0-0") or (
+            resident is not None and resident != iter
+        )
+        record = store.load(iter, restore_blend=restore_blend)
+        state = record["state"]
+        solver = record["solver"]
+        terrain = record["terrain"]
+        house_bbox = record["house_bbox"]
+        solved_bbox = record["solved_bbox"]
+        env_vars = record["env"]
+    else:
+        state, solver, terrain, house_bbox, solved_bbox, env_vars = (
+            load_legacy_record(iter)
+        )
 
     # visible_layer("placeholders")
     visible_layers()
     # bpy.ops.wm.save_as_mainfile(filepath="debug.blend")
 
-    with open(f"{save_dir}/record_files/state_{iter}.pkl", "rb") as file:
-        state = dill.load(file)
-    # print("\n".join(state.trimesh_scene.geometry.keys()))
-
     for obj_name in state.objs.keys():
         # blender obj
         state.objs[obj_name].obj = bpy.data.objects.get(
             state.objs[obj_name].obj
         )  # TODO YYD
+        recover_generator(state.objs[obj_name].generator)
         # if hasattr(state.objs[obj_name], "populate_obj"):
         #     state.objs[obj_name].obj = bpy.data.objects.get(state.objs[obj_name].populate_obj)
         # else:
         #     state.objs[obj_name].obj = bpy.data.objects.get(state.objs[obj_name].obj)
 
-        matches = recover_attr(
-            state.objs[obj_name].generator,
-            is_module,
-            lambda attr: importlib.import_module(attr),
-        )
-        matches = recover_attr(
-            state.objs[obj_name].generator,
-            is_material,
-            lambda attr: bpy.data.materials.get(attr),
-        )
-        matches = recover_attr(
-            state.objs[obj_name].generator,
-            is_collection,
-            lambda attr: bpy.data.collections.get(attr),
-        )
         # #generator
         # generator = state.objs[obj_name].generator
         # if generator is not None:
@@ -773,8 +782,6 @@ def load_record(iter):
 
     solver.state = state
 
-    with open(f"{save_dir}/record_files/env_{iter}.pkl", "rb") as f:
-        env_vars = pickle.load(f)
     json_name = os.getenv("JSON_RESULTS")
     os.environ.update(env_vars)
     os.environ["save_dir"] = save_dir
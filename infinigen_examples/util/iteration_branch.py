@@ -0,0 +1,116 @@
+"""
+Cheap branching of the per-iteration record files under a scene's save_dir.
+
+Marking an iteration as "_failed" or "_inplaced" used to shell out to ``cp``
+once per file. Files are now cloned in-process: immutable or atomically
+replaced files (.blend saves, snapshot manifests) are hardlinked, everything
+else is reflinked where the filesystem supports it and copied otherwise. Each
+branch is recorded in ``{save_dir}/branches.json`` so it can be listed or
+restored later.
+
+Only depends on the standard library, so the agent in Pipeline/ can import it
+from its own environment.
+"""
+
+import errno
+import fcntl
+import json
+import os
+import shutil
+from pathlib import Path
+
+# FICLONE from linux/fs.h, shares extents copy-on-write on btrfs / xfs
+FICLONE = 0x40049409
+
+# files that are only ever replaced through a rename, never rewritten in place,
+# so a hardlink cannot be corrupted by a later write to the original
+HARDLINK_SUFFIXES = (".blend",)
+HARDLINK_PREFIXES = ("snapshot_",)
+
+
+def record_files(save_dir, iter) -> list[Path]:
+    save_dir = Path(save_dir)
+    candidates = [
+        save_dir / "record_scene" / f"render_{iter}_marked.jpg",
+        save_dir / "record_scene" / f"render_{iter}.jpg",
+        save_dir / "record_files" / f"metric_{iter}.json",
+        save_dir / "record_files" / f"snapshot_{iter}.json",
+        save_dir / "record_files" / f"scene_{iter}.blend",
+        save_dir / "pipeline" / f"metric_{iter}.json",
+    ]
+    # records written before SnapshotStore keep one pickle per payload
+    for name in ["env", "house_bbox", "p", "solved_bbox", "solver", "state", "terrain"]:
+        candidates.append(save_dir / "record_files" / f"{name}_{iter}.pkl")
+    return [p for p in candidates if p.exists()]
+
+
+def branch_path(path: Path, suffix) -> Path:
+    # scene_3.blend -> scene_3_failed.blend, render_3_marked.jpg -> render_3_marked_failed.jpg
+    return path.with_name(f"{path.stem}_{suffix}{path.suffix}")
+
+
+def clone_file(src: Path, dst: Path) -> str:
+    """Clone src to dst without a subprocess, returns the method used."""
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+
+    if src.suffix in HARDLINK_SUFFIXES or src.name.startswith(HARDLINK_PREFIXES):
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            pass
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return "reflink"
+        except OSError as e:
+            if e.errno not in (errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY):
+                raise
+        shutil.copyfileobj(fsrc, fdst, 1 << 20)
+    shutil.copystat(src, dst)
+    return "copy"
+
+
+class IterationBranches:
+    def __init__(self, save_dir):
+        self.save_dir = Path(save_dir)
+        self.manifest_path = self.save_dir / "branches.json"
+
+    def _read(self) -> dict:
+        if not self.manifest_path.exists():
+            return {}
+        with open(self.manifest_path, "r") as f:
+            return json.load(f)
+
+    def _write(self, branches):
+        tmp = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(branches, f, indent=4)
+        os.replace(tmp, self.manifest_path)
+
+    def branch(self, iter, suffix) -> dict:
+        """Clone every record file of iter to its {name}_{suffix} counterpart."""
+        files = {}
+        for src in record_files(self.save_dir, iter):
+            dst = branch_path(src, suffix)
+            method = clone_file(src, dst)
+            files[str(dst.relative_to(self.save_dir))] = {
+                "source": str(src.relative_to(self.save_dir)),
+                "method": method,
+            }
+
+        branches = self._read()
+        branches[f"{iter}_{suffix}"] = {"iter": iter, "suffix": suffix, "files": files}
+        self._write(branches)
+        return files
+
+    def restore(self, iter, suffix):
+        """Roll the canonical record files of iter back to a saved branch."""
+        entry = self._read()[f"{iter}_{suffix}"]
+        for dst, info in entry["files"].items():
+            clone_file(self.save_dir / dst, self.save_dir / info["source"])
+
+    def branches(self) -> dict:
+        return self._read()
@@ -0,0 +1,48 @@
+"""
+Length-prefixed JSON framing shared by the Blender socket server and its clients.
+
+Every message on the wire is a 4-byte big-endian unsigned length followed by
+that many bytes of UTF-8 encoded JSON. Connections are persistent: a client may
+send any number of requests over one socket, and each request carries a
+``request_id`` which the server echoes back in the matching response.
+
+The Pipeline side keeps an identical copy of send_message / recv_message in
+Pipeline/app/tool/update_infinigen.py, since it runs in a separate environment.
+"""
+
+import json
+import socket
+import struct
+
+HEADER = struct.Struct("!I")
+MAX_MESSAGE_BYTES = 256 * 1024 * 1024
+
+
+class ConnectionClosed(Exception):
+    pass
+
+
+class MessageTooLarge(ValueError):
+    """The announced payload was not read, so the stream can not be resynced"""
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(min(n - len(buf), 1 << 20))
+        if not chunk:
+            raise ConnectionClosed(f"Peer closed after {len(buf)}/{n} bytes")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def send_message(sock: socket.socket, message: dict):
+    payload = json.dumps(message).encode("utf-8")
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def recv_message(sock: socket.socket) -> dict:
+    (length,) = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if length > MAX_MESSAGE_BYTES:
+        raise MessageTooLarge(f"Message of {length} bytes exceeds {MAX_MESSAGE_BYTES}")
+    return json.loads(_recv_exact(sock, length).decode("utf-8"))
@@ -3,6 +3,7 @@
 outdir="/mnt/fillipo/yandan/scenesage/record_scene/manus/"
 blend="~/software/blender-4.2.0-linux-x64/blender"
 script="~/workspace/SceneWeaver/render/render_single_scene.py"
+repo="$HOME/workspace/SceneWeaver"
 
 for roomtype in "$outdir"/*; do
   # roomtype="/mnt/fillipo/yandan/scenesage/record_scene/manus/0_bedroom/"
@@ -22,8 +23,19 @@ for roomtype in "$outdir"/*; do
         ')
     echo "The highest scene number is: $max_scene"
     blendfile=${room}/record_files/scene_${max_scene}.blend
-    echo $blendfile
-    if [ -f "$blendfile" ]; then
+    # save_record keeps snapshots, restore the latest one when it is newer
+    max_snapshot=$(ls "$room/record_files"/snapshot_*.json 2>/dev/null |
+        awk -F '[_.]' '
+          BEGIN { max=-1 }
+          $(NF-1) ~ /^[0-9]+$/ { if ($(NF-1) > max) max=$(NF-1) }
+          END { print max }
+        ')
+    if [ "$max_snapshot" -ge 0 ] && { [ ! -f "$blendfile" ] || [ "$max_snapshot" -gt "$max_scene" ]; }; then
+        echo "Restoring snapshot $max_snapshot"
+        restore="import sys; sys.path.insert(0, '$repo'); from infinigen_examples.steps.snapshot import SnapshotStore; SnapshotStore('$room/record_files').restore_scene($max_snapshot)"
+        "$blend" --background --python-expr "$restore" --python "$script" "$room"
+    elif [ -f "$blendfile" ]; then
+        echo $blendfile
         "$blend" "$blendfile" --background --python "$script" "$room"
     fi
     # break  # Only process the first room
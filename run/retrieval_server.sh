@@ -0,0 +1,9 @@
+# Start the resident objaverse retrieval server used by the solver
+set -e
+
+cd /home/lj/3D/SceneWeaver
+
+lg holodeck
+
+port=${1:-8765}
+python -m GPT.retrieval_server --port ${port} --device cpu
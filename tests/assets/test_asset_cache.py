@@ -0,0 +1,65 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+import os
+
+import bpy
+
+from infinigen.assets.objaverse_assets.asset_cache import AssetCache
+from infinigen.core.util import blender as butil
+
+
+def make_asset(name="Asset"):
+    bpy.ops.mesh.primitive_cube_add(size=2)
+    obj = bpy.context.active_object
+    obj.name = name
+    return obj
+
+
+def test_asset_cache_miss_then_hit(tmp_path):
+    butil.clear_scene()
+    cache = AssetCache(directory=tmp_path)
+    assert cache.spawn("a" * 40) is None
+
+    obj = make_asset()
+    cache.put("a" * 40, obj)
+
+    spawned = cache.spawn("a" * 40)
+    assert spawned is not None
+    assert spawned.name.startswith("Asset")
+    assert spawned.data is not obj.data
+    assert len(spawned.data.vertices) == len(obj.data.vertices)
+
+    # templates have no users, so scene saves do not carry them
+    template = bpy.data.meshes[AssetCache._template_name("a" * 40)]
+    assert template.users == 0 and not template.use_fake_user
+
+    # a fresh cache, as in a new session, appends the mesh from disk
+    spawned = AssetCache(directory=tmp_path).spawn("a" * 40)
+    assert spawned is not None
+    assert len(spawned.data.vertices) == 8
+
+
+def test_asset_cache_template_survives_garbage_collect(tmp_path):
+    butil.clear_scene()
+    cache = AssetCache(directory=tmp_path)
+    cache.put("b" * 40, make_asset())
+
+    butil.garbage_collect(butil.get_all_bpy_data_targets())
+    assert AssetCache._template_name("b" * 40) in bpy.data.meshes
+    assert cache.spawn("b" * 40) is not None
+
+
+def test_asset_cache_evicts_least_recently_used(tmp_path):
+    cache = AssetCache(directory=tmp_path, max_mb=2.5 / 1024)
+    for i, key in enumerate(["old", "mid", "new"]):
+        (tmp_path / f"{key}.blend").write_bytes(b"0" * 1024)
+        (tmp_path / f"{key}.json").write_text("{}")
+        os.utime(tmp_path / f"{key}.blend", (i, i))
+
+    cache._evict()
+    assert not (tmp_path / "old.blend").exists()
+    assert not (tmp_path / "old.json").exists()
+    assert (tmp_path / "mid.blend").exists()
+    assert (tmp_path / "new.blend").exists()
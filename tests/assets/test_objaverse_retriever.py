@@ -0,0 +1,90 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
+
+import json
+
+import numpy as np
+import pytest
+import torch
+
+from GPT import objaverse_retriever
+from GPT.objaverse_retriever import ObjathorRetriever
+from GPT.retrieval_server import retrieve_categories
+
+E = np.eye(4, dtype=np.float32)
+
+# objathor rows first, then thor, as build_feature_index writes them
+UIDS = ["obj_a", "obj_b", "thor_c"]
+CLIP = np.stack(
+    [
+        [E[0], E[1]],  # obj_a: clip 100 for sofa
+        [0.6 * E[0] + 0.8 * E[1], E[1]],  # obj_b: clip 60 for sofa
+        [E[0], E[2]],  # thor_c: clip 100 for sofa, the only lamp
+    ]
+)
+SBERT = np.array([[0.1], [0.9], [5.0]], dtype=np.float32)
+
+QUERIES = {
+    "a 3D model of a single sofa": E[0],
+    "a 3D model of a single lamp": E[2],
+}
+
+
+class StubClip(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.dummy = torch.nn.Parameter(torch.zeros(1))
+
+    def encode_text(self, tokens):
+        return torch.stack([torch.from_numpy(list(QUERIES.values())[i]) for i in tokens])
+
+
+class StubSbert:
+    def encode(self, queries, convert_to_numpy=True, show_progress_bar=False):
+        return np.ones((len(queries), 1), dtype=np.float32)
+
+
+def stub_tokenizer(queries):
+    return torch.tensor([list(QUERIES).index(q) for q in queries])
+
+
+@pytest.fixture
+def retriever(tmp_path, monkeypatch):
+    np.save(tmp_path / "clip.npy", CLIP)
+    np.save(tmp_path / "sbert.npy", SBERT)
+    with open(tmp_path / "index.json", "w") as f:
+        json.dump({"uids": UIDS, "n_objathor": 2, "sources": {}}, f)
+
+    monkeypatch.setattr(objaverse_retriever, "INDEX_SOURCES", [])
+    monkeypatch.setattr(objaverse_retriever.compress_json, "load", lambda path: {})
+
+    return ObjathorRetriever(
+        clip_model=StubClip(),
+        clip_preprocess=None,
+        clip_tokenizer=stub_tokenizer,
+        sbert_model=StubSbert(),
+        retrieval_threshold=28,
+        index_dir=str(tmp_path),
+    )
+
+
+def test_retrieve_many_ranking(retriever):
+    sofa, lamp = retriever.retrieve_many(list(QUERIES), threshold=30)
+
+    # ranked by clip + sbert, obj_b passes the clip threshold with 60
+    assert [uid for uid, _ in sofa] == ["thor_c", "obj_a", "obj_b"]
+    assert [score for _, score in sofa] == pytest.approx([105, 100.1, 60.9])
+    assert [uid for uid, _ in lamp] == ["thor_c"]
+
+    (sofa,) = retriever.retrieve_many(["a 3D model of a single sofa"], threshold=70)
+    assert [uid for uid, _ in sofa] == ["thor_c", "obj_a"]
+
+
+def test_retrieve_categories_skips_thor(retriever):
+    results = retrieve_categories(retriever, ["sofa", "lamp"], threshold=30)
+
+    # thor_c ranks first for sofa but has no objaverse file
+    assert len(results["sofa"]) == 1
+    assert results["sofa"][0].endswith("obj_a/obj_a.pkl.gz")
+    assert results["lamp"] == []
+    assert retrieve_categories(retriever, []) == {}
@@ -0,0 +1,50 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+import bpy
+import numpy as np
+import pytest
+from bpy_extras.object_utils import world_to_camera_view
+from mathutils import Vector
+
+from infinigen.core.util import blender as butil
+from infinigen_examples.steps.overlay import CameraProjection
+
+
+def make_camera(cam_type, resolution):
+    butil.clear_scene()
+    scene = bpy.context.scene
+    scene.render.resolution_x, scene.render.resolution_y = resolution
+    scene.render.pixel_aspect_x = scene.render.pixel_aspect_y = 1
+
+    bpy.ops.object.camera_add(location=(4, -3, 5), rotation=(0.8, 0, 0.6))
+    cam = bpy.context.active_object
+    cam.data.type = cam_type
+    scene.camera = cam
+    bpy.context.view_layer.update()
+    return scene, cam
+
+
+@pytest.mark.parametrize("cam_type", ["PERSP", "ORTHO"])
+@pytest.mark.parametrize("resolution", [(1920, 1080), (600, 800)])
+def test_camera_projection_matches_world_to_camera_view(cam_type, resolution):
+    scene, cam = make_camera(cam_type, resolution)
+    width, height = resolution
+    project = CameraProjection(scene, width, height)
+
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-2, 2, size=(32, 3))
+    pixels = project(points)
+
+    for p, pixel in zip(points, pixels):
+        x, y, _ = world_to_camera_view(scene, cam, Vector(p))
+        assert pixel == pytest.approx([x * width, (1 - y) * height], abs=1e-3)
+
+
+def test_camera_projection_behind_camera():
+    scene, cam = make_camera("PERSP", (1920, 1080))
+    project = CameraProjection(scene, 1920, 1080)
+
+    behind = np.array(cam.matrix_world @ Vector((0, 0, 1)))
+    assert np.isnan(project([behind])).all()
@@ -101,3 +101,56 @@ def test_tag_canonical_negated():
 
     side = tagging.tagged_face_mask(cube, {-t.Subpart.Top, -t.Subpart.Bottom})
     assert side.sum() == 8  # 4 sides, 2 triangles
+
+
+def test_bulk_mesh_arrays():
+    tagging.tag_system.clear()
+    butil.clear_scene()
+    cube = get_canonical_tag_cube()
+    cube.location = (1, 2, 3)
+    cube.rotation_euler = (0.3, 0, 0.7)
+    cube.scale = (2, 1, 1)
+    bpy.context.view_layer.update()
+
+    verts = butil.mesh_vertices(cube)
+    expected = np.array(
+        [butil.global_vertex_coordinates(cube, v) for v in cube.data.vertices]
+    )
+    assert np.allclose(verts, expected, atol=1e-5)
+
+    normals = butil.mesh_polygon_normals(cube)
+    expected = np.array(
+        [butil.global_polygon_normal(cube, p) for p in cube.data.polygons]
+    )
+    assert np.allclose(normals, expected, atol=1e-5)
+
+    faces = butil.mesh_faces(cube)
+    assert faces.tolist() == [list(p.vertices) for p in cube.data.polygons]
+
+    cube.rotation_euler = (0, 0, 0.7)
+    bpy.context.view_layer.update()
+    tagging.tag_support_surfaces(cube)
+    support = tagging.tagged_face_mask(cube, t.Subpart.SupportSurface)
+    assert np.all(support == tagging.tagged_face_mask(cube, t.Subpart.Top))
+
+
+def test_tag_table_cache():
+    tagging.tag_system.clear()
+    butil.clear_scene()
+    cube = get_canonical_tag_cube()
+
+    table = tagging.tag_table(cube)
+    assert tagging.tag_table(cube) is table
+    assert tagging.union_object_tags(cube) == set(table.tags)
+    assert t.Subpart.SupportSurface not in tagging.union_object_tags(cube)
+
+    # retagging rewrites MaskTag and must not return the stale table
+    top = tagging.tagged_face_mask(cube, t.Subpart.Top)
+    tagging.tag_object(cube, t.Subpart.SupportSurface, top)
+    assert tagging.tag_table(cube) is not table
+    assert t.Subpart.SupportSurface in tagging.union_object_tags(cube)
+    assert np.all(tagging.tagged_face_mask(cube, t.Subpart.SupportSurface) == top)
+    assert np.all(
+        tagging.tagged_face_mask(cube, {t.Subpart.Top, -t.Subpart.SupportSurface})
+        == np.zeros_like(top)
+    )
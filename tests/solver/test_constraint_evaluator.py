@@ -5,8 +5,11 @@ from functools import partial
 
 # Authors: Karhan Kayan
 import bpy
+import fcl
+import networkx as nx
 import numpy as np
 import pytest
+import trimesh
 from mathutils import Vector
 
 from infinigen.assets.objects.seating.chairs import ChairFactory
@@ -15,9 +18,12 @@ from infinigen.assets.utils.bbox_from_mesh import bbox_mesh_from_hipoly
 from infinigen.core import tagging
 from infinigen.core import tags as t
 from infinigen.core.constraints import constraint_language as cl
-from infinigen.core.constraints import usage_lookup
+from infinigen.core.constraints import expand, usage_lookup
+from infinigen.core.constraints import reasoning as r
+from infinigen.core.constraints.constraint_language import util as iu
 from infinigen.core.constraints.evaluator import evaluate
-from infinigen.core.constraints.evaluator.node_impl import node_impls
+from infinigen.core.constraints.evaluator.node_impl import node_impls, trimesh_geometry
+from infinigen.core.constraints.example_solver.geometry.parse_scene import add_to_scene
 from infinigen.core.constraints.example_solver.state_def import (
     ObjectState,
     State,
@@ -39,6 +45,18 @@ def test_home_constraints_implemented():
         assert node.__class__ in node_impls
 
 
+def test_relevance_table_matches_relevant():
+    butil.clear_scene()
+
+    cons = home_constraints()
+    filter_domain = r.Domain({t.Semantics.Furniture, -t.Semantics.Room})
+    table = evaluate.relevance_table(cons, filter_domain)
+
+    for node in cons.constraints.values():
+        for n in node.traverse():
+            assert table[id(n)] == evaluate.relevant(n, filter_domain), n
+
+
 def make_chair_table():
     butil.clear_scene()
     col = butil.get_collection("indoor_scene_test")
@@ -972,6 +990,176 @@ def test_evaluate_hinge():
     assert e(cl.hinge(two, 0, 1.5)) == 0.5
 
 
+def test_bbox_collision_broadphase():
+    rng = np.random.default_rng(0)
+    src = [
+        trimesh.creation.box(extents=rng.uniform(0.5, 2, 3)).apply_translation(
+            rng.uniform(-3, 3, 3)
+        )
+        for _ in range(6)
+    ]
+    tar = [
+        trimesh.creation.box(extents=rng.uniform(0.5, 2, 3)).apply_translation(
+            rng.uniform(-3, 3, 3)
+        )
+        for _ in range(9)
+    ]
+
+    expected = []
+    for b1 in src:
+        for b2 in tar:
+            lo = b1.bounds[1] - b2.bounds[0]
+            hi = b2.bounds[1] - b1.bounds[0]
+            d = min(min(i, j) for i, j in zip(lo, hi))
+            if d > 0:
+                expected.append(d)
+
+    hit, _, contacts = trimesh_geometry.bbox_collision(src, tar)
+    assert hit == (len(expected) > 0)
+    assert np.allclose([c.depth for c in contacts], expected)
+
+
+def test_any_touching_broadphase():
+    butil.clear_scene()
+    obj_states = {}
+    for i in range(4):
+        o = butil.spawn_cube(size=1, location=(i * 0.9, 0, 0), name=f"chair{i}")
+        obj_states[o.name] = ObjectState(o, tags={t.Semantics.Chair})
+    for i in range(4):
+        o = butil.spawn_cube(size=1, location=(i * 3, 5, 0), name=f"table{i}")
+        obj_states[o.name] = ObjectState(o, tags={t.Semantics.Table})
+    state = State(objs=obj_states)
+    scene = state.trimesh_scene
+
+    chairs = ["chair0", "chair2"]
+    others = ["chair1", "chair3", "table0", "table1", "table2", "table3"]
+    assert trimesh_geometry.overlapping_names(scene, chairs, others) == [
+        "chair1",
+        "chair3",
+    ]
+
+    touch = trimesh_geometry.any_touching(scene, chairs, others)
+    assert touch.hit
+    assert {n for pair in touch.names for n in pair} <= set(chairs + others[:2])
+
+    touch = trimesh_geometry.any_touching(
+        scene, ["table0", "table1"], ["table2", "table3"]
+    )
+    assert not touch.hit
+
+
+def test_intersection_voxel_depth():
+    a = trimesh.creation.box(extents=(1, 1, 1))
+    b = trimesh.creation.box(extents=(1, 1, 1)).apply_translation((0.5, 0, 0))
+    c = trimesh.creation.box(extents=(1, 1, 1)).apply_translation((3, 0, 0))
+
+    hit, names, contacts = trimesh_geometry.intersection(
+        [a], [b, c], ["a"], ["b", "c"], mode="voxel"
+    )
+    assert hit
+    assert names == [("a", "b")]
+    assert np.isclose(contacts[0].depth, 0.5, atol=0.05)
+
+
+def test_grid_shortest_path():
+    free = np.ones((5, 5), dtype=bool)
+    free[2, :4] = False  # wall with a gap at j=4
+
+    path = trimesh_geometry.grid_shortest_path(free, (0, 0), (4, 0))
+    assert path[0] == (0, 0) and path[-1] == (4, 0)
+    assert len(path) == 13
+    assert all(free[c] for c in path)
+
+    free[2, 4] = False
+    with pytest.raises(nx.NetworkXNoPath):
+        trimesh_geometry.grid_shortest_path(free, (0, 0), (4, 0))
+
+
+def test_sync_trimesh_lazy_vertices():
+    butil.clear_scene()
+    obj = butil.spawn_cube(size=1, location=(0, 0, 0), name="cube")
+    scene = trimesh.Scene()
+    add_to_scene(scene, obj)
+
+    iu.translate(scene, "cube", (2, 0, 0))
+    iu.translate(scene, "cube", (1, 0, 0))
+
+    _, g = scene.graph["cube"]
+    assert np.allclose(scene.geometry[g].bounds[:, 0], [-0.5, 0.5])
+    assert np.allclose(scene.geometry[g].col_obj.getTranslation(), [3, 0, 0])
+
+    (mesh,) = iu.meshes_from_names(scene, "cube")
+    assert np.allclose(mesh.bounds[:, 0], [2.5, 3.5])
+
+
+def test_subset_tag_index():
+    scene = trimesh.Scene()
+    for name, tags in [
+        ("chair", {t.Semantics.Chair}),
+        ("table", {t.Semantics.Table}),
+        ("desk", {t.Semantics.Table, t.Semantics.Desk}),
+    ]:
+        mesh = trimesh.creation.box(extents=(1, 1, 1))
+        mesh.metadata["tags"] = tags
+        scene.add_geometry(mesh, geom_name=name + "_mesh", node_name=name)
+        iu.index_node(scene, name, tags)
+
+    assert set(iu.subset(scene, [t.Semantics.Table])) == {"table", "desk"}
+
+    iu.remove_from_scene(scene, "table")
+    assert iu.subset(scene, [t.Semantics.Table]) == ["desk"]
+
+    mesh = trimesh.creation.box(extents=(1, 1, 1))
+    mesh.metadata["tags"] = {t.Semantics.Chair}
+    scene.add_geometry(mesh, geom_name="table_mesh", node_name="table")
+    iu.index_node(scene, "table", mesh.metadata["tags"])
+    assert set(iu.subset(scene, [t.Semantics.Chair])) == {"chair", "table"}
+    assert iu.subset(scene, [t.Semantics.Table]) == ["desk"]
+
+
+def test_expand_mesh_cached(monkeypatch):
+    monkeypatch.setattr(expand, "EXPAND_DISTANCE", {"Shelf": [0.1, 0, 0]})
+
+    mesh = trimesh.creation.box(extents=(1, 1, 1))
+    mesh.current_transform = trimesh.transformations.identity_matrix()
+    mesh.applied_transform = mesh.current_transform
+
+    expanded = expand.expand_mesh(mesh, "Shelf(1)")
+    assert np.allclose(expanded.bounds[:, 0], [-0.5, 0.6])
+
+    mesh.current_transform = trimesh.transformations.translation_matrix([2, 0, 0])
+    assert expand.expand_mesh(mesh, "Shelf(1)") is expanded
+    assert np.allclose(expanded.col_obj.getTranslation(), [2, 0, 0])
+    assert np.allclose(iu.world_mesh(expanded).bounds[:, 0], [1.5, 2.6])
+
+    assert expand.expand_mesh(mesh, "Chair(1)") is mesh
+
+
+def test_build_collision_object_stale_vertices():
+    mesh = trimesh.creation.box(extents=(1, 1, 1))
+    mesh.current_transform = trimesh.transformations.identity_matrix()
+    mesh.applied_transform = mesh.current_transform
+
+    # vertices materialized at x=2, then moved on to x=5 without a world_mesh
+    mesh.current_transform = trimesh.transformations.translation_matrix([2, 0, 0])
+    iu.world_mesh(mesh)
+    mesh.current_transform = trimesh.transformations.translation_matrix([5, 0, 0])
+    mesh.col_obj = None
+
+    iu.build_collision_object(mesh)
+    assert np.allclose(mesh.col_obj.getTranslation(), [5, 0, 0])
+
+    def hits(x):
+        probe = fcl.CollisionObject(fcl.Box(0.1, 0.1, 0.1), fcl.Transform([x, 0, 0]))
+        result = fcl.CollisionResult()
+        fcl.collide(mesh.col_obj, probe, fcl.CollisionRequest(), result)
+        return result.is_collision
+
+    assert hits(5)
+    assert not hits(2)
+    assert not hits(7)
+
+
 if __name__ == "__main__":
     # test_min_dist()
     # test_min_dist_tagged()
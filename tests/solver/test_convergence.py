@@ -0,0 +1,74 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+import dill
+from test_eval_memo import make_state
+
+from infinigen.core.constraints.evaluator import EvalResult
+from infinigen.core.constraints.example_solver.annealing import ConvergenceCriterion
+from infinigen.core.constraints.example_solver.solve import Solver
+
+
+def result(loss, viol=0):
+    return EvalResult(loss_vals={"loss": loss}, violations={"viol": viol})
+
+
+def test_convergence_satisfied():
+    state = make_state(n_chairs=2, n_tables=1)
+    crit = ConvergenceCriterion(
+        min_steps=5, patience=3, plateau=False, still=False
+    )
+    crit.reset(state)
+
+    stops = [crit.update(state, result(1.0, viol=1), False) for _ in range(10)]
+    assert all(s is None for s in stops)
+
+    stops = [crit.update(state, result(1.0), False) for _ in range(3)]
+    assert stops == [None, None, "satisfied"]
+
+
+def test_convergence_waits_for_violations():
+    state = make_state(n_chairs=2, n_tables=1)
+    crit = ConvergenceCriterion(min_steps=0, patience=3, satisfied=False)
+    crit.reset(state)
+
+    # every proposal rejected: the loss plateaus and nothing moves
+    stops = [crit.update(state, result(1.0, viol=2), False) for _ in range(10)]
+    assert all(s is None for s in stops)
+
+    assert crit.update(state, result(1.0), False) in ("plateau", "still")
+
+
+def test_convergence_still_resets_on_move():
+    state = make_state(n_chairs=2, n_tables=1)
+    crit = ConvergenceCriterion(
+        min_steps=0, patience=3, plateau=False, satisfied=False
+    )
+    crit.reset(state)
+
+    crit.update(state, result(1.0), True)
+    crit.update(state, result(1.0), True)
+    state.objs["chair0"].obj.location.x += 1
+    assert crit.update(state, result(1.0), True) is None
+    assert crit.update(state, result(1.0), True) is None
+    assert crit.update(state, result(1.0), True) is None
+    assert crit.update(state, result(1.0), True) == "still"
+
+
+def test_budget_scales_with_active_objects():
+    crit = ConvergenceCriterion(min_steps=50, steps_per_obj=20)
+    assert crit.budget(1000, n_active=3) == 60
+    assert crit.budget(1000, n_active=1) == 50
+    assert crit.budget(100, n_active=30) == 100
+    assert ConvergenceCriterion().budget(1000, n_active=3) == 1000
+
+
+def test_legacy_solver_gets_convergence():
+    # a solver pickled before it had a convergence criterion
+    solver = Solver.__new__(Solver)
+    solver.dimensions = (4, 5, 3)
+
+    restored = dill.loads(dill.dumps(solver))
+    assert isinstance(restored.convergence, ConvergenceCriterion)
+    assert restored.dimensions == (4, 5, 3)
@@ -0,0 +1,139 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
+
+import numpy as np
+import pytest
+
+from infinigen.core import tags as t
+from infinigen.core.constraints import constraint_language as cl
+from infinigen.core.constraints.constraint_language import util as iu
+from infinigen.core.constraints.evaluator import eval_memo, evaluate
+from infinigen.core.constraints.example_solver import moves
+from infinigen.core.constraints.example_solver.state_def import ObjectState, State
+from infinigen.core.util import blender as butil
+
+
+def make_state(n_chairs, n_tables):
+    butil.clear_scene()
+    objs = {}
+    for i in range(n_chairs):
+        chair = butil.spawn_cube(size=1, location=(i * 2, 0, 0), name=f"chair{i}")
+        objs[chair.name] = ObjectState(chair, tags={t.Semantics.Chair})
+    for i in range(n_tables):
+        table = butil.spawn_cube(size=1, location=(i * 2, 3, 0), name=f"table{i}")
+        objs[table.name] = ObjectState(table, tags={t.Semantics.Table})
+    return State(objs=objs)
+
+
+def make_problem():
+    scene = cl.scene()
+    chairs = scene.tagged({t.Semantics.Chair})
+    tables = scene.tagged({t.Semantics.Table})
+
+    score_terms = {
+        "n_chairs": chairs.count(),
+        "n_tables": tables.count(),
+        "chair_table_dist": cl.distance(chairs, tables),
+        "per_chair_dist": chairs.sum(lambda c: cl.distance(c, tables)),
+    }
+    return cl.Problem({}, score_terms)
+
+
+def full_eval(problem, state):
+    bvh_cache, state.bvh_cache = state.bvh_cache, {}
+    try:
+        return evaluate.evaluate_problem(problem, state, memo={})
+    finally:
+        state.bvh_cache = bvh_cache
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_lazy_eval_random_deletions(seed):
+    np.random.seed(seed)
+    state = make_state(n_chairs=5, n_tables=3)
+    problem = make_problem()
+
+    memo = {}
+    evaluate.evaluate_problem(problem, state, memo=memo)
+
+    # chair0 / table0 are never deleted, so distance() always has operands
+    for _ in range(8):
+        candidates = [k for k in state.objs if k not in ("chair0", "table0")]
+        if not candidates:
+            break
+        move = moves.Deletion([np.random.choice(candidates)])
+        move.apply(state)
+
+        eval_memo.evict_memo_for_move(problem, state, memo, move)
+        lazy = evaluate.evaluate_problem(problem, state, memo=memo)
+        real = full_eval(problem, state)
+        assert lazy.loss_vals == pytest.approx(real.loss_vals), move
+
+        if np.random.uniform() < 0.5:
+            move.accept(state)
+        else:
+            eval_memo.evict_memo_for_move(problem, state, memo, move)
+            move.revert(state)
+
+        lazy = evaluate.evaluate_problem(problem, state, memo=memo)
+        real = full_eval(problem, state)
+        assert lazy.loss_vals == pytest.approx(real.loss_vals), move
+
+
+def test_deletion_keeps_unrelated_memo():
+    state = make_state(n_chairs=2, n_tables=2)
+    problem = make_problem()
+
+    memo = {}
+    evaluate.evaluate_problem(problem, state, memo=memo)
+
+    move = moves.Deletion(["table1"])
+    move.apply(state)
+    eval_memo.evict_memo_for_move(problem, state, memo, move)
+
+    # chair-only terms survive deleting a table, anything over tables is evicted
+    assert eval_memo.memo_key(problem.score_terms["n_chairs"]) in memo
+    assert eval_memo.memo_key(problem.score_terms["n_tables"]) not in memo
+    assert cl.scene not in memo
+    assert all("table1" not in names for names, _ in state.bvh_cache)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_lazy_eval_random_translations(seed):
+    np.random.seed(seed)
+    state = make_state(n_chairs=4, n_tables=2)
+    problem = make_problem()
+
+    memo = {}
+    evaluate.evaluate_problem(problem, state, memo=memo)
+
+    for _ in range(8):
+        name = np.random.choice(list(state.objs.keys()))
+        translation = np.random.uniform(-1, 1, 3) * np.array([1, 1, 0])
+        iu.translate(state.trimesh_scene, state.objs[name].obj.name, translation)
+        move = moves.TranslateMove([name], translation=translation)
+
+        eval_memo.evict_memo_for_move(problem, state, memo, move)
+        lazy = evaluate.evaluate_problem(problem, state, memo=memo)
+        real = full_eval(problem, state)
+        assert lazy.loss_vals == pytest.approx(real.loss_vals), move
+
+
+def test_quantifier_bindings_persist():
+    state = make_state(n_chairs=3, n_tables=1)
+    problem = make_problem()
+
+    memo = {}
+    evaluate.evaluate_problem(problem, state, memo=memo)
+
+    per_chair = problem.score_terms["per_chair_dist"]
+    scopes = memo[eval_memo.binding_key(per_chair)]
+    assert set(scopes) == {"chair0", "chair1", "chair2"}
+
+    move = moves.TranslateMove(["chair1"], translation=np.zeros(3))
+    eval_memo.evict_memo_for_move(problem, state, memo, move)
+
+    # only the binding of the moved chair loses its distance value
+    dist_key = eval_memo.memo_key(per_chair.pred)
+    assert dist_key in scopes["chair0"]
+    assert dist_key not in scopes["chair1"]
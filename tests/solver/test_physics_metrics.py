@@ -0,0 +1,60 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
+
+import pytest
+
+from infinigen.core.constraints.example_solver.state_def import ObjectState, State
+from infinigen.core.util import blender as butil
+from infinigen_examples.steps import evaluate, tools
+
+LOCATIONS = {
+    "a": (0, 0, 1),
+    "b": (0.5, 0, 1),  # overlaps half of a
+    "c": (2, 0, 1),
+    "d": (3.2, 0, 1),  # sticks out of the room
+}
+
+
+def make_state():
+    butil.clear_scene()
+    room = butil.spawn_cube(size=1, scale=(6, 6, 0.2), name="newroom_0-0")
+    butil.apply_transform(room)
+    objs = {"newroom_0-0": ObjectState(room)}
+    for key, loc in LOCATIONS.items():
+        bbox = butil.spawn_cube(size=1, location=loc, name=f"{key}_bbox")
+        asset = butil.spawn_cube(size=1, location=loc, name=f"{key}_asset")
+        objs[key] = ObjectState(bbox)
+        objs[key].populate_obj = asset.name
+    return State(objs=objs)
+
+
+def test_physics_metrics_match_exact():
+    state = make_state()
+    fast, map_names = evaluate.eval_physics_score(state)
+    exact, exact_map_names = evaluate.eval_physics_score(state, exact=True)
+
+    assert map_names == exact_map_names
+    assert fast["Nobj"] == exact["Nobj"] == 4
+    assert fast["OOB Objects"] == exact["OOB Objects"] == ["d"]
+    assert fast["BBL"] == exact["BBL"] == 1
+    assert fast["BBL objects"] == exact["BBL objects"] == [["b", "a"]]
+    assert fast["collide volume"] == pytest.approx(exact["collide volume"], rel=0.05)
+    assert fast["collide volume"] == pytest.approx([0.5], rel=0.05)
+
+
+def test_physics_metrics_after_save_record(tmp_path, monkeypatch):
+    monkeypatch.setenv("save_dir", str(tmp_path))
+    (tmp_path / "record_files").mkdir()
+
+    state = make_state()
+    tools.save_record(state, None, None, None, None, 0, None)
+    fast, _ = evaluate.eval_physics_score(state)
+    assert fast["OOB Objects"] == ["d"]
+    assert fast["BBL objects"] == [["b", "a"]]
+
+    # collision objects dropped, as in records written before they were kept
+    for geom in state.trimesh_scene.geometry.values():
+        geom.col_obj = geom.fcl_obj = None
+    fast, _ = evaluate.eval_physics_score(state)
+    assert fast["BBL objects"] == [["b", "a"]]
+    assert fast["collide volume"] == pytest.approx([0.5], rel=0.05)
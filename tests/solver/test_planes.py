@@ -0,0 +1,57 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory of this source tree.
+
+import bpy
+
+from infinigen.core import tagging
+from infinigen.core import tags as t
+from infinigen.core.constraints.example_solver.geometry import parse_scene
+from infinigen.core.constraints.example_solver.geometry.planes import Planes
+from infinigen.core.util import blender as butil
+
+
+def make_cube(name):
+    cube = butil.spawn_cube(name=name)
+    parse_scene.preprocess_obj(cube)
+    tagging.tag_canonical_surfaces(cube)
+    return cube
+
+
+def test_planes_cache_versioning():
+    butil.clear_scene()
+    cube = make_cube("cube")
+    planes = Planes()
+
+    top = planes.get_tagged_planes(cube, {t.Subpart.Top})
+    assert len(top) == 1
+    assert planes.get_tagged_planes(cube, {t.Subpart.Top}) == top
+    assert planes.cache_stats()["planes"]["hits"] == 1
+
+    # moving the object keeps the planes, editing a vertex invalidates them
+    version = planes.calculate_mesh_hash(cube)
+    cube.location = (1, 2, 3)
+    bpy.context.view_layer.update()
+    assert planes.calculate_mesh_hash(cube) == version
+    cube.data.vertices[0].co.x += 0.5
+    assert planes.calculate_mesh_hash(cube) != version
+
+    # a different mesh under the same name never reuses the entry
+    butil.delete(cube)
+    other = make_cube("cube")
+    assert planes.calculate_mesh_hash(other) != version
+
+
+def test_planes_cache_bounded():
+    butil.clear_scene()
+    planes = Planes(max_cached_planes=2)
+    cubes = [make_cube(f"cube{i}") for i in range(3)]
+    for cube in cubes:
+        planes.get_tagged_planes(cube, {t.Subpart.Top})
+
+    stats = planes.cache_stats()["planes"]
+    assert stats["size"] == 2
+    assert stats["misses"] == 3
+
+    # the least recently used cube was evicted
+    planes.get_tagged_planes(cubes[0], {t.Subpart.Top})
+    assert planes.cache_stats()["planes"]["misses"] == 4
@@ -72,6 +72,19 @@ def test_stable_against():
     assert not validity.check_post_move_validity(make_scene((4, 4, 0.5)), "cup")
 
 
+def test_aabb_penetration_scores():
+    # intersects the table
+    state = make_scene((0, 0, 0.5))
+    scores = validity.aabb_penetration_scores(state, ["cup", "table"])
+    assert np.allclose(scores, [0.5, 0.5])
+
+    # resting contact is not a collision
+    assert validity.aabb_penetration_scores(make_scene((0, 0, 1)), ["cup"])[0] == 0
+
+    # far away
+    assert validity.aabb_penetration_scores(make_scene((4, 4, 0.5)), ["cup"])[0] == 0
+
+
 def test_horizontal_stability():
     butil.clear_scene()
     objs = {}